@@ -5,9 +5,12 @@
   - HX711 load cell amplifier for paper weight measurement
   - 4 non-contact water level sensors for ink levels
   
-  Communication with the Raspberry Pi/PC host is done via Serial.
+  Communication with the Raspberry Pi/PC host is done via Serial, as
+  newline-terminated ASCII lines at 9600 baud until the host negotiates
+  binary frames with PROTO:BIN:<baud>.
 */
 
+#include <util/crc16.h>
 #include "HX711.h"
 
 // HX711 load cell pins
@@ -23,6 +26,20 @@
 // Threshold for ink level detection
 #define INK_THRESHOLD 500  // Analog reading threshold (0-1023)
 
+// Streaming mode: readings are pushed when they change instead of polled
+#define STREAM_SAMPLE_MS 250     // Time between sensor samples
+#define HEARTBEAT_MS 5000        // Longest silence before a heartbeat is sent
+#define WEIGHT_DEADBAND 3.0      // Grams the weight must move to be reported (a sheet is ~5 g)
+#define INK_HYSTERESIS 20        // Analog counts past the threshold before an ink state flips
+
+// Binary framing: 0xA5 | length | sequence | message | CRC16-CCITT (big endian)
+// The CRC covers length, sequence and message, starting from 0xFFFF
+#define ASCII_BAUD 9600
+#define FRAME_START 0xA5
+#define MAX_FRAME_PAYLOAD 128
+#define PROTO_CONFIRM_MS 2000    // Back to ASCII if no valid frame arrives this long after switching
+#define HOST_SILENCE_MS 60000    // Back to ASCII if the host sends no valid frame for this long
+
 // HX711 instance
 HX711 scale;
 
@@ -35,9 +52,28 @@ float full_weight = 350.0;       // Weight of full tray in grams
 String inputString = "";
 boolean stringComplete = false;
 
+// Streaming state
+const int inkPins[4] = {INK_BLACK_PIN, INK_CYAN_PIN, INK_MAGENTA_PIN, INK_YELLOW_PIN};
+const char* inkNames[4] = {"BLACK", "CYAN", "MAGENTA", "YELLOW"};
+boolean streaming = false;
+boolean streamReported = false;  // False until the first full record is sent
+unsigned long lastSample = 0;
+unsigned long lastReport = 0;
+float reportedWeight = 0;
+boolean inkLow[4] = {false, false, false, false};
+
+// Framing state
+boolean binaryMode = false;
+boolean binaryConfirmed = false;  // False until the host's first valid frame
+unsigned long switchedAt = 0;
+unsigned long lastFrameAt = 0;    // When the host's last valid frame arrived
+uint8_t txSeq = 0;
+uint8_t frameBuf[MAX_FRAME_PAYLOAD + 4];  // length, sequence, message, CRC
+int framePos = -1;                         // -1 while waiting for a start byte
+
 void setup() {
   // Initialize serial communication
-  Serial.begin(9600);
+  Serial.begin(ASCII_BAUD);
   inputString.reserve(50);
   
   // Initialize HX711 scale
@@ -53,7 +89,7 @@ void setup() {
   
   // Send ready message
   delay(1000);
-  Serial.println("READY");
+  sendMessage("READY");
 }
 
 void loop() {
@@ -65,52 +101,205 @@ void loop() {
     stringComplete = false;
   }
   
-  // Check for serial input
-  while (Serial.available()) {
-    char inChar = (char)Serial.read();
-    if (inChar == '\n') {
+  // Go back to ASCII if the host never spoke after switching to frames, or
+  // went silent long enough that it has probably lost sync
+  if (binaryMode && (binaryConfirmed ? millis() - lastFrameAt >= HOST_SILENCE_MS
+                                     : millis() - switchedAt >= PROTO_CONFIRM_MS)) {
+    Serial.end();
+    Serial.begin(ASCII_BAUD);
+    binaryMode = false;
+    framePos = -1;
+  }
+  
+  // Push changed readings while streaming, but not while a switch is unconfirmed
+  if (streaming && (!binaryMode || binaryConfirmed) && millis() - lastSample >= STREAM_SAMPLE_MS) {
+    lastSample = millis();
+    streamSensors();
+  }
+  
+  // Check for serial input, one command at a time
+  while (Serial.available() && !stringComplete) {
+    uint8_t inByte = Serial.read();
+    if (binaryMode) {
+      if (readFrameByte(inByte)) {
+        binaryConfirmed = true;
+        lastFrameAt = millis();
+        stringComplete = true;
+      }
+    } else if (inByte == '\n') {
       stringComplete = true;
     } else {
-      inputString += inChar;
+      inputString += (char)inByte;
     }
   }
 }
 
+// CRC16-CCITT of a frame body, matching the host's check
+uint16_t frameCrc(const uint8_t* data, int length, uint16_t crc) {
+  for (int i = 0; i < length; i++) {
+    crc = _crc_xmodem_update(crc, data[i]);
+  }
+  return crc;
+}
+
+// Send one message as an ASCII line or, once negotiated, as a binary frame
+void sendMessage(const String& message) {
+  if (!binaryMode) {
+    Serial.println(message);
+    return;
+  }
+  
+  uint8_t header[2];
+  header[0] = min(message.length(), (unsigned int)MAX_FRAME_PAYLOAD);
+  header[1] = txSeq++;
+  uint16_t crc = frameCrc(header, 2, 0xFFFF);
+  crc = frameCrc((const uint8_t*)message.c_str(), header[0], crc);
+  
+  Serial.write(FRAME_START);
+  Serial.write(header, 2);
+  Serial.write((const uint8_t*)message.c_str(), header[0]);
+  Serial.write(crc >> 8);
+  Serial.write(crc & 0xFF);
+}
+
+// Feed one received byte to the frame parser. Returns true once a frame with
+// a valid CRC is complete, with its command in inputString. Bad frames are dropped.
+boolean readFrameByte(uint8_t inByte) {
+  if (framePos < 0) {
+    if (inByte == FRAME_START) {
+      framePos = 0;
+    }
+    return false;
+  }
+  
+  frameBuf[framePos++] = inByte;
+  if (frameBuf[0] > MAX_FRAME_PAYLOAD) {
+    framePos = -1;
+    return false;
+  }
+  int length = frameBuf[0];
+  if (framePos < length + 4) {
+    return false;
+  }
+  framePos = -1;
+  
+  uint16_t received = ((uint16_t)frameBuf[length + 2] << 8) | frameBuf[length + 3];
+  if (frameCrc(frameBuf, length + 2, 0xFFFF) != received) {
+    return false;
+  }
+  inputString = "";
+  for (int i = 0; i < length; i++) {
+    inputString += (char)frameBuf[i + 2];
+  }
+  return true;
+}
+
+// Switch to binary frames at a new baudrate after acknowledging at the old one
+void startBinaryMode(const String& command, long baud) {
+  sendMessage(command);
+  Serial.flush();
+  Serial.end();
+  Serial.begin(baud);
+  binaryMode = true;
+  binaryConfirmed = false;
+  switchedAt = millis();
+  txSeq = 0;
+  framePos = -1;
+}
+
+// One ink sensor field of a READ_ALL record, e.g. ";BLACK=LOW"
+String inkField(const char* name, int pin) {
+  return String(';') + name + '=' + (analogRead(pin) > INK_THRESHOLD ? "HIGH" : "LOW");
+}
+
+// Reading of a single ink sensor, e.g. "INK_BLACK:LOW"
+String inkReading(const char* name, int pin) {
+  return String("INK_") + name + ':' + (analogRead(pin) > INK_THRESHOLD ? "HIGH" : "LOW");
+}
+
+// Update an ink sensor's state, only flipping once the reading is clearly past the threshold
+boolean readInkLow(int index) {
+  int value = analogRead(inkPins[index]);
+  if (value > INK_THRESHOLD + INK_HYSTERESIS) {
+    inkLow[index] = true;
+  } else if (value < INK_THRESHOLD - INK_HYSTERESIS) {
+    inkLow[index] = false;
+  }
+  return inkLow[index];
+}
+
+// Send a SENSOR record when a reading moved past its deadband, otherwise a
+// heartbeat once the link has been quiet for HEARTBEAT_MS
+void streamSensors() {
+  // Sample again next time rather than block waiting on the HX711
+  if (!scale.is_ready()) {
+    return;
+  }
+  
+  float weight = scale.get_units(1);
+  boolean changed = !streamReported || fabs(weight - reportedWeight) >= WEIGHT_DEADBAND;
+  if (changed) {
+    reportedWeight = weight;
+  }
+  
+  for (int i = 0; i < 4; i++) {
+    boolean wasLow = inkLow[i];
+    if (readInkLow(i) != wasLow) {
+      changed = true;
+    }
+  }
+  
+  if (changed) {
+    String record = "SENSOR:WEIGHT=" + String(reportedWeight, 2);
+    for (int i = 0; i < 4; i++) {
+      record += String(';') + inkNames[i] + '=' + (inkLow[i] ? "HIGH" : "LOW");
+    }
+    sendMessage(record);
+    streamReported = true;
+    lastReport = millis();
+  } else if (millis() - lastReport >= HEARTBEAT_MS) {
+    sendMessage("HEARTBEAT:" + String(millis() / 1000));
+    lastReport = millis();
+  }
+}
+
 void processCommand(String command) {
   command.trim();
   
   // Test command to check connectivity
   if (command == "TEST") {
-    Serial.println("READY");
+    sendMessage("READY");
   }
   
   // Read paper weight from HX711
   else if (command == "READ_WEIGHT") {
     float weight = scale.get_units(5); // Average of 5 readings
-    Serial.print("WEIGHT:");
-    Serial.println(weight, 2);
+    sendMessage("WEIGHT:" + String(weight, 2));
+  }
+  
+  // Read every sensor in one reply:
+  // ALL:WEIGHT=<grams>;BLACK=<HIGH|LOW>;CYAN=...;MAGENTA=...;YELLOW=...
+  else if (command == "READ_ALL") {
+    float weight = scale.get_units(5);
+    sendMessage("ALL:WEIGHT=" + String(weight, 2)
+                + inkField("BLACK", INK_BLACK_PIN)
+                + inkField("CYAN", INK_CYAN_PIN)
+                + inkField("MAGENTA", INK_MAGENTA_PIN)
+                + inkField("YELLOW", INK_YELLOW_PIN));
   }
   
   // Read ink levels (binary values)
   else if (command == "READ_INK_BLACK") {
-    int value = analogRead(INK_BLACK_PIN);
-    Serial.print("INK_BLACK:");
-    Serial.println(value > INK_THRESHOLD ? "HIGH" : "LOW");
+    sendMessage(inkReading("BLACK", INK_BLACK_PIN));
   }
   else if (command == "READ_INK_CYAN") {
-    int value = analogRead(INK_CYAN_PIN);
-    Serial.print("INK_CYAN:");
-    Serial.println(value > INK_THRESHOLD ? "HIGH" : "LOW");
+    sendMessage(inkReading("CYAN", INK_CYAN_PIN));
   }
   else if (command == "READ_INK_MAGENTA") {
-    int value = analogRead(INK_MAGENTA_PIN);
-    Serial.print("INK_MAGENTA:");
-    Serial.println(value > INK_THRESHOLD ? "HIGH" : "LOW");
+    sendMessage(inkReading("MAGENTA", INK_MAGENTA_PIN));
   }
   else if (command == "READ_INK_YELLOW") {
-    int value = analogRead(INK_YELLOW_PIN);
-    Serial.print("INK_YELLOW:");
-    Serial.println(value > INK_THRESHOLD ? "HIGH" : "LOW");
+    sendMessage(inkReading("YELLOW", INK_YELLOW_PIN));
   }
   
   // Calibration commands
@@ -125,30 +314,46 @@ void processCommand(String command) {
       // Set the new scale
       scale.set_scale(calibration_factor);
       
-      Serial.print("CALIBRATION_FACTOR:");
-      Serial.println(calibration_factor, 4);
+      sendMessage("CALIBRATION_FACTOR:" + String(calibration_factor, 4));
     } else {
-      Serial.println("ERROR:Invalid weight value");
+      sendMessage("ERROR:Invalid weight value");
     }
   }
   else if (command.startsWith("SET_EMPTY_WEIGHT:")) {
     String weightStr = command.substring(17);
     empty_weight = weightStr.toFloat();
-    Serial.print("EMPTY_WEIGHT_SET:");
-    Serial.println(empty_weight, 2);
+    sendMessage("EMPTY_WEIGHT_SET:" + String(empty_weight, 2));
   }
   else if (command.startsWith("SET_FULL_WEIGHT:")) {
     String weightStr = command.substring(16);
     full_weight = weightStr.toFloat();
-    Serial.print("FULL_WEIGHT_SET:");
-    Serial.println(full_weight, 2);
+    sendMessage("FULL_WEIGHT_SET:" + String(full_weight, 2));
+  }
+  // Switch push mode on or off
+  else if (command == "STREAM:ON") {
+    streaming = true;
+    streamReported = false;  // Start with a full record
+    lastSample = 0;
+    sendMessage("STREAM:ON");
+  }
+  else if (command == "STREAM:OFF") {
+    streaming = false;
+    sendMessage("STREAM:OFF");
+  }
+  // Switch to binary frames; the reply goes out at the old settings
+  else if (command.startsWith("PROTO:BIN:")) {
+    long baud = command.substring(10).toInt();
+    if (baud > 0) {
+      startBinaryMode(command, baud);
+    } else {
+      sendMessage("ERROR:Invalid baudrate");
+    }
   }
   else if (command == "TARE") {
     scale.tare();  // Reset scale to 0
-    Serial.println("TARE_COMPLETE");
+    sendMessage("TARE_COMPLETE");
   }
   else {
-    Serial.print("ERROR:Unknown command: ");
-    Serial.println(command);
+    sendMessage("ERROR:Unknown command: " + command);
   }
 } 
\ No newline at end of file
@@ -2,6 +2,11 @@
 """
 PisoPrint Vendo - Main entry point for the application.
 """
+import time
+
+# Taken before the imports below, so --profile-startup includes them
+STARTED = time.perf_counter()
+
 import os
 import sys
 import argparse
@@ -12,8 +17,10 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # Import the main application
 from src.pisoprint_app import PisoPrintSystem
-from src.config import FULLSCREEN, KIOSK_MODE, ICON_PATH
+from src.config import FULLSCREEN, KIOSK_MODE, ICON_PATH, MONITOR_SERVER
 from src.utils.logger import logger, log_event
+from src.utils.startup import StartupProfiler
+from src.monitor.server import SERVER_MODES
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -22,15 +29,50 @@ def parse_arguments():
                        help='Run in windowed mode instead of fullscreen')
     parser.add_argument('--debug', action='store_true',
                        help='Enable debug logging and features')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                       help='Recompute the statistics rollup tables and exit')
+    parser.add_argument('--profile-startup', action='store_true',
+                       help='Print per-phase startup timings once booted, then exit')
+    parser.add_argument('--monitor-server', choices=SERVER_MODES, default=MONITOR_SERVER,
+                       help='Serve the web monitor from a threaded WSGI server, waitress, '
+                            'or a separate process sharing the database')
     return parser.parse_args()
 
+def rebuild_rollups():
+    """Recompute the statistics rollups from the full print and payment history"""
+    from src.utils.sqlite_manager import SQLiteManager
+    
+    db_manager = SQLiteManager()
+    try:
+        if db_manager.rebuild_rollups():
+            log_event("MAINTENANCE", "Statistics rollups rebuilt")
+        else:
+            log_event("ERROR", "Failed to rebuild statistics rollups")
+    finally:
+        db_manager.close()
+
+def report_startup(app):
+    """Print the startup timings and close the application"""
+    print(app.profiler.report())
+    log_event("STARTUP", f"Startup profile complete in {app.profiler.elapsed():.2f}s")
+    app.shutdown()
+
 def main():
     """Main entry point for the application"""
+    profiler = StartupProfiler(origin=STARTED)
+    profiler.mark('imports done')
+    
     # Parse command line arguments
     args = parse_arguments()
     
+    # Maintenance commands run without the GUI
+    if args.rebuild_rollups:
+        rebuild_rollups()
+        return
+    
     # Initialize Tkinter
-    root = tk.Tk()
+    with profiler.phase('tk'):
+        root = tk.Tk()
     
     # Log application start
     log_event("STARTUP", "Application starting")
@@ -70,7 +112,12 @@ def main():
         root.geometry("1024x768")
     
     # Initialize the app with debug mode if requested
-    app = PisoPrintSystem(root, debug_mode=args.debug)
+    app = PisoPrintSystem(root, debug_mode=args.debug, profiler=profiler,
+                          monitor_server=args.monitor_server)
+    
+    # Report once the printer, Arduino and monitor have all started or failed
+    if args.profile_startup:
+        app.when_booted(lambda: report_startup(app))
     
     # Log application ready
     log_event("STARTUP", "Application initialized and ready")
@@ -11,6 +11,7 @@ setup(
         "Pillow>=9.4.0",
         "PyMuPDF>=1.21.1",
         "pyserial>=3.5",
+        "waitress>=2.1.0",
         "pywin32>=305; platform_system=='Windows'",
         "tk>=0.1.0"
     ],
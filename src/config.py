@@ -29,13 +29,40 @@ BUTTON_COLORS = {
     "numpad": "#FFEB3B",  # Yellow
 }
 FONT_FAMILY = "Inter"
+RETAIN_SCREENS = True  # Build the kiosk's static screens once and re-show them
+PREVIEW_MAX_SIZE = (700, 320)  # Largest preview page in pixels (width, height)
+PREVIEW_CACHE_BYTES = 24 * 1024 * 1024  # Memory budget for rendered preview pages
+PREVIEW_PREFETCH_PAGES = 3  # Pages rendered in the background as soon as a PDF is opened
+
+# Database settings
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL; only the last commits can be lost on power failure
+DB_CACHED_STATEMENTS = 128  # Prepared statements kept per pooled connection
+DB_BUSY_TIMEOUT = 5000  # Milliseconds to wait on a locked database
+DB_MAX_IDLE_READERS = 4  # Reader connections kept for reuse by new threads
+DB_WRITE_BATCH_SIZE = 50  # Maximum queued log rows per transaction
+DB_WRITE_FLUSH_INTERVAL = 0.5  # Seconds a queued log row may wait for a batch
+DB_WRITE_TIMEOUT = 5.0  # Longest wait for a money row to be committed
+DB_SETTINGS_REFRESH_INTERVAL = 1.0  # Seconds between checks for settings changed elsewhere
 
 # Printer settings
 DEFAULT_PRINTER = None  # None means use system default
+PRINT_BACKEND = "auto"  # "sumatra" (Windows), "cups" (Linux), "fake" (tests only) or "auto" (sumatra/cups)
+PRINTER_STATUS_INTERVAL = 15  # Seconds between background printer status checks
+PRINT_MAX_ATTEMPTS = 3  # Tries per print job before it is marked failed
+PRINT_RETRY_DELAY = 30  # Seconds before a failed print attempt is retried
+PRINT_CACHE_DIR = os.path.join(BASE_DIR, "print_cache")  # Prepared print files, keyed by file hash
+PRINT_CACHE_MAX_ENTRIES = 20  # Prepared documents kept for reprints
+PRINT_CHUNK_PAGES = 20  # Pages per spool call for large jobs
+PRINT_PAPER_SIZE = "letter"  # Paper every page is fitted to before printing (short bond)
+PRINT_RASTER_DPI = 200  # Resolution for pages whose fonts cannot be printed as-is
 
 # Hardware settings
 COIN_ACCEPTOR_PORT = "COM4"
 COIN_ACCEPTOR_BAUDRATE = 9600
+SENSOR_MONITOR_INTERVAL = 10  # Seconds between paper and ink sensor sweeps
+SENSOR_STREAMING = True  # Let the Arduino push changed readings instead of being polled
+SENSOR_HEARTBEAT_TIMEOUT = 15  # Seconds without a pushed reading or heartbeat before polling again
+ARDUINO_BINARY_BAUDRATE = 115200  # Baudrate for CRC-checked binary frames if the firmware supports them; None keeps ASCII
 COIN_VALUES = {
     1: 1,    # 1 pulse = 1 peso
     2: 5,    # 2 pulses = 5 pesos
@@ -43,6 +70,12 @@ COIN_VALUES = {
     4: 20    # 4 pulses = 20 pesos
 }
 
+# Web monitor settings
+MONITOR_HOST = "0.0.0.0"
+MONITOR_PORT = 5000
+MONITOR_SERVER = "waitress"  # "waitress", "process" or "threaded" (Werkzeug's server, for development)
+MONITOR_THREADS = 8  # Worker threads for waitress
+
 # Pricing settings
 PRICE_BW_PAGE = 3  # 3 pesos per black & white page
 PRICE_COLOR_PAGE = 5  # 5 pesos per colored page
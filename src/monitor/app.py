@@ -2,7 +2,8 @@
 PisoPrint Vendo Monitoring Web App.
 This Flask application provides remote monitoring of the PisoPrint Vendo system.
 """
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, make_response
+from flask import Flask, current_app, render_template, jsonify, request, redirect, url_for, flash, session, make_response, Response, stream_with_context
+from werkzeug.local import LocalProxy
 import os
 import sys
 import sqlite3
@@ -22,29 +23,22 @@ sys.path.insert(0, project_root)
 # Import the SQLite manager from the main project
 try:
     from src.utils.sqlite_manager import SQLiteManager
+    from src.utils.data_export import EXPORT_DATASETS, EXPORT_FORMATS, export_filename, gzip_stream, iter_export
 except ImportError as e:
     print(f"Error importing SQLiteManager: {e}")
     sys.exit(1)
 
-# Import the custom sensor class
+# Import the shared services container
 try:
-    from src.monitor.sensor import PisoPrintSensors
+    from src.utils.services import Services
 except ImportError as e:
-    print(f"Error importing PisoPrintSensors: {e}")
+    print(f"Error importing shared services: {e}")
     sys.exit(1)
 
 # Get absolute paths
 template_dir = os.path.join(current_dir, 'templates')
 static_dir = os.path.join(current_dir, 'static')
 
-# Initialize Flask with correct paths
-app = Flask(__name__,
-           template_folder=template_dir,
-           static_folder=static_dir)
-
-# Enable template auto-reload
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-
 # Debug path resolution
 print(f"Current directory: {current_dir}")
 print(f"Project root: {project_root}")
@@ -54,35 +48,87 @@ if os.path.exists(template_dir):
     print(f"Files in template directory: {os.listdir(template_dir)}")
 print(f"Static directory: {static_dir}")
 
-app.config['SECRET_KEY'] = 'pisoprint_monitor_key'
-
-# Initialize database manager with error handling
-try:
-    db_manager = SQLiteManager()
-    print("Database manager initialized successfully")
-except Exception as e:
-    print(f"Error initializing database manager: {e}")
-    db_manager = None
-
-# Initialize sensor manager with error handling
-try:
-    sensor_manager = PisoPrintSensors(db_manager)
-    print("Sensor manager initialized successfully")
-except Exception as e:
-    print(f"Error initializing sensor manager: {e}")
-    sensor_manager = None
-
-# Only start monitoring if sensor manager was initialized successfully
-if sensor_manager:
-    try:
-        # Start monitoring with 10-second interval
-        sensor_manager.start_monitoring(10)
-        print("Sensor monitoring started")
-    except Exception as e:
-        print(f"Error starting sensor monitoring: {e}")
+# Shared components of the app serving the current request, set up by create_app
+services = LocalProxy(lambda: current_app.extensions['pisoprint'])
+db_manager = LocalProxy(lambda: services.db_manager)
+sensor_manager = LocalProxy(lambda: services.sensor_manager)
+printer_monitor = LocalProxy(lambda: services.printer_status)
+
+# Views registered on each app made by create_app
+_routes = []
+_error_handlers = []
+
+def route(rule, **options):
+    """Register a view for create_app, like Flask.route"""
+    def decorator(f):
+        _routes.append((rule, options, f))
+        return f
+    return decorator
+
+def errorhandler(code):
+    """Register an error handler for create_app, like Flask.errorhandler"""
+    def decorator(f):
+        _error_handlers.append((code, f))
+        return f
+    return decorator
+
+def create_app(config=None, services=None):
+    """
+    Create the monitoring web app.
+    
+    Args:
+        config (dict, optional): Flask config values overriding the defaults
+        services (Services, optional): Components shared with the kiosk. Without
+            them the app opens its own database, printer poller and sensors, as
+            when the monitor is run on its own.
+            
+    Returns:
+        Flask: The configured app
+    """
+    app = Flask(__name__,
+               template_folder=template_dir,
+               static_folder=static_dir)
+    
+    # Enable template auto-reload
+    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    app.config['SECRET_KEY'] = 'pisoprint_monitor_key'
+    if config:
+        app.config.update(config)
+    
+    if services is None:
+        services = Services()
+        services.start_printer_status()
+        services.start_sensors()
+    app.extensions['pisoprint'] = services
+    
+    for rule, options, view in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    for code, handler in _error_handlers:
+        app.register_error_handler(code, handler)
+    app.context_processor(inject_current_year)
+    return app
+
+def stored_sensor_data():
+    """
+    Get the sensor readings last saved by the kiosk's sensor monitor, for a
+    monitor running in a process of its own.
+    
+    Returns:
+        dict: Sensor data in the same form as PisoPrintSensors.get_sensor_data
+    """
+    colors = ['black', 'cyan', 'magenta', 'yellow']
+    paper_level = db_manager.get_setting('paper_level', 0, cast=int)
+    paper_capacity = db_manager.get_setting('paper_capacity', 50, cast=int)
+    return {
+        'paper_level': paper_level,
+        'paper_capacity': paper_capacity,
+        'paper_percentage': round((paper_level / paper_capacity) * 100, 1) if paper_capacity > 0 else 0,
+        'paper_weight': None,
+        'ink_levels': {color: round(db_manager.get_setting(f'ink_level_{color}', 0, cast=float), 1)
+                       for color in colors}
+    }
 
 # Add a context processor to provide current_year to all templates
-@app.context_processor
 def inject_current_year():
     return {'current_year': datetime.now().year}
 
@@ -109,7 +155,7 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@app.route('/login', methods=['GET', 'POST'])
+@route('/login', methods=['GET', 'POST'])
 def login():
     """Handle user login with enhanced device recognition"""
     # Check for auto-login cookie
@@ -160,7 +206,7 @@ def login():
             if remember:
                 # Session expires after 30 days
                 session.permanent = True
-                app.permanent_session_lifetime = timedelta(days=30)
+                current_app.permanent_session_lifetime = timedelta(days=30)
                 
                 # Create a device token for persistent login
                 device_token = str(uuid.uuid4())
@@ -187,46 +233,46 @@ def login():
     
     return render_template('login.html')
 
-@app.route('/logout')
+@route('/logout')
 def logout():
     """Handle user logout"""
     session.clear()
     flash('You have been logged out', 'info')
     return redirect(url_for('login'))
 
-@app.route('/')
+@route('/')
 def index():
     """Index page redirects to login or dashboard"""
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
     return render_template('login.html')
 
-@app.route('/dashboard')
+@route('/dashboard')
 @login_required
 def dashboard():
     """Dashboard view with system status overview"""
     return render_template('dashboard.html')
 
-@app.route('/transactions')
+@route('/transactions')
 @login_required
 def transactions():
     """Show transaction history"""
     return render_template('transactions.html')
 
-@app.route('/maintenance')
+@route('/maintenance')
 @login_required
 def maintenance():
     """Maintenance view with system health and logs"""
     return render_template('maintenance.html')
 
-@app.route('/settings')
+@route('/settings')
 @admin_required
 def settings():
     """Settings view for system configuration"""
     return render_template('settings.html')
 
 # Add a new route for user management (admin only)
-@app.route('/users')
+@route('/users')
 @admin_required
 def users():
     """User management page"""
@@ -234,7 +280,7 @@ def users():
     return render_template('users.html', users=users_list)
 
 # Add a new API route for user operations
-@app.route('/api/users', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@route('/api/users', methods=['GET', 'POST', 'PUT', 'DELETE'])
 @admin_required
 def api_users():
     """API endpoint for user management"""
@@ -294,40 +340,19 @@ def api_users():
             return jsonify({'status': 'error', 'message': 'Failed to delete user'})
 
 # API Endpoints
-@app.route('/api/system-status')
+@route('/api/system-status')
 def api_system_status():
     """Return system status data as JSON"""
     try:
         # Get system data
         system_data = {}
         
-        # Check if printer is detected using system functions
-        printer_detected = False
-        printer_name = None
-        printer_error = None
-        
-        try:
-            # Try to get printer information
-            import subprocess
-            result = subprocess.run(['lpstat', '-p'], capture_output=True, text=True)
-            
-            if result.returncode == 0 and result.stdout:
-                printer_detected = True
-                # Extract printer name from output if available
-                lines = result.stdout.strip().split('\n')
-                if lines and len(lines) > 0:
-                    printer_name = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else "Default Printer"
-            else:
-                # Check Windows systems
-                result = subprocess.run(['wmic', 'printer', 'get', 'name'], capture_output=True, text=True)
-                if result.returncode == 0 and result.stdout:
-                    lines = result.stdout.strip().split('\n')
-                    if len(lines) > 1:  # Skip header
-                        printer_detected = True
-                        printer_name = lines[1].strip()
-        except Exception as e:
-            printer_error = str(e)
-            app.logger.error(f"Error checking printer: {e}")
+        # Printer status comes from the background monitor's cache
+        printer_status = printer_monitor.get_status() if printer_monitor else {
+            'status': 'error', 'ready': False, 'details': {}, 'message': 'Printer monitor not running'}
+        printer_detected = printer_status.get('status') not in ('error', 'unknown')
+        printer_name = printer_monitor.printer.printer_name if printer_monitor else None
+        printer_error = printer_status.get('message') if printer_status.get('status') == 'error' else None
         
         # Example data structure with enhanced printer detection
         system_data = {
@@ -340,8 +365,10 @@ def api_system_status():
                 'last_maintenance': '2025-02-22',
                 'printer_detected': printer_detected,
                 'printer_name': printer_name or "Epson L121",
-                'printer_online': printer_detected,  # Assume it's online if detected
+                'printer_online': printer_status.get('ready', False),
                 'printer_error': printer_error,
+                'printer_status': printer_status.get('details', {}),
+                'printer_status_checked_at': printer_status.get('checked_at'),
                 'system_uptime': '3 days, 7 hours',
                 'last_reboot': '2025-03-09T01:57:00'
             },
@@ -352,18 +379,38 @@ def api_system_status():
         
         return jsonify(system_data)
     except Exception as e:
-        app.logger.error(f"Error in system status API: {str(e)}")
+        current_app.logger.error(f"Error in system status API: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/transactions')
+def parse_flag(value):
+    """Parse an optional true/false query parameter, None if it is absent"""
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+@route('/api/transactions')
 def api_transactions():
     """Return transaction data as JSON"""
     try:
         # Get parameters
         days = int(request.args.get('days', 30))
-        
-        # Get transaction data
-        transactions = db_manager.get_print_job_stats(100)
+        granularity = request.args.get('granularity', 'day')
+        start = request.args.get('from')
+        end = request.args.get('to')
+        cursor = request.args.get('cursor')
+        limit = min(int(request.args.get('limit', 100)), 500)
+        
+        # Get one page of transactions within the requested range
+        transactions, next_cursor = db_manager.get_print_jobs_page(
+            cursor=cursor,
+            limit=limit,
+            start=start or (datetime.now() - timedelta(days=days)),
+            end=end,
+            is_colored=parse_flag(request.args.get('colored')),
+            success=parse_flag(request.args.get('success')),
+            min_amount=request.args.get('min_amount', type=float),
+            max_amount=request.args.get('max_amount', type=float)
+        )
         
         # Convert to better format for frontend
         formatted_transactions = []
@@ -382,15 +429,16 @@ def api_transactions():
                 'status': 'Success' if tx['success'] else 'Failed'
             })
         
-        # Get revenue data by day for the chart
-        stats = db_manager.get_daily_stats(days)
+        # Get revenue data per period for the chart
         chart_data = []
-        for day, data in stats.items():
+        for row in db_manager.get_period_stats(granularity, start=start, end=end, days=days):
             chart_data.append({
-                'date': day,
-                'revenue': data['revenue'],
-                'pages': data['pages'],
-                'jobs': data['jobs']
+                'date': row.period,
+                'revenue': row.revenue,
+                'pages': row.pages,
+                'jobs': row.jobs,
+                'color_pages': row.color_pages,
+                'bw_pages': row.bw_pages
             })
         
         # Summary data
@@ -401,6 +449,7 @@ def api_transactions():
             'status': 'ok',
             'timestamp': datetime.now().isoformat(),
             'transactions': formatted_transactions,
+            'next_cursor': next_cursor,
             'chart_data': chart_data,
             'summary': {
                 'total_revenue': total_revenue,
@@ -415,13 +464,45 @@ def api_transactions():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/sensor-data')
+@route('/api/export/<dataset>')
+@login_required
+def api_export(dataset):
+    """Stream a dataset as CSV or NDJSON, optionally gzip-compressed"""
+    fmt = request.args.get('format', 'csv')
+    compress = parse_flag(request.args.get('gzip')) or False
+    
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'error': f"Unknown export: {dataset} as {fmt}",
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    
+    # Rows are read and sent chunk by chunk, so memory use does not grow with the table
+    pieces = iter_export(db_manager, dataset, fmt,
+                         start=request.args.get('from'), end=request.args.get('to'))
+    body = gzip_stream(pieces) if compress else pieces
+    
+    suffix = f"_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    filename = export_filename(dataset, fmt, compress, suffix)
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@route('/api/sensor-data')
 def api_sensor_data():
     """Return the current sensor data as JSON"""
     try:
-        sensor_data = sensor_manager.get_sensor_data()
-        # Add Arduino connection status
-        sensor_data['arduino_connected'] = sensor_manager.arduino is not None
+        if sensor_manager:
+            sensor_data = sensor_manager.get_sensor_data()
+            # Add Arduino connection status
+            sensor_data['arduino_connected'] = sensor_manager.is_connected()
+        else:
+            # The kiosk process owns the sensors
+            sensor_data = stored_sensor_data()
+            sensor_data['arduino_connected'] = None
         
         return jsonify({
             'status': 'ok',
@@ -435,19 +516,29 @@ def api_sensor_data():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/settings', methods=['GET'])
+@route('/api/settings', methods=['GET'])
 def api_get_settings():
     """Return the current settings as JSON"""
     try:
+        values = db_manager.get_settings({
+            'price_bw_page': 3,
+            'price_color_page': 5,
+            'max_payment_amount': 100,
+            'printer_name': '',
+            'system_name': 'PisoPrint Vendo',
+            'paper_capacity': 500,
+            'admin_pattern': '1,2,3,4',
+            'session_timeout': 30,
+        })
         settings = {
-            'price_bw_page': float(db_manager.get_setting('price_bw_page', 3)),
-            'price_color_page': float(db_manager.get_setting('price_color_page', 5)),
-            'max_payment_amount': float(db_manager.get_setting('max_payment_amount', 100)),
-            'printer_name': db_manager.get_setting('printer_name', ''),
-            'system_name': db_manager.get_setting('system_name', 'PisoPrint Vendo'),
-            'paper_capacity': int(db_manager.get_setting('paper_capacity', 500)),
-            'admin_pattern': db_manager.get_setting('admin_pattern', '1,2,3,4'),
-            'session_timeout': int(db_manager.get_setting('session_timeout', 30)),
+            'price_bw_page': float(values['price_bw_page']),
+            'price_color_page': float(values['price_color_page']),
+            'max_payment_amount': float(values['max_payment_amount']),
+            'printer_name': values['printer_name'],
+            'system_name': values['system_name'],
+            'paper_capacity': int(values['paper_capacity']),
+            'admin_pattern': values['admin_pattern'],
+            'session_timeout': int(values['session_timeout']),
         }
         return jsonify({
             'status': 'ok',
@@ -461,16 +552,15 @@ def api_get_settings():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/settings', methods=['POST'])
+@route('/api/settings', methods=['POST'])
 def api_update_settings():
     """Update settings from POST data"""
     try:
         data = request.json
         settings = data.get('settings', {})
         
-        # Update each setting
-        for key, value in settings.items():
-            db_manager.set_setting(key, value)
+        # Update all settings in one transaction
+        db_manager.set_settings(settings)
             
         # Log the update
         db_manager.log_admin_access("Settings updated via web interface", 
@@ -488,7 +578,7 @@ def api_update_settings():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/admin-logs')
+@route('/api/admin-logs')
 def api_admin_logs():
     """Return admin access logs as JSON"""
     try:
@@ -517,7 +607,7 @@ def api_admin_logs():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/reset-maintenance')
+@route('/api/reset-maintenance')
 def api_reset_maintenance():
     """Reset the maintenance date to today"""
     try:
@@ -536,7 +626,7 @@ def api_reset_maintenance():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/restock-paper')
+@route('/api/restock-paper')
 def api_restock_paper():
     """Restock paper to full capacity"""
     try:
@@ -556,7 +646,7 @@ def api_restock_paper():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/refill-ink/<color>')
+@route('/api/refill-ink/<color>')
 def api_refill_ink(color):
     """Refill a specific ink cartridge"""
     try:
@@ -568,7 +658,8 @@ def api_refill_ink(color):
             })
         
         db_manager.set_setting(f'ink_level_{color}', 100)
-        sensor_manager.ink_levels[color] = 100
+        if sensor_manager:
+            sensor_manager.ink_levels[color] = 100
         db_manager.log_admin_access("Ink refilled", f"{color} ink refilled via web interface")
         
         return jsonify({
@@ -583,7 +674,7 @@ def api_refill_ink(color):
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/arduino', methods=['POST'])
+@route('/api/arduino', methods=['POST'])
 def api_arduino_command():
     """Send a command to the Arduino"""
     try:
@@ -591,9 +682,12 @@ def api_arduino_command():
         command = data.get('command')
         params = data.get('params', {})
         
-        if command == 'tare':
+        if not sensor_manager:
+            success = False
+            response = {'error': 'Sensor monitor is not running in this process'}
+        elif command == 'tare':
             # Send tare command to scale
-            response = sensor_manager.send_command('TARE')
+            response = sensor_manager.send_command('TARE', expect='TARE_COMPLETE')
             success = response == 'TARE_COMPLETE'
         elif command == 'calibrate_empty':
             # Calibrate with empty tray - Epson L121 specific
@@ -609,10 +703,10 @@ def api_arduino_command():
             # Read raw sensor values
             ink_readings = {}
             for color in ['black', 'cyan', 'magenta', 'yellow']:
-                resp = sensor_manager.send_command(f"READ_INK_{color.upper()}")
+                resp = sensor_manager.send_command(f"READ_INK_{color.upper()}", expect=f"INK_{color.upper()}")
                 if resp:
                     ink_readings[color] = resp
-            weight_resp = sensor_manager.send_command("READ_WEIGHT")
+            weight_resp = sensor_manager.send_command("READ_WEIGHT", expect="WEIGHT")
             success = True
             response = {
                 'ink_readings': ink_readings,
@@ -640,7 +734,7 @@ def api_arduino_command():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/profile')
+@route('/profile')
 @login_required
 def profile():
     """User profile page for viewing and updating account information"""
@@ -649,13 +743,13 @@ def profile():
     return render_template('profile.html', user_data=user_data)
 
 # Add route for forgot password
-@app.route('/forgot-password')
+@route('/forgot-password')
 def forgot_password():
     """Forgot password page"""
     return render_template('forgot_password.html')
 
 # API route for changing user's own password
-@app.route('/api/change-password', methods=['POST'])
+@route('/api/change-password', methods=['POST'])
 @login_required
 def api_change_password():
     """API endpoint for changing password"""
@@ -686,7 +780,7 @@ def api_change_password():
         return jsonify({'status': 'error', 'message': 'Failed to update password'})
 
 # API route for checking username in forgot password flow
-@app.route('/api/check-username', methods=['POST'])
+@route('/api/check-username', methods=['POST'])
 def api_check_username():
     """API endpoint to check if a username exists"""
     data = request.json
@@ -703,7 +797,7 @@ def api_check_username():
         return jsonify({'status': 'error', 'message': 'Username not found'})
 
 # API route for verifying admin PIN
-@app.route('/api/verify-admin-pin', methods=['POST'])
+@route('/api/verify-admin-pin', methods=['POST'])
 def api_verify_admin_pin():
     """API endpoint to verify admin PIN for password reset"""
     data = request.json
@@ -726,7 +820,7 @@ def api_verify_admin_pin():
         return jsonify({'status': 'error', 'message': 'Invalid admin PIN'})
 
 # API route for resetting password
-@app.route('/api/reset-password', methods=['POST'])
+@route('/api/reset-password', methods=['POST'])
 def api_reset_password():
     """API endpoint for resetting password after PIN verification"""
     data = request.json
@@ -746,47 +840,48 @@ def api_reset_password():
     else:
         return jsonify({'status': 'error', 'message': 'Failed to reset password'})
 
-@app.errorhandler(404)
+@errorhandler(404)
 def page_not_found(error):
     """Handle 404 errors"""
     return render_template('error.html', error_code=404, 
                           error_message="Page Not Found"), 404
 
-@app.errorhandler(500)
+@errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
     return render_template('error.html', error_code=500, 
                           error_message="Internal Server Error"), 500
 
-def shutdown_server():
-    """Clean up resources when shutting down"""
-    sensor_manager.shutdown()
+def shutdown_server(app):
+    """
+    Clean up resources when shutting down.
+    
+    Args:
+        app (Flask): App from create_app. Components shared with the kiosk
+            are left running for the kiosk to stop.
+    """
+    app.extensions['pisoprint'].shutdown()
 
 # Remove the auto-start code and make it conditional
 if __name__ == '__main__':
     # Only start the server if running directly
     try:
-        # Register shutdown handler
-        import atexit
-        atexit.register(shutdown_server)
-        
         # Get port from command line or default to 5000
         import sys
         port = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
         
-        # Verify critical components before starting
-        if not db_manager:
-            print("ERROR: Database manager failed to initialize. Cannot start server.")
-            sys.exit(1)
+        # Opens the database, printer poller and sensors for this process
+        app = create_app()
+        
+        # Register shutdown handler
+        import atexit
+        atexit.register(shutdown_server, app)
             
         # Start the server
         print(f"Starting PisoPrint Monitor on port {port}")
         print(f"Visit http://localhost:{port} in your browser")
-        app.run(host='0.0.0.0', port=port, debug=True)
+        app.run(host='0.0.0.0', port=port, debug=True, use_reloader=False)
     except KeyboardInterrupt:
         print("Shutting down PisoPrint Monitor...")
-        shutdown_server()
     except Exception as e:
         print(f"Error starting server: {e}")
-        shutdown_server()
-        sys.exit(1)
\ No newline at end of file
@@ -10,6 +10,8 @@ import os
 import serial
 import re
 from src.utils.sqlite_manager import SQLiteManager
+from src.utils.serial_mux import SerialMux
+from src.config import ARDUINO_BINARY_BAUDRATE, SENSOR_HEARTBEAT_TIMEOUT, SENSOR_STREAMING
 
 # Configure logging
 logging.basicConfig(
@@ -22,24 +24,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger("pisoprint_sensors")
 
+def parse_all_reading(response):
+    """
+    Parse a READ_ALL record into its fields.
+    
+    Args:
+        response (str): Reply such as ALL:WEIGHT=210.50;BLACK=LOW;CYAN=LOW
+        
+    Returns:
+        dict: Field values keyed by name, e.g. {'WEIGHT': '210.50', 'BLACK': 'LOW'},
+            or None if the reply is not a READ_ALL record
+    """
+    if not response or not response.startswith("ALL:"):
+        return None
+    return parse_fields(response[4:])
+
+def parse_fields(payload):
+    """
+    Parse the NAME=value;NAME=value fields of a sensor record.
+    
+    Args:
+        payload (str): Fields, e.g. WEIGHT=210.50;BLACK=LOW
+        
+    Returns:
+        dict: Field values keyed by name, or None if a field is malformed
+    """
+    readings = {}
+    for field in (payload or '').split(';'):
+        name, sep, value = field.partition('=')
+        if not sep:
+            return None
+        readings[name.strip()] = value.strip()
+    return readings
+
 class PisoPrintSensors:
     """Interface for PisoPrint Vendo hardware sensors using Arduino Uno"""
     
-    def __init__(self, db_manager, config_file=None):
+    def __init__(self, db_manager, config_file=None, link=None):
         """
         Initialize the sensor interface.
         
         Args:
             db_manager: Database manager instance for storing readings
             config_file (str, optional): Path to config file
+            link (ArduinoInterface, optional): Connection owned by the kiosk.
+                When given, commands go through it and the serial port is never
+                opened here; readings are simulated while it is disconnected.
         """
         self.db_manager = db_manager
+        self.link = link
         self.running = False
         self.config = self.load_config(config_file)
         
         # Arduino serial connection parameters
         self.arduino_port = self.config.get('arduino_port', 'COM4')
         self.arduino_baudrate = self.config.get('arduino_baudrate', 9600)
+        self.arduino_binary_baudrate = self.config.get('arduino_binary_baudrate', ARDUINO_BINARY_BAUDRATE)
         self.arduino = None
         self.connection_attempts = 0
         self.max_connection_attempts = 5
@@ -68,9 +108,28 @@ class PisoPrintSensors:
             'yellow': 0
         }
         
+        # None until the firmware has answered READ_ALL
+        self.read_all_supported = None
+        
+        # Push mode: the Arduino sends readings when they change, plus heartbeats
+        self.streaming = False
+        self.stream_supported = None
+        self.heartbeat_timeout = SENSOR_HEARTBEAT_TIMEOUT
+        self.last_heartbeat = None
+        self.ink_status = {}
+        self._stream_subscribed = False
+        self._store_pending = False
+        self._wake = threading.Event()
+        
         # Thread for continuous monitoring
         self.monitor_thread = None
         
+        # Start from the stored levels when the shared link is not connected yet
+        if self.link is not None:
+            if not self.link.is_connected():
+                self.load_sample_data()
+            return
+        
         # Try to initialize Arduino connection
         try:
             self.initialize_arduino()
@@ -92,6 +151,7 @@ class PisoPrintSensors:
         default_config = {
             'arduino_port': 'COM4',
             'arduino_baudrate': 9600,
+            'arduino_binary_baudrate': ARDUINO_BINARY_BAUDRATE,
             'paper_calibration': {
                 'reference_unit': -467,
                 'offset': 0,
@@ -148,19 +208,39 @@ class PisoPrintSensors:
         
         logger.info("Loaded sample data in simulation mode")
     
+    def is_connected(self):
+        """
+        Check whether readings come from the Arduino rather than simulation.
+        
+        Returns:
+            bool: True if the Arduino is connected
+        """
+        if self.link is not None:
+            return self.link.is_connected()
+        return self.arduino is not None
+    
     def initialize_arduino(self):
         """Initialize connection to Arduino over serial port"""
+        if self.link is not None:
+            # The kiosk owns the port; opening it here would fight over it
+            logger.info("Arduino port is owned by the kiosk, using its connection")
+            return self.link.is_connected()
+        
         try:
-            # Try to connect to Arduino
-            self.arduino = serial.Serial(self.arduino_port, self.arduino_baudrate, timeout=2)
+            # Try to connect to Arduino; the multiplexer owns the port from here on
+            self.arduino = SerialMux(self.arduino_port, self.arduino_baudrate)
+            self.streaming = False
+            self._stream_subscribed = False
+            self.arduino.open()
             time.sleep(2)  # Wait for Arduino to reset after connection
             
             # Send a test command and wait for response
-            self.arduino.write(b'TEST\n')
-            response = self.arduino.readline().decode('utf-8').strip()
+            response = self.arduino.request('TEST', expect='READY', timeout=2)
             
-            if 'READY' in response:
+            if response and 'READY' in response:
                 logger.info(f"Arduino connected successfully on {self.arduino_port}")
+                if self.arduino_binary_baudrate:
+                    self.arduino.negotiate_binary(self.arduino_binary_baudrate, 'TEST', 'READY')
                 self.initialized = True
                 return True
             else:
@@ -196,37 +276,33 @@ class PisoPrintSensors:
         time.sleep(2)  # Wait before attempting reconnection
         return self.initialize_arduino()
     
-    def send_command(self, command):
+    def send_command(self, command, expect=None):
         """
         Send command to Arduino and get response.
         
+        Replies are matched to commands by the serial multiplexer, so nothing
+        else on the link, such as a coin event, is discarded while waiting.
+        
         Args:
             command (str): Command to send
+            expect (str or tuple, optional): Tags the reply may have, e.g. 'WEIGHT'
             
         Returns:
             str: Response from Arduino, or None if error
         """
+        if self.link is not None:
+            return self.link.send_command(command, expect=expect)
+        
         if not self.arduino:
             # Try to reconnect
             if not self.reconnect_arduino():
                 return None
         
-        try:
-            # Clear any pending data
-            self.arduino.reset_input_buffer()
-            
-            # Send command
-            self.arduino.write(f"{command}\n".encode('utf-8'))
-            
-            # Wait for response
-            response = self.arduino.readline().decode('utf-8').strip()
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error sending command to Arduino: {e}")
-            # Try to reconnect on error
+        response = self.arduino.request(command, expect=expect, timeout=2)
+        if response is None and not self.arduino.is_open():
+            # Try to reconnect if the port was lost
             self.reconnect_arduino()
-            return None
+        return response
     
     def read_paper_weight(self):
         """
@@ -235,24 +311,20 @@ class PisoPrintSensors:
         Returns:
             float: Weight in grams
         """
-        if not self.arduino:
+        if not self.is_connected():
             # In simulation mode, return current simulated weight
             return self.current_weight
         
         try:
             # Send command to Arduino to read weight
-            response = self.send_command("READ_WEIGHT")
+            response = self.send_command("READ_WEIGHT", expect="WEIGHT")
             
             if response and response.startswith("WEIGHT:"):
                 # Parse weight value from response
                 weight_str = response.split(':')[1].strip()
-                try:
-                    weight = float(weight_str)
-                    # Apply offset and return weight in grams
-                    weight = weight + self.paper_calibration['offset']
-                    return max(0, weight)  # Ensure non-negative
-                except ValueError:
-                    logger.error(f"Invalid weight value from Arduino: {weight_str}")
+                weight = self.weight_from_reading(weight_str)
+                if weight is not None:
+                    return weight
             
             logger.warning(f"Unexpected weight response from Arduino: {response}")
             return self.current_weight  # Return last known value on error
@@ -272,45 +344,19 @@ class PisoPrintSensors:
         Returns:
             float: Ink level as percentage (0-100)
         """
-        if not self.arduino:
+        if not self.is_connected():
             # In simulation mode, return current simulated level
             return self.ink_levels.get(color, 0)
         
         try:
             # Send command to Arduino to read specific ink sensor
-            response = self.send_command(f"READ_INK_{color.upper()}")
+            response = self.send_command(f"READ_INK_{color.upper()}", expect=f"INK_{color.upper()}")
             
             if response:
                 # Extract the sensor reading (binary LOW/HIGH)
                 if response.startswith(f"INK_{color.upper()}:"):
                     status = response.split(':')[1].strip()
-                    
-                    # Get current level from database
-                    current_level = float(self.db_manager.get_setting(f'ink_level_{color}', 60))
-                    
-                    # Update based on sensor reading
-                    # LOW means resistance is low, which means ink is present (not below threshold)
-                    # HIGH means resistance is high, which means ink is below threshold (low level)
-                    if status == "HIGH":
-                        # Ink below threshold - reduce level if it's not already low
-                        if current_level > 20:
-                            current_level = 15  # Set to a low level
-                        else:
-                            # Already low, decrease slightly
-                            current_level -= 0.5
-                    else:  # LOW reading
-                        # Ink above threshold - keep or slightly increase if it was low
-                        if current_level < 20:
-                            current_level = 60  # Reset to reasonable level after refill
-                        else:
-                            # Normal level, may fluctuate slightly
-                            import random
-                            current_level += random.uniform(-0.3, 0.1)
-                    
-                    # Ensure level stays within 0-100%
-                    current_level = max(0, min(current_level, 100))
-                    
-                    return current_level
+                    return self.ink_level_from_status(color, status)
             
             logger.warning(f"Unexpected ink level response from Arduino: {response}")
             return self.ink_levels.get(color, 0)  # Return last known value on error
@@ -319,18 +365,116 @@ class PisoPrintSensors:
             logger.error(f"Error reading {color} ink level: {e}")
             return self.ink_levels.get(color, 0)  # Return last known value on error
     
+    def weight_from_reading(self, value):
+        """
+        Convert a raw weight reading from the Arduino to grams.
+        
+        Args:
+            value (str): Weight as sent by the Arduino
+            
+        Returns:
+            float: Weight in grams, or None if the reading is invalid
+        """
+        try:
+            weight = float(value)
+        except (TypeError, ValueError):
+            logger.error(f"Invalid weight value from Arduino: {value}")
+            return None
+        # Apply offset and return weight in grams
+        weight = weight + self.paper_calibration['offset']
+        return max(0, weight)  # Ensure non-negative
+    
+    def ink_level_from_status(self, color, status):
+        """
+        Estimate an ink level from a threshold sensor reading.
+        
+        Args:
+            color (str): Ink color ('black', 'cyan', 'magenta', 'yellow')
+            status (str): 'HIGH' if the ink is below the sensor, otherwise 'LOW'
+            
+        Returns:
+            float: Ink level as percentage (0-100)
+        """
+        # Get current level from database
+        current_level = float(self.db_manager.get_setting(f'ink_level_{color}', 60))
+        
+        # Update based on sensor reading
+        # LOW means resistance is low, which means ink is present (not below threshold)
+        # HIGH means resistance is high, which means ink is below threshold (low level)
+        if status == "HIGH":
+            # Ink below threshold - reduce level if it's not already low
+            if current_level > 20:
+                current_level = 15  # Set to a low level
+            else:
+                # Already low, decrease slightly
+                current_level -= 0.5
+        else:  # LOW reading
+            # Ink above threshold - keep or slightly increase if it was low
+            if current_level < 20:
+                current_level = 60  # Reset to reasonable level after refill
+            else:
+                # Normal level, may fluctuate slightly
+                import random
+                current_level += random.uniform(-0.3, 0.1)
+        
+        # Ensure level stays within 0-100%
+        return max(0, min(current_level, 100))
+    
+    def read_all_sensors(self):
+        """
+        Read the paper weight and every ink sensor in one READ_ALL round trip.
+        
+        The reply is one record, e.g.
+        ALL:WEIGHT=210.50;BLACK=LOW;CYAN=LOW;MAGENTA=HIGH;YELLOW=LOW
+        
+        Returns:
+            bool: True if the readings were updated, False if the firmware does
+                not support READ_ALL or the reply was missing or invalid
+        """
+        if self.read_all_supported is False:
+            return False
+        
+        response = self.send_command("READ_ALL", expect="ALL")
+        if response and response.startswith("ERROR:") and "Unknown command" in response:
+            # Older firmware; read the sensors one at a time from now on
+            logger.info("Arduino firmware has no READ_ALL, reading sensors one at a time")
+            self.read_all_supported = False
+            return False
+        
+        readings = parse_all_reading(response)
+        if readings is None or 'WEIGHT' not in readings:
+            logger.warning(f"Unexpected READ_ALL response from Arduino: {response}")
+            return False
+        self.read_all_supported = True
+        
+        weight = self.weight_from_reading(readings['WEIGHT'])
+        if weight is not None:
+            self.current_weight = weight
+        for color in self.ink_levels:
+            status = readings.get(color.upper())
+            if status:
+                self.ink_levels[color] = self.ink_level_from_status(color, status)
+        return True
+    
     def update_all_sensors(self):
         """Read all sensors and update current values"""
-        # Read paper weight
-        self.current_weight = self.read_paper_weight()
+        # One round trip when the firmware supports it, otherwise one per sensor.
+        # A missing or bad READ_ALL reply keeps the last readings, rather than
+        # waiting for every single-sensor request to time out as well
+        connected = self.is_connected()
+        if connected:
+            self.read_all_sensors()
+        if not connected or self.read_all_supported is False:
+            # Read paper weight
+            self.current_weight = self.read_paper_weight()
+            
+            # Read ink levels
+            for color in self.ink_levels.keys():
+                self.ink_levels[color] = self.read_ink_level(color)
         
         # Calculate paper count
         self.paper_count = self.calculate_paper_count(self.current_weight)
         
-        # Read ink levels
-        for color in self.ink_levels.keys():
-            self.ink_levels[color] = self.read_ink_level(color)
-        
         # Update database with new readings
         self.update_database()
         
@@ -371,13 +515,14 @@ class PisoPrintSensors:
     
     def update_database(self):
         """Update database with current sensor readings"""
-        # Update paper level
-        self.db_manager.set_setting('paper_level', self.paper_count)
-        self.db_manager.set_setting('paper_capacity', self.paper_capacity)
-        
-        # Update ink levels
+        # Update paper and ink levels in one transaction
+        readings = {
+            'paper_level': self.paper_count,
+            'paper_capacity': self.paper_capacity
+        }
         for color, level in self.ink_levels.items():
-            self.db_manager.set_setting(f'ink_level_{color}', level)
+            readings[f'ink_level_{color}'] = level
+        self.db_manager.set_settings(readings)
         
         # Log low levels as warnings
         paper_percentage = (self.paper_count / self.paper_capacity) * 100
@@ -391,43 +536,139 @@ class PisoPrintSensors:
                 self.db_manager.log_system_stat('ink_low', level, 
                                               f"Low {color} ink level: {level:.1f}%")
     
-    def start_monitoring(self, interval=10):
+    def start_monitoring(self, interval=10, stream=SENSOR_STREAMING):
         """
         Start continuous monitoring in a separate thread.
         
         Args:
-            interval (int): Seconds between readings
+            interval (int): Seconds between readings when polling
+            stream (bool, optional): Ask the Arduino to push readings as they
+                change. Polling is used if the firmware does not support it.
         """
         if self.running:
             logger.warning("Monitoring already running")
             return
         
         self.running = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(interval,), daemon=True)
+        self._wake.clear()
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, args=(interval, stream), daemon=True)
         self.monitor_thread.start()
-        logger.info(f"Started sensor monitoring (interval: {interval}s)")
+        logger.info(f"Started sensor monitoring (interval: {interval}s, streaming: {stream})")
     
-    def _monitor_loop(self, interval):
+    def _monitor_loop(self, interval, stream=False):
         """
         Continuous monitoring loop.
         
+        While the Arduino is streaming, this stores the pushed readings and
+        watches the heartbeat, going back to polling if the stream goes quiet.
+        
         Args:
             interval (int): Seconds between readings
+            stream (bool, optional): Try to switch the Arduino to push mode
         """
+        next_poll = time.monotonic()
         while self.running:
             try:
-                self.update_all_sensors()
-                logger.debug(f"Sensor readings - Paper: {self.paper_count} sheets ({self.current_weight:.1f}g), " + 
-                           f"Ink: {', '.join([f'{k}: {v:.1f}%' for k, v in self.ink_levels.items()])}")
+                if self._store_pending:
+                    # Pushed readings are stored here, off the serial reader thread
+                    self._store_pending = False
+                    self.update_database()
+                
+                if self.streaming and time.monotonic() - self.last_heartbeat > self.heartbeat_timeout:
+                    logger.warning("Sensor stream went quiet, polling until it is back")
+                    self.streaming = False
+                
+                if not self.streaming and time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + interval
+                    self.update_all_sensors()
+                    logger.debug(f"Sensor readings - Paper: {self.paper_count} sheets ({self.current_weight:.1f}g), " + 
+                               f"Ink: {', '.join([f'{k}: {v:.1f}%' for k, v in self.ink_levels.items()])}")
+                    if stream and self.is_connected():
+                        self.start_streaming()
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
             
-            # Sleep for the specified interval
-            time.sleep(interval)
+            # Sleep until the next poll or pushed reading, or until stopped
+            self._wake.wait(interval if self.streaming else max(0, next_poll - time.monotonic()))
+            self._wake.clear()
+    
+    def start_streaming(self):
+        """
+        Ask the Arduino to push readings on change instead of being polled.
+        
+        Returns:
+            bool: True if the Arduino is now streaming
+        """
+        if self.stream_supported is False:
+            return False
+        
+        if not self._stream_subscribed:
+            # Pushed lines arrive as events on the link's reader thread
+            owner = self.link if self.link is not None else self.arduino
+            owner.subscribe('SENSOR', self.on_sensor_event)
+            owner.subscribe('HEARTBEAT', self.on_heartbeat)
+            self._stream_subscribed = True
+        
+        response = self.send_command("STREAM:ON", expect="STREAM")
+        if response == "STREAM:ON":
+            self.last_heartbeat = time.monotonic()
+            self.streaming = True
+            self.stream_supported = True
+            logger.info("Arduino is streaming sensor readings")
+            return True
+        
+        if response and response.startswith("ERROR:"):
+            # Older firmware; keep polling
+            logger.info("Arduino firmware cannot stream sensor readings, polling instead")
+            self.stream_supported = False
+        return False
+    
+    def on_sensor_event(self, payload):
+        """
+        Apply a reading pushed by the Arduino. Runs on the serial reader
+        thread, which also credits coins, so the database write is left to
+        the monitor thread.
+        
+        Args:
+            payload (str): Changed readings, e.g. WEIGHT=55.20;BLACK=LOW;CYAN=LOW
+        """
+        self.last_heartbeat = time.monotonic()
+        readings = parse_fields(payload)
+        if readings is None:
+            logger.warning(f"Invalid sensor reading from Arduino: {payload}")
+            return
+        
+        if 'WEIGHT' in readings:
+            weight = self.weight_from_reading(readings['WEIGHT'])
+            if weight is not None:
+                self.current_weight = weight
+        for color in self.ink_levels:
+            status = readings.get(color.upper())
+            # Only a change of state moves the estimated level
+            if status and status != self.ink_status.get(color):
+                self.ink_status[color] = status
+                self.ink_levels[color] = self.ink_level_from_status(color, status)
+        
+        self.paper_count = self.calculate_paper_count(self.current_weight)
+        self._store_pending = True
+        self._wake.set()
+    
+    def on_heartbeat(self, payload):
+        """
+        Note that the Arduino is still streaming. Runs on the serial reader thread.
+        
+        Args:
+            payload (str): Arduino uptime in seconds
+        """
+        self.last_heartbeat = time.monotonic()
     
     def stop_monitoring(self):
         """Stop continuous monitoring"""
         self.running = False
+        self._wake.set()
+        if self.streaming:
+            self.streaming = False
+            self.send_command("STREAM:OFF", expect="STREAM")
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=1)
         logger.info("Stopped sensor monitoring")
@@ -443,7 +684,7 @@ class PisoPrintSensors:
         Returns:
             dict: Calibration results
         """
-        if not self.arduino:
+        if not self.is_connected():
             logger.warning("Cannot calibrate in simulation mode")
             return {"success": False, "error": "Cannot calibrate in simulation mode"}
         
@@ -451,7 +692,7 @@ class PisoPrintSensors:
             if known_weight is not None:
                 # Calibrate with known weight
                 # Send calibration command to Arduino
-                response = self.send_command(f"CALIBRATE_WEIGHT:{known_weight}")
+                response = self.send_command(f"CALIBRATE_WEIGHT:{known_weight}", expect="CALIBRATION_FACTOR")
                 
                 if response and response.startswith("CALIBRATION_FACTOR:"):
                     # Parse reference unit (calibration factor)
@@ -481,7 +722,7 @@ class PisoPrintSensors:
                     logger.info(f"Calibrated empty tray weight: {self.current_weight}g")
                     
                     # Send calibration to Arduino
-                    self.send_command(f"SET_EMPTY_WEIGHT:{self.current_weight}")
+                    self.send_command(f"SET_EMPTY_WEIGHT:{self.current_weight}", expect="EMPTY_WEIGHT_SET")
                     
                     return {
                         "success": True,
@@ -494,7 +735,7 @@ class PisoPrintSensors:
                     logger.info(f"Calibrated full tray weight ({self.paper_capacity} sheets): {self.current_weight}g")
                     
                     # Send calibration to Arduino
-                    self.send_command(f"SET_FULL_WEIGHT:{self.current_weight}")
+                    self.send_command(f"SET_FULL_WEIGHT:{self.current_weight}", expect="FULL_WEIGHT_SET")
                     
                     # Calculate sheet weight
                     weight_range = self.paper_calibration['full_weight'] - self.paper_calibration['empty_weight']
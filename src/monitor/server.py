@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Web monitor servers for the PisoPrint Vendo system.
+The kiosk serves the monitor either on a thread of its own process with
+waitress, or from a separate process that shares only the database, so
+dashboard traffic never competes with the Tk loop and coin handling for the
+GIL. Werkzeug's threaded development server is kept for development and as
+a fallback when waitress is missing.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+# Allow running this file directly as well as with python -m
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.config import MONITOR_HOST, MONITOR_PORT, MONITOR_SERVER, MONITOR_THREADS
+from src.utils.logger import logger, log_error
+
+# Ways the kiosk can serve the web monitor
+SERVER_MODES = ('threaded', 'waitress', 'process')
+
+class MonitorServer:
+    """Serves a monitor app from a WSGI server on a background thread"""
+
+    def __init__(self, app, host=MONITOR_HOST, port=MONITOR_PORT, mode='waitress',
+                 threads=MONITOR_THREADS):
+        """
+        Initialize the server.
+
+        Args:
+            app (Flask): App from create_app
+            host (str, optional): Address to listen on
+            port (int, optional): Port to listen on
+            mode (str, optional): 'waitress', or 'threaded' for Werkzeug's
+                development server. waitress falls back to Werkzeug with a
+                warning if it is not installed.
+            threads (int, optional): Worker threads for waitress
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.threads = threads
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Bind the port and start serving on a background thread."""
+        self._server = self._make_server()
+        self._thread = threading.Thread(target=self.serve, name="web-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Web monitor serving on {self.host}:{self.port} ({self.mode})")
+
+    def serve(self):
+        """Serve requests on the calling thread until stopped."""
+        if self._server is None:
+            self._server = self._make_server()
+        if self.mode == 'waitress':
+            self._server.run()
+        else:
+            self._server.serve_forever()
+
+    def stop(self, timeout=None):
+        """
+        Stop serving.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the server thread
+        """
+        if self._server is None:
+            return
+        try:
+            if self.mode == 'waitress':
+                self._server.close()
+            else:
+                self._server.shutdown()
+                self._server.server_close()
+        except Exception as e:
+            log_error("MonitorServer", f"Error stopping web monitor: {e}")
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        """
+        Check whether the server thread is running.
+
+        Returns:
+            bool: True if serving
+        """
+        return bool(self._thread and self._thread.is_alive())
+
+    def _make_server(self):
+        """Create the WSGI server for the selected mode."""
+        if self.mode == 'waitress':
+            try:
+                from waitress.server import create_server
+                return create_server(self.app, host=self.host, port=self.port, threads=self.threads)
+            except ImportError:
+                logger.warning("waitress is not installed (see requirements.txt); falling back to "
+                               "Werkzeug's development server, which shares the GIL with the kiosk")
+                self.mode = 'threaded'
+
+        from werkzeug.serving import make_server
+        return make_server(self.host, self.port, self.app, threaded=True)
+
+class MonitorProcess:
+    """Runs the monitor in a separate process that shares the kiosk's database"""
+
+    def __init__(self, host=MONITOR_HOST, port=MONITOR_PORT, threads=MONITOR_THREADS):
+        """
+        Initialize the monitor process.
+
+        Args:
+            host (str, optional): Address to listen on
+            port (int, optional): Port to listen on
+            threads (int, optional): Worker threads for the server
+        """
+        self.host = host
+        self.port = port
+        self.threads = threads
+        self._process = None
+
+    def start(self):
+        """Start the monitor process."""
+        command = [sys.executable, '-m', 'src.monitor.server',
+                   '--host', self.host, '--port', str(self.port), '--threads', str(self.threads)]
+        self._process = subprocess.Popen(command, cwd=project_root)
+        logger.info(f"Web monitor process {self._process.pid} serving on {self.host}:{self.port}")
+
+    def stop(self, timeout=None):
+        """
+        Stop the monitor process, killing it if it does not exit in time.
+
+        Args:
+            timeout (float, optional): Seconds to wait for it to exit
+        """
+        if not self.is_alive():
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            log_error("MonitorProcess", "Web monitor process did not exit, killing it")
+            self._process.kill()
+
+    def is_alive(self):
+        """
+        Check whether the monitor process is running.
+
+        Returns:
+            bool: True if running
+        """
+        return bool(self._process and self._process.poll() is None)
+
+def create_monitor(mode=MONITOR_SERVER, services=None, host=MONITOR_HOST, port=MONITOR_PORT,
+                   threads=MONITOR_THREADS):
+    """
+    Create the web monitor server for a serving mode. Call start() on the result.
+
+    Args:
+        mode (str, optional): One of SERVER_MODES
+        services (Services, optional): Components shared with the kiosk, for
+            the in-process modes
+        host (str, optional): Address to listen on
+        port (int, optional): Port to listen on
+        threads (int, optional): Worker threads for the server
+
+    Returns:
+        MonitorServer or MonitorProcess: The server
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown web monitor mode: {mode}")
+    if mode == 'process':
+        return MonitorProcess(host, port, threads)
+
+    from src.monitor.app import create_app
+    return MonitorServer(create_app(services=services), host, port, mode, threads)
+
+def main():
+    """Serve the monitor as a process of its own, next to a running kiosk"""
+    parser = argparse.ArgumentParser(description="PisoPrint Vendo web monitor server")
+    parser.add_argument('--host', default=MONITOR_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=MONITOR_PORT, help='Port to listen on')
+    parser.add_argument('--threads', type=int, default=MONITOR_THREADS, help='Worker threads')
+    args = parser.parse_args()
+
+    from src.monitor.app import create_app
+    from src.utils.services import Services
+
+    # The kiosk owns the Arduino, so sensor readings come from the database it
+    # writes; only the database and a printer status poller are opened here
+    services = Services()
+    services.start_printer_status()
+    server = MonitorServer(create_app(services=services), args.host, args.port, 'waitress', args.threads)
+
+    # Let the kiosk's terminate() run the cleanup below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        services.shutdown()
+
+if __name__ == '__main__':
+    main()
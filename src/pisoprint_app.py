@@ -8,11 +8,13 @@ import sys
 import tkinter as tk
 from datetime import datetime
 from pathlib import Path
-from threading import Thread
+from threading import Event, Thread
 
 # Ensure correct path for imports
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+from src.config import MONITOR_PORT, MONITOR_SERVER, RETAIN_SCREENS
+
 class PisoPrintSystem:
     """
     PisoPrint Vendo System Integration.
@@ -20,32 +22,69 @@ class PisoPrintSystem:
     This class serves as the main integration point for all system components.
     """
     
-    def __init__(self, root=None, debug_mode=False):
+    def __init__(self, root=None, debug_mode=False, profiler=None, monitor_server=MONITOR_SERVER):
         """
         Initialize the PisoPrint Vendo system.
         
+        The main screen is shown as soon as the database and GUI are ready.
+        The printer, Arduino and web monitor then start on background threads,
+        and the main screen shows their readiness as they come up.
+        
         Args:
             root (tk.Tk, optional): Root Tkinter window
             debug_mode (bool, optional): Enable debug features
+            profiler (StartupProfiler, optional): Records boot phase timings
+            monitor_server (str, optional): How to serve the web monitor, one of
+                'threaded', 'waitress' or 'process'
         """
+        from src.utils.startup import StartupProfiler
+        
         # Set debug mode
         self.debug_mode = debug_mode
+        self.profiler = profiler or StartupProfiler()
+        self.monitor_server_mode = monitor_server
+        self.monitor_server = None
+        
+        # Hardware is attached by the background boot phases
+        self.printer = None
+        self.printer_status = None
+        self.print_queue = None
+        self.arduino = None
+        self.buzzer = None
+        self.readiness = {name: 'starting' for name in self.BOOT_COMPONENTS}
+        self._ready_events = {name: Event() for name in self.BOOT_COMPONENTS}
+        self._ready_callbacks = {name: [] for name in self.BOOT_COMPONENTS}
+        self._boot_callbacks = []
         
         # Initialize database first
-        from src.utils.sqlite_manager import SQLiteManager
-        self.db_manager = SQLiteManager()
+        with self.profiler.phase('database'):
+            from src.utils.sqlite_manager import SQLiteManager
+            from src.utils.services import Services
+            self.db_manager = SQLiteManager()
+            # Shared with the web monitor, which gets no database or hardware of its own
+            self.services = Services(self.db_manager)
         
         # Load system settings
-        self.load_settings()
+        with self.profiler.phase('settings'):
+            self.load_settings()
+        
+        # Rendered preview pages, kept across visits to the preview screen
+        from src.utils.page_cache import PageImageCache, PagePrefetcher
+        self.page_cache = PageImageCache()
+        self.page_prefetcher = PagePrefetcher(self.page_cache, lambda fn: self.root.after(0, fn))
         
         # Setup GUI
-        self.setup_gui(root)
+        with self.profiler.phase('gui'):
+            self.setup_gui(root)
+        
+        # Marked once the main loop has drawn the main screen
+        self.root.after_idle(lambda: self.profiler.mark('main screen shown'))
         
-        # Initialize hardware interfaces
-        self.initialize_hardware()
+        # Keep prices and paper levels current when settings change elsewhere
+        self.db_manager.subscribe_settings(self.on_setting_changed, keys=self.SETTING_DEFAULTS)
         
-        # Initialize web monitor
-        self.initialize_web_monitor()
+        # Bring up hardware and the web monitor without holding up the UI
+        self.start_background_boot()
         
         # Log system startup
         self.log_system_event("STARTUP", "System initialized")
@@ -53,32 +92,153 @@ class PisoPrintSystem:
         # Initialize maintenance monitor
         self.initialize_maintenance_monitor()
     
-    def load_settings(self):
-        """Load all settings from the database"""
-        # Pricing and payment settings
-        self.price_bw = float(self.db_manager.get_setting('price_bw_page', 3))
-        self.price_color = float(self.db_manager.get_setting('price_color_page', 5))
-        self.max_payment = float(self.db_manager.get_setting('max_payment_amount', 100))
+    # Components started in the background, each on its own thread
+    BOOT_COMPONENTS = ('printer', 'arduino', 'monitor')
+    
+    def start_background_boot(self):
+        """Start the printer, Arduino and web monitor on background threads"""
+        targets = {
+            'printer': self.initialize_printing,
+            'arduino': self.initialize_hardware,
+            'monitor': self.initialize_web_monitor,
+        }
+        for name in self.BOOT_COMPONENTS:
+            Thread(target=self._boot_component, args=(name, targets[name]),
+                   name=f"boot-{name}", daemon=True).start()
+    
+    def _boot_component(self, name, target):
+        """
+        Run one background boot phase and report its readiness to the Tk thread.
         
-        # System settings
-        self.system_name = self.db_manager.get_setting('system_name', 'PisoPrint Vendo')
-        self.printer_name = self.db_manager.get_setting('printer_name', '')
+        Args:
+            name (str): Component name from BOOT_COMPONENTS
+            target (callable): Initializer; returns False if the component is unavailable
+        """
+        ok = False
+        try:
+            with self.profiler.phase(name):
+                ok = target() is not False
+        except (Exception, SystemExit) as e:  # The monitor module exits on missing imports
+            self.log_system_event("ERROR", f"Failed to start {name}: {e}")
         
-        # Paper inventory settings
-        self.paper_capacity = int(self.db_manager.get_setting('paper_capacity', 500))
-        self.paper_level = int(self.db_manager.get_setting('paper_level', 500))
+        self.readiness[name] = 'ready' if ok else 'failed'
+        self._ready_events[name].set()
+        self.root.after(0, lambda: self.component_ready(name))
+    
+    def component_ready(self, name):
+        """
+        Update the readiness indicator when a background component has started.
+        Runs on the Tk thread.
+        
+        Args:
+            name (str): Component name from BOOT_COMPONENTS
+        """
+        self.log_system_event("STARTUP", f"{name.capitalize()} {self.readiness[name]}")
+        
+        callbacks, self._ready_callbacks[name] = self._ready_callbacks[name], []
+        for callback in callbacks:
+            callback(self.readiness[name] == 'ready')
+        
+        main_screen = self.screens.get('main')
+        if main_screen:
+            main_screen.show_readiness(self.readiness)
+        
+        if all(event.is_set() for event in self._ready_events.values()):
+            self.profiler.mark('boot complete')
+            self.log_system_event("STARTUP", f"Boot complete in {self.profiler.elapsed():.2f}s")
+            for callback in self._boot_callbacks:
+                callback()
+            self._boot_callbacks = []
+    
+    def when_booted(self, callback):
+        """
+        Call a function on the Tk thread once every background component has started.
+        
+        Args:
+            callback (callable): Function to call
+        """
+        if all(event.is_set() for event in self._ready_events.values()):
+            self.root.after(0, callback)
+        else:
+            self._boot_callbacks.append(callback)
+    
+    def when_ready(self, name, callback):
+        """
+        Call a function on the Tk thread once a background component has
+        finished starting, instead of blocking the Tk thread waiting for it.
+        Runs it straight away if the component has already started or failed.
+        
+        Args:
+            name (str): Component name from BOOT_COMPONENTS
+            callback (callable): Called with True if the component started successfully
+        """
+        if self._ready_events[name].is_set():
+            self.root.after(0, lambda: callback(self.readiness[name] == 'ready'))
+        else:
+            self._ready_callbacks[name].append(callback)
+    
+    # Screens without per-job hardware callbacks or threads, kept after their first visit
+    RETAINED_SCREENS = ('main', 'guide', 'receive', 'preview', 'selection', 'admin_pattern')
+    
+    # Settings mirrored as attributes, with their defaults
+    SETTING_DEFAULTS = {
+        'price_bw_page': 3,
+        'price_color_page': 5,
+        'max_payment_amount': 100,
+        'system_name': 'PisoPrint Vendo',
+        'printer_name': '',
+        'paper_capacity': 500,
+        'paper_level': 500,
+    }
+    
+    def load_settings(self):
+        """Load all settings from the database"""
+        self.apply_settings(self.db_manager.get_settings(self.SETTING_DEFAULTS))
         
         # Other state variables
         self.current_pdf = None
         self.pdf_document = None
+        self.pdf_hash = None
         self.total_pages = 0
         self.current_page = 0
         self.copies = 1
         self.is_colored = False
         self.total_amount = 0
         self.inserted_amount = 0
+        self.paid_job_id = None
         self.admin_pattern_buffer = []
     
+    def apply_settings(self, settings):
+        """
+        Copy setting values onto the system attributes.
+        
+        Args:
+            settings (dict): Setting values keyed by setting key
+        """
+        # Pricing and payment settings
+        self.price_bw = float(settings['price_bw_page'])
+        self.price_color = float(settings['price_color_page'])
+        self.max_payment = float(settings['max_payment_amount'])
+        
+        # System settings
+        self.system_name = settings['system_name']
+        self.printer_name = settings['printer_name']
+        
+        # Paper inventory settings
+        self.paper_capacity = int(settings['paper_capacity'])
+        self.paper_level = int(settings['paper_level'])
+    
+    def on_setting_changed(self, key, value):
+        """
+        Refresh mirrored settings when they change, e.g. from the web monitor.
+        
+        Args:
+            key (str): Setting key
+            value: New setting value
+        """
+        # Subscribers may be called from the settings watcher thread
+        self.root.after(0, lambda: self.apply_settings(self.db_manager.get_settings(self.SETTING_DEFAULTS)))
+    
     def setup_gui(self, provided_root=None):
         """
         Set up the GUI components.
@@ -138,62 +298,99 @@ class PisoPrintSystem:
         if self.debug_mode:
             self.root.bind('<Control-a>', lambda e: self.show_admin_pattern_screen())
     
+    def initialize_printing(self):
+        """Initialize the printer, its status monitor and the print queue"""
+        from src.utils.print_backends import create_printer
+        from src.utils.print_queue import PrintQueue
+        from src.utils.print_prep import PrintPrep
+        from src.utils.printer_status import PrinterStatusMonitor
+        
+        # Initialize printer for the configured backend
+        self.printer = create_printer(self.printer_name)
+        
+        # Poll printer status in the background instead of before every job
+        self.printer_status = PrinterStatusMonitor(self.printer)
+        self.printer_status.subscribe(self.on_printer_status_changed)
+        self.printer_status.start()
+        self.services.printer_status = self.printer_status
+        
+        # Spool print jobs off the Tk thread; progress comes back through root.after
+        self.print_queue = PrintQueue(self.db_manager, self.printer,
+                                      dispatch=lambda fn: self.root.after(0, fn),
+                                      status_monitor=self.printer_status,
+                                      prep=PrintPrep())
+        
+        # Finish jobs that were paid for before a crash or power loss
+        resumed = self.print_queue.resume()
+        if resumed:
+            self.log_system_event("PRINT", f"Resuming {len(resumed)} unfinished print jobs")
+    
     def initialize_hardware(self):
-        """Initialize hardware components"""
+        """
+        Initialize the Arduino and buzzer.
+        
+        Returns:
+            bool: True if the Arduino is connected
+        """
         # Import hardware modules
-        from src.utils.pdf_printer import PDFPrinter
         from src.utils.arduino_interface import ArduinoInterface
         from src.utils.buzzer_interface import BuzzerInterface
         
-        # Initialize printer
-        self.printer = PDFPrinter(self.printer_name)
-        
         # Initialize Arduino interface
         arduino_port = self.db_manager.get_setting('arduino_port', 'COM4')
-        self.arduino = ArduinoInterface(arduino_port)
-        if self.arduino.connect():
-            # Initialize buzzer
-            self.buzzer = BuzzerInterface(self.arduino)
-            # Set up admin button callback
-            self.arduino.set_admin_callback(self.show_admin_pattern_screen)
-            # Coin callback will be set in the payment screen
-        else:
+        arduino = ArduinoInterface(arduino_port)
+        connected = arduino.connect()
+        
+        # Paper and ink sensors go through this connection instead of opening the port again
+        self.services.arduino = arduino
+        self.services.start_sensors()
+        
+        if not connected:
             self.log_system_event("ERROR", "Failed to connect to Arduino")
-            self.arduino = None
-            self.buzzer = None
+            return False
+        
+        # Initialize buzzer
+        self.buzzer = BuzzerInterface(arduino)
+        # Set up admin button callback; it fires on the serial thread
+        arduino.set_admin_callback(lambda: self.root.after(0, self.show_admin_pattern_screen))
+        # Coin callback will be set in the payment screen
+        self.arduino = arduino
+        return True
+    
+    def on_printer_status_changed(self, status):
+        """
+        Log printer problems reported by the printer status monitor.
+        
+        Args:
+            status (dict): New printer status
+        """
+        if status.get("ready"):
+            return
+        problems = ", ".join(status.get("details", {})) or status.get("message", "unknown")
+        # Subscribers are called from the poller thread
+        self.root.after(0, lambda: self.log_system_event("WARNING", f"Printer not ready: {problems}"))
     
     def initialize_web_monitor(self):
-        """Initialize the web monitoring server"""
+        """
+        Initialize the web monitoring server.
+        
+        Returns:
+            bool: True if the server was started
+        """
         try:
-            from src.monitor.app import app as monitor_app
+            # Importing Flask is slow, so it stays off the Tk thread
+            from src.monitor.server import create_monitor
             
-            # Start Flask in a separate thread
-            def run_flask():
-                monitor_app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+            # In 'process' mode the monitor shares only the database with the kiosk
+            self.monitor_server = create_monitor(self.monitor_server_mode, services=self.services)
+            self.monitor_server.start()
             
-            # Create and start the thread
-            self.monitor_thread = Thread(target=run_flask, daemon=True)
-            self.monitor_thread.start()
-            
-            # Add monitor status to GUI
-            self.add_monitor_status()
-            
-            self.log_system_event("STARTUP", "Web monitoring server started on port 5000")
+            self.log_system_event("STARTUP", f"Web monitoring server started on port {MONITOR_PORT} "
+                                  f"({self.monitor_server_mode})")
+            return True
         except Exception as e:
             self.log_system_event("ERROR", f"Failed to start web monitor: {str(e)}")
-
-    def add_monitor_status(self):
-        """Add monitor status indicator to the GUI"""
-        if hasattr(self, 'current_frame') and self.current_frame:
-            status_frame = tk.Frame(self.current_frame, bg="white")
-            status_frame.place(relx=1.0, rely=1.0, anchor="se", x=-10, y=-10)
-            
-            status_label = tk.Label(status_frame, 
-                                  text="Monitoring: Online ✓", 
-                                  fg="green",
-                                  bg="white",
-                                  font=("Arial", 10))
-            status_label.pack()
+            return False
     
     def initialize_maintenance_monitor(self):
         """Initialize the maintenance monitoring system"""
@@ -243,8 +440,7 @@ class PisoPrintSystem:
     
     def clear_screen(self):
         """Clear the current screen and prepare for a new one"""
-        if self.current_frame:
-            self.current_frame.destroy()
+        self.hide_current_screen()
             
         self.current_frame = tk.Frame(self.root, bg="white")
         self.current_frame.place(x=0, y=0, 
@@ -253,54 +449,105 @@ class PisoPrintSystem:
         
         self.log_system_event("NAVIGATION", "Screen cleared")
     
+    def hide_current_screen(self):
+        """Hide the current screen if it is retained, otherwise destroy it"""
+        if self.current_frame:
+            if any(screen.frame is self.current_frame for screen in self.screens.values()):
+                self.current_frame.place_forget()
+            else:
+                self.current_frame.destroy()
+        self.current_frame = None
+    
+    def show_screen(self, name, state=None):
+        """
+        Show a screen from the screen registry, importing its module on first use.
+        Screens in RETAINED_SCREENS are built once and only refreshed after
+        that, instead of being rebuilt on every visit.
+        
+        Args:
+            name (str): Screen name from src.screens.SCREENS
+            state (dict, optional): Job state for the screen's refresh hook.
+                Defaults to screen_state().
+            
+        Returns:
+            BaseScreen: The screen being shown
+        """
+        from src.screens import load_screen
+        
+        if state is None:
+            state = self.screen_state()
+        
+        screen = self.screens.get(name)
+        if screen is None:
+            self.clear_screen()
+            screen = load_screen(name)(self)
+            if RETAIN_SCREENS and name in self.RETAINED_SCREENS:
+                screen.frame = self.current_frame
+                self.screens[name] = screen
+        elif screen.frame is not self.current_frame:
+            self.hide_current_screen()
+            self.current_frame = screen.frame
+            self.current_frame.place(x=0, y=0, 
+                                  width=self.screen_width, 
+                                  height=self.screen_height)
+        
+        screen.refresh(state)
+        return screen
+    
+    def screen_state(self):
+        """
+        Get the current customer's job, as passed to screen refresh hooks.
+        
+        Returns:
+            dict: Document, page, copies, color and payment state
+        """
+        return {
+            'pdf_path': self.current_pdf,
+            'pdf_hash': self.pdf_hash,
+            'total_pages': self.total_pages,
+            'current_page': self.current_page,
+            'copies': self.copies,
+            'is_colored': self.is_colored,
+            'total_amount': self.total_amount,
+        }
+    
     def show_main_screen(self):
         """Show the main screen"""
         self.reset_state()
-        self.clear_screen()
         
-        # Import and initialize main screen
-        from src.screens.main_screen import MainScreen
-        MainScreen(self)
+        # Show main screen, importing it on first use
+        self.show_screen('main')
         
         self.log_system_event("NAVIGATION", "Main screen displayed")
     
     def show_guide_screen(self):
         """Show the guide screen"""
-        self.clear_screen()
-        
-        # Import and initialize guide screen
-        from src.screens.guide_screen import GuideScreen
-        GuideScreen(self)
+        # Show guide screen, importing it on first use
+        self.show_screen('guide')
         
         self.log_system_event("NAVIGATION", "Guide screen displayed")
     
     def show_receive_screen(self):
         """Show the receive screen"""
-        self.clear_screen()
+        # The customer is picking another file, so stop rendering the last one
+        self.page_prefetcher.cancel()
         
-        # Import and initialize receive screen
-        from src.screens.receive_screen import ReceiveScreen
-        ReceiveScreen(self)
+        # Show receive screen, importing it on first use
+        self.show_screen('receive')
         
         self.log_system_event("NAVIGATION", "Receive screen displayed")
     
     def show_preview_screen(self):
         """Show the preview screen"""
-        self.clear_screen()
-        
-        # Import and initialize preview screen
-        from src.screens.preview_screen import PreviewScreen
-        PreviewScreen(self)
+        # Show preview screen, importing it on first use
+        self.show_screen('preview')
         
         self.log_system_event("NAVIGATION", "Preview screen displayed")
     
     def show_selection_screen(self):
         """Show the selection screen"""
-        self.clear_screen()
-        
-        # Import and initialize selection screen
-        from src.screens.selection_screen import SelectionScreen
-        SelectionScreen(self)
+        # Show selection screen, importing it on first use
+        self.show_screen('selection')
         
         self.log_system_event("NAVIGATION", "Selection screen displayed")
     
@@ -321,11 +568,8 @@ class PisoPrintSystem:
             return
         
         self.inserted_amount = 0
-        self.clear_screen()
-        
-        # Import and initialize payment screen
-        from src.screens.payment_screen import PaymentScreen
-        PaymentScreen(self)
+        # Show payment screen, importing it on first use
+        self.show_screen('payment')
         
         self.log_system_event("NAVIGATION", "Payment screen displayed")
     
@@ -333,34 +577,26 @@ class PisoPrintSystem:
         """Show the printing screen"""
         # Store original copies
         original_copies = self.copies
-        self.clear_screen()
         
         # Restore original copies
         self.copies = original_copies
         
-        # Import and initialize printing screen
-        from src.screens.printing_screen import PrintingScreen
-        PrintingScreen(self)
+        # Show printing screen, importing it on first use
+        self.show_screen('printing')
         
         self.log_system_event("NAVIGATION", "Printing screen displayed")
     
     def show_admin_pattern_screen(self):
         """Show the admin pattern entry screen"""
-        self.clear_screen()
-        
-        # Import and initialize admin pattern screen
-        from src.screens.admin_screen import AdminPatternScreen
-        AdminPatternScreen(self)
+        # Show admin pattern screen, importing it on first use
+        self.show_screen('admin_pattern')
         
         self.log_system_event("NAVIGATION", "Admin pattern screen displayed")
     
     def show_admin_screen(self):
         """Show the admin panel screen"""
-        self.clear_screen()
-        
-        # Import and initialize admin screen
-        from src.screens.admin_screen import AdminScreen
-        AdminScreen(self)
+        # Show admin screen, importing it on first use
+        self.show_screen('admin')
         
         self.log_system_event("NAVIGATION", "Admin panel displayed")
     
@@ -369,8 +605,10 @@ class PisoPrintSystem:
         # Document state
         self.current_pdf = None
         self.pdf_document = None
+        self.pdf_hash = None
         self.total_pages = 0
         self.current_page = 0
+        self.page_prefetcher.cancel()
         
         # Print job state
         self.copies = 1
@@ -379,6 +617,7 @@ class PisoPrintSystem:
         # Payment state
         self.total_amount = 0
         self.inserted_amount = 0
+        self.paid_job_id = None
         
         # Admin pattern buffer
         self.admin_pattern_buffer = []
@@ -392,80 +631,103 @@ class PisoPrintSystem:
         Returns:
             float: Total amount in pesos
         """
-        # Reload pricing settings
-        self.price_bw = float(self.db_manager.get_setting('price_bw_page', 3))
-        self.price_color = float(self.db_manager.get_setting('price_color_page', 5))
-        
+        # Prices are kept current by the settings subscription
         price_per_page = self.price_color if self.is_colored else self.price_bw
         total = self.copies * self.total_pages * price_per_page
         
         self.log_system_event("PAYMENT", f"Calculated total: ₱{total} for {self.copies} copies")
         return total
     
-    def print_document(self):
+    def record_paid_job(self, job=None):
+        """
+        Journal the current document as paid, before moving on to printing,
+        so the job is resumed even if the app stops before it is queued.
+        
+        Args:
+            job (tuple, optional): (pdf_path, pages, copies, is_colored, amount)
+                captured when payment completed. Defaults to the current document.
+        
+        Returns:
+            int: ID of the journal entry or None if it could not be recorded
+        """
+        if job is None:
+            job = (self.current_pdf, self.total_pages, self.copies, self.is_colored, self.total_amount)
+        pdf_path = job[0]
+        
+        # The customer paid before the printer finished starting; journal the job
+        # they paid for once it has, whatever the screens have moved on to since
+        if self.readiness['printer'] == 'starting':
+            self.log_system_event("PAYMENT", "Printer still starting, journaling the paid job once it is ready")
+            self.when_ready('printer', lambda ok: self._record_deferred_job(job, ok))
+            return None
+        
+        if self.readiness['printer'] != 'ready':
+            self.log_system_event("ERROR", f"Print queue unavailable, cannot journal {pdf_path}")
+            self.paid_job_id = None
+            return None
+        
+        self.paid_job_id = self.print_queue.record_paid(*job)
+        if self.paid_job_id is None:
+            self.log_system_event("ERROR", f"Could not journal paid print job for {pdf_path}")
+        return self.paid_job_id
+    
+    def _record_deferred_job(self, job, ok):
+        """
+        Journal a job paid for while the printer was starting. Runs on the Tk thread.
+        
+        Args:
+            job (tuple): Job parameters captured when payment completed
+            ok (bool): Whether the printer started successfully
+        """
+        if not ok:
+            self.log_system_event("ERROR", f"Printer failed to start, paid job for {job[0]} "
+                                           f"(₱{job[4]}) was not journaled")
+            self.paid_job_id = None
+            return
+        self.record_paid_job(job)
+    
+    def print_document(self, callback=None):
         """
-        Print the document with current settings.
+        Queue the document for printing with current settings. Callers on
+        the Tk thread wait for the printer with when_ready first.
+        
+        Args:
+            callback (callable, optional): Called on the Tk thread with
+                (job_id, state, progress, message) as the job progresses
         
         Returns:
-            bool: True if successful, False otherwise
+            int: ID of the queued print job or None if it could not be queued
         """
         try:
             if not self.current_pdf:
                 raise ValueError("No PDF file selected")
+            if self.readiness['printer'] != 'ready':
+                raise ValueError("Printer is not available")
                 
-            self.log_system_event("PRINT", f"Printing {self.copies} copies of {self.current_pdf}")
+            self.log_system_event("PRINT", f"Queueing {self.copies} copies of {self.current_pdf}")
             
-            # Check printer status
-            printer_status = self.printer.check_printer_status()
-            if printer_status.get("status") == "error" or not printer_status.get("ready", False):
-                error_details = ", ".join([k for k, v in printer_status.get("details", {}).items() if v])
-                error_msg = f"Printer not ready: {error_details}" if error_details else "Printer not ready"
-                raise ValueError(error_msg)
-            
-            # Check paper level
-            pages_needed = self.copies * self.total_pages
-            if pages_needed > self.paper_level:
-                raise ValueError(f"Not enough paper. Need {pages_needed} pages, but only {self.paper_level} available.")
-            
-            # Print the document
-            success = self.printer.print_pdf(self.current_pdf, self.copies)
-            
-            if success:
-                # Log successful print job
-                job_id = self.db_manager.log_print_job(
-                    os.path.basename(self.current_pdf),
-                    self.total_pages,
-                    self.copies,
-                    self.is_colored,
-                    self.total_amount,
-                    True
-                )
-                
-                # Update paper level
-                self.paper_level -= pages_needed
-                self.db_manager.set_setting('paper_level', self.paper_level)
-                
-                self.log_system_event("PRINT", f"Print job completed successfully. Job ID: {job_id}")
-                return True
+            # The job keeps its own copy of the settings, so the next customer can start
+            if self.paid_job_id:
+                job_id = self.print_queue.enqueue(self.paid_job_id, callback=callback)
             else:
-                raise ValueError("Print job failed")
-                
-        except Exception as e:
-            error_msg = str(e)
-            self.log_system_event("ERROR", f"Printing error: {error_msg}")
-            
-            # Log failed print job
-            if self.current_pdf:
-                self.db_manager.log_print_job(
-                    os.path.basename(self.current_pdf),
+                job_id = self.print_queue.submit(
+                    self.current_pdf,
                     self.total_pages,
                     self.copies,
                     self.is_colored,
                     self.total_amount,
-                    False
+                    callback=callback
                 )
+            self.paid_job_id = None
+            if job_id is None:
+                raise ValueError("Could not record print job")
             
-            return False
+            self.log_system_event("PRINT", f"Print job queued. Queue ID: {job_id}")
+            return job_id
+                
+        except Exception as e:
+            self.log_system_event("ERROR", f"Printing error: {str(e)}")
+            return None
     
     def toggle_fullscreen(self):
         """Toggle between fullscreen and windowed mode"""
@@ -500,10 +762,29 @@ class PisoPrintSystem:
             except:
                 pass
         
-        # Shutdown web monitor if running
-        if hasattr(self, 'monitor_thread') and self.monitor_thread.is_alive():
-            from src.monitor.app import shutdown_server
-            shutdown_server()
+        # Stop serving the web monitor
+        if hasattr(self, 'monitor_server') and self.monitor_server:
+            self.monitor_server.stop(timeout=2)
+        
+        # Stop the sensor monitor shared with the web monitor
+        if hasattr(self, 'services') and self.services:
+            self.services.shutdown()
+        
+        # Let the print worker finish the job it is spooling
+        if hasattr(self, 'print_queue') and self.print_queue:
+            self.print_queue.stop(timeout=5)
+        
+        # Stop polling the printer
+        if hasattr(self, 'printer_status') and self.printer_status:
+            self.printer_status.stop(timeout=1)
+        
+        # Stop rendering preview pages
+        if hasattr(self, 'page_prefetcher') and self.page_prefetcher:
+            self.page_prefetcher.stop(timeout=1)
+        
+        # Close pooled database connections
+        if hasattr(self, 'db_manager') and self.db_manager:
+            self.db_manager.close()
     
     def run(self):
         """Run the application"""
@@ -519,10 +800,12 @@ def main():
     parser = argparse.ArgumentParser(description="PisoPrint Vendo System")
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--windowed', action='store_true', help='Run in windowed mode')
+    parser.add_argument('--monitor-server', default=MONITOR_SERVER,
+                        help="Serve the web monitor with 'threaded', 'waitress' or 'process'")
     args = parser.parse_args()
     
     # Create and run application
-    app = PisoPrintSystem(debug_mode=args.debug)
+    app = PisoPrintSystem(debug_mode=args.debug, monitor_server=args.monitor_server)
     
     # Apply windowed mode if requested
     if args.windowed:
@@ -1,18 +1,52 @@
 """
 Screen modules for the PisoPrint Vendo system.
 Provides user interface components for different application screens.
+
+Screen classes are imported on first use, so importing this package does not
+pull in heavy dependencies such as matplotlib (admin panel) or PyMuPDF.
 """
+import importlib
+
+# Screen name -> (module, class), used by PisoPrintSystem.show_screen
+SCREENS = {
+    'main': ('src.screens.main_screen', 'MainScreen'),
+    'guide': ('src.screens.guide_screen', 'GuideScreen'),
+    'receive': ('src.screens.receive_screen', 'ReceiveScreen'),
+    'preview': ('src.screens.preview_screen', 'PreviewScreen'),
+    'selection': ('src.screens.selection_screen', 'SelectionScreen'),
+    'payment': ('src.screens.payment_screen', 'PaymentScreen'),
+    'printing': ('src.screens.printing_screen', 'PrintingScreen'),
+    'admin_pattern': ('src.screens.admin_screen', 'AdminPatternScreen'),
+    'admin': ('src.screens.admin_screen', 'AdminScreen'),
+}
+
+# Class name -> module, for attribute access such as src.screens.MainScreen
+_CLASS_MODULES = {class_name: module for module, class_name in SCREENS.values()}
+_CLASS_MODULES['BaseScreen'] = 'src.screens.base_screen'
+
+def load_screen(name):
+    """
+    Import a screen class by its screen name.
+
+    Args:
+        name (str): Screen name from SCREENS
+
+    Returns:
+        type: Screen class
+
+    Raises:
+        KeyError: If the screen name is unknown
+    """
+    module, class_name = SCREENS[name]
+    return getattr(importlib.import_module(module), class_name)
+
+def __getattr__(name):
+    if name in _CLASS_MODULES:
+        return getattr(importlib.import_module(_CLASS_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Import all screen classes for easy access
-from src.screens.main_screen import MainScreen
-from src.screens.admin_screen import AdminScreen, AdminPatternScreen
-from src.screens.guide_screen import GuideScreen
-from src.screens.receive_screen import ReceiveScreen
-from src.screens.preview_screen import PreviewScreen
-from src.screens.selection_screen import SelectionScreen
-from src.screens.payment_screen import PaymentScreen
-from src.screens.printing_screen import PrintingScreen
-from src.screens.base_screen import BaseScreen
+def __dir__():
+    return sorted(list(globals()) + list(_CLASS_MODULES))
 
 # Define available screens for the application
 __all__ = [
@@ -26,4 +60,4 @@ __all__ = [
     'SelectionScreen',
     'PaymentScreen',
     'PrintingScreen'
-]
\ No newline at end of file
+]
@@ -6,8 +6,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime
 from pathlib import Path
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from src.screens.base_screen import BaseScreen
 
 class AdminPatternScreen(BaseScreen):
@@ -28,6 +26,10 @@ class AdminPatternScreen(BaseScreen):
         # Create UI
         self.create_ui()
         
+    def refresh(self, state):
+        """Start each visit with an empty pattern"""
+        self.clear_pattern()
+        
         # Log access attempt
         self.db.log_admin_access("Admin access attempt", "Pattern screen displayed")
         
@@ -379,35 +381,32 @@ class AdminScreen(BaseScreen):
         Args:
             parent (tk.Frame): Parent frame for the charts
         """
-        # Get recent print jobs
-        jobs = self.db.get_print_job_stats(30)
+        # Get daily totals for the last 30 days
+        stats = self.db.get_period_stats('day', days=30)
+        color_count = sum(row.color_jobs for row in stats)
+        bw_count = sum(row.bw_jobs for row in stats)
         
-        if not jobs:
+        if not color_count and not bw_count:
             tk.Label(parent, text="No data available for charts", 
                    font=("Inter", 14), bg="white").pack(expand=True)
             return
         
+        # matplotlib is only loaded once the admin panel needs a chart. A bare
+        # Figure avoids pyplot, which keeps every figure alive in its registry.
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         # Create figure with two subplots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+        fig = Figure(figsize=(10, 4))
+        ax1, ax2 = fig.subplots(1, 2)
         fig.set_facecolor('white')
         
-        # Weekly print volume
-        weekly_data = {}
-        for job in jobs:
-            date = job['timestamp'].split('T')[0]  # Extract date part
-            pages = job['pages'] * job['copies']
-            
-            if date in weekly_data:
-                weekly_data[date] += pages
-            else:
-                weekly_data[date] = pages
-        
-        # Sort by date and take last 7 days
-        dates = sorted(weekly_data.keys())[-7:]
-        volumes = [weekly_data.get(date, 0) for date in dates]
+        # Daily print volume for the last 7 days
+        recent = stats[-7:]
+        volumes = [row.pages for row in recent]
         
         # Format dates for display
-        display_dates = [date.split('-')[2] + '/' + date.split('-')[1] for date in dates]
+        display_dates = [row.period.split('-')[2] + '/' + row.period.split('-')[1] for row in recent]
         
         ax1.bar(display_dates, volumes, color='#3498db')
         ax1.set_title('Daily Print Volume (Last 7 Days)')
@@ -415,9 +414,6 @@ class AdminScreen(BaseScreen):
         ax1.set_ylabel('Pages')
         
         # Color vs. BW print ratio
-        color_count = sum(1 for job in jobs if job['is_colored'])
-        bw_count = len(jobs) - color_count
-        
         ax2.pie([color_count, bw_count], 
               labels=['Color', 'B&W'], 
               autopct='%1.1f%%',
@@ -474,10 +470,11 @@ class AdminScreen(BaseScreen):
                  bg="#3498db", fg="white",
                  font=("Inter", 10)).pack(side="left", padx=5)
         
-        tk.Button(button_frame, text="Export Logs", 
+        self.export_button = tk.Button(button_frame, text="Export Logs", 
                  command=self.export_logs,
                  bg="#2ecc71", fg="white",
-                 font=("Inter", 10)).pack(side="left", padx=5)
+                 font=("Inter", 10))
+        self.export_button.pack(side="left", padx=5)
         
         # Date filter frame
         filter_frame = tk.Frame(logs_frame, bg="white")
@@ -504,14 +501,20 @@ class AdminScreen(BaseScreen):
                  bg="#3498db", fg="white",
                  font=("Inter", 10)).pack(side="left", padx=10)
         
-    def load_logs(self):
-        """Load log data into the treeview"""
+    def load_logs(self, from_date=None, to_date=None):
+        """
+        Load log data into the treeview.
+        
+        Args:
+            from_date (str, optional): Earliest date to show (YYYY-MM-DD)
+            to_date (str, optional): Latest date to show (YYYY-MM-DD)
+        """
         # Clear existing items
         for item in self.log_tree.get_children():
             self.log_tree.delete(item)
         
-        # Get print job logs
-        print_jobs = self.db.get_print_job_stats(100)  # Limit to recent 100 for performance
+        # Get the most recent page of print job logs
+        print_jobs, _ = self.db.get_print_jobs_page(limit=100, start=from_date, end=to_date)
         
         # Insert into treeview
         for job in print_jobs:
@@ -526,43 +529,54 @@ class AdminScreen(BaseScreen):
         # For now, we'll just leave a placeholder
         
     def export_logs(self):
-        """Export logs to a CSV file"""
+        """Export print job logs to a CSV file in a background thread"""
+        from datetime import datetime
+        import os
+        import threading
+        from src.utils.data_export import export_filename, export_to_file
+        
+        # Create exports directory if it doesn't exist
+        os.makedirs("exports", exist_ok=True)
+        
+        # Generate filename with timestamp
+        suffix = f"_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filename = os.path.join("exports", export_filename('print_jobs', 'csv', suffix=suffix))
+        
+        # Export the rows matching the current date filter
+        from_date = self.date_from.get().strip() or None
+        to_date = self.date_to.get().strip() or None
+        
+        def run_export():
+            try:
+                count = export_to_file(self.db, filename, 'print_jobs', 'csv',
+                                       start=from_date, end=to_date)
+                self.app.root.after(0, lambda: self.export_finished(
+                    f"{count} print jobs exported to {filename}"))
+            except Exception as e:
+                error = str(e)
+                self.app.root.after(0, lambda: self.export_finished(error, failed=True))
+        
+        # Writing runs off the Tk thread so the kiosk stays responsive
+        self.export_button.config(state="disabled", text="Exporting...")
+        threading.Thread(target=run_export, name="log-export", daemon=True).start()
+    
+    def export_finished(self, message, failed=False):
+        """
+        Report the result of a background export.
+        
+        Args:
+            message (str): Result or error message
+            failed (bool, optional): Whether the export failed
+        """
         try:
-            from datetime import datetime
-            import csv
-            import os
-            
-            # Create exports directory if it doesn't exist
-            os.makedirs("exports", exist_ok=True)
-            
-            # Generate filename with timestamp
-            filename = f"exports/pisoprint_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            # Get data
-            print_jobs = self.db.get_print_job_stats(1000)  # Larger limit for export
-            
-            # Write to CSV
-            with open(filename, 'w', newline='') as f:
-                writer = csv.writer(f)
-                # Write header
-                writer.writerow(["Timestamp", "File", "Pages", "Copies", "Type", "Amount Paid", "Success"])
-                
-                # Write data
-                for job in print_jobs:
-                    writer.writerow([
-                        job['timestamp'],
-                        job['filename'],
-                        job['pages'],
-                        job['copies'],
-                        "Color" if job['is_colored'] else "B&W",
-                        job['amount_paid'],
-                        "Success" if job['success'] else "Failed"
-                    ])
-            
-            messagebox.showinfo("Export Successful", f"Logs exported to {filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export logs: {str(e)}")
+            self.export_button.config(state="normal", text="Export Logs")
+        except tk.TclError:
+            return  # Admin screen was closed during the export
+        
+        if failed:
+            messagebox.showerror("Export Error", f"Failed to export logs: {message}")
+        else:
+            messagebox.showinfo("Export Successful", message)
             
     def apply_date_filter(self):
         """Apply date filter to logs"""
@@ -579,17 +593,8 @@ class AdminScreen(BaseScreen):
                 messagebox.showerror("Invalid Date", "To date must be in YYYY-MM-DD format")
                 return
             
-            # Clear existing items
-            for item in self.log_tree.get_children():
-                self.log_tree.delete(item)
-            
-            # Get filtered print job logs
-            # This would need to be implemented in the DatabaseManager
-            # For now, we'll just show a message
-            messagebox.showinfo("Filter Applied", "Date filter applied")
-            
             # Reload logs with filter
-            self.load_logs()
+            self.load_logs(from_date or None, to_date or None)
             
         except Exception as e:
             messagebox.showerror("Filter Error", f"Failed to apply filter: {str(e)}")
@@ -9,6 +9,17 @@ class BaseScreen:
     def __init__(self, app):
         self.app = app
         
+    def refresh(self, state):
+        """
+        Update the screen for the current customer. Called each time the
+        screen is shown, including right after it is built, so retained
+        screens never show the previous customer's job.
+        
+        Args:
+            state (dict): Job state from PisoPrintSystem.screen_state
+        """
+        pass
+        
     def create_button(self, parent, **kwargs):
         """
         Create a button with sound feedback.
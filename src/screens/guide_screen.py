@@ -77,6 +77,11 @@ class GuideScreen(BaseScreen):
             )
             error_label.pack(expand=True, fill="both")
 
+    def refresh(self, state):
+        """Start from the top of the guide each time it is shown"""
+        if hasattr(self, 'canvas'):
+            self.canvas.yview_moveto(0)
+
     def _create_header(self):
         """Create the blue header for the guide screen"""
         header = tk.Frame(self.root, bg=self.HEADER_COLOR, height=80)
@@ -111,6 +116,9 @@ class GuideScreen(BaseScreen):
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
 
+        # Kept so a retained screen can scroll back to the top
+        self.canvas = canvas
+
         # Pack canvas and scrollbar
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
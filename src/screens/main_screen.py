@@ -3,7 +3,6 @@ Main Screen for the PisoPrint Vendo system.
 Provides the entry point for the application with main navigation options.
 """
 import tkinter as tk
-from PIL import Image, ImageTk
 from src.screens.base_screen import BaseScreen
 
 class MainScreen(BaseScreen):
@@ -27,6 +26,8 @@ class MainScreen(BaseScreen):
         
         # Load and resize CTU logo
         try:
+            from PIL import Image, ImageTk
+            
             logo = Image.open("assets/image_ctu.png")
             logo = logo.resize((60, 60), Image.Resampling.LANCZOS)
             logo_photo = ImageTk.PhotoImage(logo)
@@ -44,14 +45,6 @@ class MainScreen(BaseScreen):
         tk.Label(title_container, text="PISOPRINT VENDO", font=("Inter", 32, "bold"), 
                 bg="#248CCF", fg="white").pack(side="left", padx=20)
 
-        # Reset variables
-        app.current_pdf = None
-        app.pdf_document = None
-        app.total_pages = 0
-        app.copies = 0
-        app.total_amount = 0
-        app.inserted_amount = 0
-
         # Button container
         btn_frame = tk.Frame(app.current_frame, bg="white")
         btn_frame.pack(expand=True, pady=50)
@@ -90,16 +83,50 @@ class MainScreen(BaseScreen):
         )
         version_info.pack(side="left", padx=10, pady=5)
         
+        # Readiness of the components that start in the background
+        self.readiness_label = tk.Label(
+            footer, 
+            font=("Inter", 8), 
+            bg="white", 
+            fg="gray"
+        )
+        self.readiness_label.pack(side="left", expand=True, pady=5)
+        
         # Count of pages printed
-        total_pages = app.db_manager.get_total_pages_printed()
-        usage_info = tk.Label(
+        self.usage_info = tk.Label(
             footer, 
-            text=f"Total Pages: {total_pages}", 
             font=("Inter", 8), 
             bg="white", 
             fg="gray"
         )
-        usage_info.pack(side="right", padx=10, pady=5)
+        self.usage_info.pack(side="right", padx=10, pady=5)
+
+    def refresh(self, state):
+        """Reset the customer state and update the page count"""
+        # Reset variables
+        self.app.current_pdf = None
+        self.app.pdf_document = None
+        self.app.total_pages = 0
+        self.app.copies = 0
+        self.app.total_amount = 0
+        self.app.inserted_amount = 0
+        
+        total_pages = self.app.db_manager.get_total_pages_printed()
+        self.usage_info.configure(text=f"Total Pages: {total_pages}")
+        self.show_readiness(self.app.readiness)
+
+    def show_readiness(self, readiness):
+        """
+        Show which background components have started.
+        
+        Args:
+            readiness (dict): 'starting', 'ready' or 'failed' per component
+        """
+        marks = {'starting': '…', 'ready': '✓', 'failed': '✗'}
+        names = {'printer': 'Printer', 'arduino': 'Coin box', 'monitor': 'Monitoring'}
+        self.readiness_label.configure(
+            text="   ".join(f"{names.get(name, name)}: {marks[state]}" for name, state in readiness.items()),
+            fg="red" if 'failed' in readiness.values() else "gray")
 
     def show_guide(self):
         """Navigate to guide screen"""
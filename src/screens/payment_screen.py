@@ -39,12 +39,13 @@ class PaymentScreen(BaseScreen):
         self.payment_completed = False
         self.processing_payment = False
         
-        # Initialize coin acceptor
-        self.setup_coin_acceptor()
-        
         # Create UI
         self.create_ui()
         
+        # Initialize coin acceptor
+        self.connecting_label = None
+        self.setup_coin_acceptor()
+        
         # Log screen creation
         log_event("PAYMENT", f"Payment screen initialized. Amount: ₱{self.original_amount}, Copies: {self.original_copies}")
         
@@ -173,12 +174,30 @@ class PaymentScreen(BaseScreen):
         # Log the payment
         log_payment(value)
         
-        # Add payment to database
-        self.app.db_manager.log_payment(value, self.payment_id)
-        
-        # Check if payment is complete
-        if self.app.inserted_amount >= self.original_amount:
+        # Check if payment is complete; finish it once the coin is on disk
+        complete = self.app.inserted_amount >= self.original_amount
+        if complete:
             self.processing_payment = True  # Lock to prevent multiple triggers
+        
+        # Add payment to database without blocking the UI or the serial reader
+        root = self.app.root
+        self.app.db_manager.log_payment(
+            value, self.payment_id,
+            callback=lambda ok: root.after(0, lambda: self.payment_logged(value, ok, complete)))
+    
+    def payment_logged(self, value, ok, complete):
+        """
+        Continue once a coin has been committed to the database. Runs on the Tk thread.
+        
+        Args:
+            value (int): Value of the coin in pesos
+            ok (bool): Whether the payment row was written
+            complete (bool): Whether this coin completed the payment
+        """
+        if not ok:
+            log_error("PaymentScreen", f"Payment of ₱{value} was not saved to the database")
+        
+        if complete and not self.payment_completed:
             self.payment_completed = True   # Mark payment as completed
             
             # Show payment completed message
@@ -188,6 +207,9 @@ class PaymentScreen(BaseScreen):
             self.app.copies = self.original_copies
             log_event("PAYMENT", f"Payment complete. Amount: ₱{self.app.inserted_amount}, Copies: {self.app.copies}")
             
+            # Journal the paid job before anything else can go wrong
+            self.app.record_paid_job()
+            
             # Use a short delay to prevent multiple triggers
             self.app.root.after(2000, self.proceed_to_printing)
             
@@ -241,6 +263,16 @@ class PaymentScreen(BaseScreen):
 
     def setup_coin_acceptor(self):
         """Initialize and connect to the coin acceptor"""
+        # The Arduino connects in the background at startup; hook it up once it has
+        if self.app.readiness['arduino'] == 'starting':
+            self.connecting_label = tk.Label(self.app.current_frame,
+                                             text="Connecting to coin acceptor...",
+                                             font=("Inter", 14), bg="white", fg="#666666")
+            self.connecting_label.pack(side="bottom", pady=10)
+            frame = self.app.current_frame
+            self.app.when_ready('arduino', lambda ok: self.on_arduino_ready(frame))
+            return
+        
         try:
             # Check if Arduino interface exists and is connected
             if hasattr(self.app, 'arduino') and self.app.arduino:
@@ -264,6 +296,20 @@ class PaymentScreen(BaseScreen):
             log_error("PAYMENT", f"Error setting up coin acceptor: {e}")
             self.enable_test_buttons()
             
+    def on_arduino_ready(self, frame):
+        """
+        Hook up the coin acceptor once the Arduino has finished connecting.
+        
+        Args:
+            frame (tk.Frame): Frame this screen was built in
+        """
+        if not frame.winfo_exists():
+            return  # Customer already left the payment screen
+        if self.connecting_label:
+            self.connecting_label.destroy()
+            self.connecting_label = None
+        self.setup_coin_acceptor()
+        
     def enable_test_buttons(self):
         """Enable test buttons for simulating coin insertion"""
         test_frame = tk.Frame(self.app.current_frame, bg="white")
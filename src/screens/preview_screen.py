@@ -1,6 +1,4 @@
 import tkinter as tk
-from PIL import Image, ImageTk
-import fitz
 from src.screens.base_screen import BaseScreen
 
 class PreviewScreen(BaseScreen):
@@ -32,63 +30,66 @@ class PreviewScreen(BaseScreen):
         # PDF Preview area with scrollbar if needed
         preview_frame = tk.Frame(container, bg="#D9D9D9")
         preview_frame.pack(expand=True, fill="both")
-
-        if app.pdf_document:
-            self.show_preview(preview_frame)
-
-        # Page navigation if multiple pages
-        if self.app.total_pages > 1:
-            nav_frame = tk.Frame(container, bg="#D9D9D9")
-            nav_frame.pack(fill="x")
-            
-            # Previous button
-            self.create_button(nav_frame, text="PREVIOUS", font=("Inter", 14, "bold"),
-                     bg="#FFEB3B", height=2,
-                     command=lambda: self.change_page(-1)).pack(side="left", expand=True, fill="x")
-            
-            # Page counter (increased size and padding)
-            tk.Label(nav_frame, text=f"Page {self.app.current_page + 1}/{self.app.total_pages}",
-                    bg="#D9D9D9", font=("Inter", 16, "bold")).pack(side="left", padx=30)
-            
-            # Next button
-            self.create_button(nav_frame, text="NEXT", font=("Inter", 14, "bold"),
-                     bg="#FFEB3B", height=2,
-                     command=lambda: self.change_page(1)).pack(side="right", expand=True, fill="x")
-
-    def show_preview(self, preview_frame):
-        # Get the current page
-        page = self.app.pdf_document[self.app.current_page]
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1))
         
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        self.preview_label = tk.Label(preview_frame, font=("Inter", 14), bg="#D9D9D9")
+        self.preview_label.pack(expand=True, pady=5)
+
+        # Page navigation, shown for documents with multiple pages
+        self.nav_frame = tk.Frame(container, bg="#D9D9D9")
         
-        # Calculate aspect ratio
-        aspect_ratio = img.width / img.height
+        # Previous button
+        self.create_button(self.nav_frame, text="PREVIOUS", font=("Inter", 14, "bold"),
+                 bg="#FFEB3B", height=2,
+                 command=lambda: self.change_page(-1)).pack(side="left", expand=True, fill="x")
         
-        # Set maximum dimensions while maintaining aspect ratio
-        max_width = 700
-        max_height = 320
+        # Page counter (increased size and padding)
+        self.page_counter = tk.Label(self.nav_frame, bg="#D9D9D9", font=("Inter", 16, "bold"))
+        self.page_counter.pack(side="left", padx=30)
         
-        # Calculate new dimensions
-        if aspect_ratio > 1:  # Wider than tall
-            new_width = min(max_width, img.width)
-            new_height = int(new_width / aspect_ratio)
-        else:  # Taller than wide
-            new_height = min(max_height, img.height)
-            new_width = int(new_height * aspect_ratio)
+        # Next button
+        self.create_button(self.nav_frame, text="NEXT", font=("Inter", 14, "bold"),
+                 bg="#FFEB3B", height=2,
+                 command=lambda: self.change_page(1)).pack(side="right", expand=True, fill="x")
+
+    def refresh(self, state):
+        """Show the current document, e.g. when the retained screen is shown again"""
+        if state['total_pages'] > 1:
+            self.nav_frame.pack(fill="x")
+        else:
+            self.nav_frame.pack_forget()
+        self.show_preview()
+
+    def show_preview(self):
+        """Swap the current page into the preview without rebuilding the screen"""
+        self.preview_label.configure(image="", text="")
+        self.preview_label.image = None
+        if not self.app.pdf_document:
+            return
         
-        # Resize image while maintaining aspect ratio
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        page = self.app.current_page
+        prefetcher = self.app.page_prefetcher
+        self.page_counter.configure(text=f"Page {page + 1}/{self.app.total_pages}")
+        self.preview_label.configure(text="Loading page...")
         
-        # Convert to PhotoImage
-        photo = ImageTk.PhotoImage(img)
+        # Cached pages show at once; others are rendered off the Tk thread
+        photo = prefetcher.fetch(page, self.on_page_ready)
+        if photo is not None:
+            self.on_page_ready(page, photo)
         
-        # Display image
-        label = tk.Label(preview_frame, image=photo, bg="#D9D9D9")
-        label.image = photo
-        label.pack(expand=True, pady=5)
+        # Render the pages either side before the customer asks for them
+        total = self.app.total_pages
+        prefetcher.prefetch([(page + 1) % total, (page - 1) % total])
+
+    def on_page_ready(self, page_number, photo):
+        """Show a rendered page if it is still the one being previewed"""
+        if page_number != self.app.current_page:
+            return
+        try:
+            self.preview_label.configure(image=photo, text="")
+            self.preview_label.image = photo
+        except tk.TclError:
+            pass  # Screen was closed while the page was rendering
 
     def change_page(self, delta):
         self.app.current_page = (self.app.current_page + delta) % self.app.total_pages
-        self.app.show_preview_screen()
\ No newline at end of file
+        self.show_preview()
@@ -1,13 +1,14 @@
 import tkinter as tk
 from tkinter import messagebox
 from src.screens.base_screen import BaseScreen
+from src.utils.logger import logger
 
 class PrintingScreen(BaseScreen):
     def __init__(self, app):
         super().__init__(app)
         # Store original copy count and prevent changes
         self._copies = app.copies
-        print(f"Starting print job with {self._copies} copies")  # Debug print
+        logger.info(f"Starting print job with {self._copies} copies")
         
         # Header with blue background
         header = tk.Frame(app.current_frame, bg="#248CCF", height=55)
@@ -27,29 +28,67 @@ class PrintingScreen(BaseScreen):
                                     bg="white")
         self.message_label.pack(expand=True)
         
+        # Spooling progress
+        self.progress_var = tk.IntVar(value=0)
+        tk.Scale(content_frame, from_=0, to=100, 
+                orient=tk.HORIZONTAL, length=400,
+                variable=self.progress_var, 
+                showvalue=False, bg="white",
+                highlightthickness=0, state="disabled").pack(pady=10)
+        
+        self.return_shown = False
+        
         # Start single print job after a short delay
         app.root.after(100, self.single_print_job)
 
     def single_print_job(self):
-        """Execute exactly one print job"""
+        """Queue exactly one print job"""
+        # Still starting in the background; queue the job once the printer is up
+        if self.app.readiness['printer'] == 'starting':
+            self.message_label.config(text="Preparing printer...")
+            self.app.when_ready('printer', lambda ok: self.single_print_job())
+            return
+        
         try:
             # Force the correct number of copies
             self.app.copies = self._copies
-            print(f"Executing single print job with {self._copies} copies")  # Debug print
+            logger.info(f"Queueing single print job with {self._copies} copies")
             
-            # Attempt to print once
-            success = self.app.print_document()
+            # The print queue spools in the background and reports back here
+            job_id = self.app.print_document(callback=self.on_print_progress)
             
-            if success:
-                self.show_success_message()
-            else:
+            if job_id is None:
                 self.show_error_message()
         
         except Exception as e:
             self.show_error_message(str(e))
 
+    def on_print_progress(self, job_id, state, progress, message):
+        """
+        Show progress reported by the print queue.
+        
+        Args:
+            job_id (int): ID of the queued job
+            state (str): Journal state (queued, spooling, sent, confirmed or failed)
+            progress (float): Progress from 0 to 1
+            message (str): Status message
+        """
+        try:
+            if state == "confirmed":
+                self.show_success_message()
+            elif state == "failed":
+                self.show_error_message(message)
+            else:
+                self.message_label.config(text=f"Printing in progress...\n{message}")
+                self.progress_var.set(int(progress * 100))
+                # The job is saved, so the next customer does not have to wait for it
+                self.show_return_button()
+        except tk.TclError:
+            pass  # Customer already left this screen; the job carries on
+
     def show_success_message(self):
         """Show success message and return button"""
+        self.progress_var.set(100)
         self.message_label.config(text="Printing is now started!\nPlease collect your document.")
         self.show_return_button()
 
@@ -60,6 +99,10 @@ class PrintingScreen(BaseScreen):
 
     def show_return_button(self):
         """Show return to main menu button"""
+        if self.return_shown:
+            return
+        self.return_shown = True
+        
         nav_frame = tk.Frame(self.app.current_frame, bg="white")
         nav_frame.pack(side="bottom", fill="x", padx=20, pady=20)
         
@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import fitz
+from src.config import PREVIEW_PREFETCH_PAGES
 from src.screens.base_screen import BaseScreen
+from src.utils.print_prep import file_hash
 
 class ReceiveScreen(BaseScreen):
     def __init__(self, app):
@@ -46,10 +47,17 @@ class ReceiveScreen(BaseScreen):
             filetypes=[("PDF files", "*.pdf")]
         )
         if file_path:
+            import fitz  # Loaded on first use rather than at startup
+            
             self.app.current_pdf = file_path
             try:
                 self.app.pdf_document = fitz.open(file_path)
+                self.app.pdf_hash = file_hash(file_path)  # Keys the preview page cache
                 self.app.total_pages = len(self.app.pdf_document)
+                
+                # Start rendering the first pages while the preview screen is built
+                self.app.page_prefetcher.open(file_path, self.app.pdf_hash)
+                self.app.page_prefetcher.prefetch(range(min(PREVIEW_PREFETCH_PAGES, self.app.total_pages)))
                 self.app.show_preview_screen()
             except Exception as e:
                 messagebox.showerror("Error", f"Could not open PDF file: {str(e)}")
\ No newline at end of file
@@ -9,12 +9,6 @@ from src.screens.base_screen import BaseScreen
 class SelectionScreen(BaseScreen):
     def __init__(self, app):
         super().__init__(app)
-        app.copies = 0  # Reset copies
-        
-        # Reload pricing settings
-        self.price_per_page = app.price_color if app.is_colored else app.price_bw
-        self.max_payment = app.max_payment
-        self.max_copies = self.calculate_max_copies()
 
         # Header with blue background (minimized)
         header = tk.Frame(app.current_frame, bg="#248CCF", height=40)
@@ -52,30 +46,29 @@ class SelectionScreen(BaseScreen):
         payment_limit_frame = tk.Frame(left_frame, bg="#FFF3CD")
         payment_limit_frame.pack(fill="x", pady=10)
         
-        tk.Label(payment_limit_frame, 
-                text=f"Maximum Payment: ₱{self.max_payment}", 
+        self.max_payment_label = tk.Label(payment_limit_frame, 
                 font=("Inter", 12, "bold"),
-                bg="#FFF3CD", fg="#856404").pack(pady=5)
+                bg="#FFF3CD", fg="#856404")
+        self.max_payment_label.pack(pady=5)
         
-        tk.Label(payment_limit_frame, 
-                text=f"Maximum Copies: {self.max_copies}", 
+        self.max_copies_label = tk.Label(payment_limit_frame, 
                 font=("Inter", 12),
-                bg="#FFF3CD", fg="#856404").pack(pady=5)
+                bg="#FFF3CD", fg="#856404")
+        self.max_copies_label.pack(pady=5)
         
         # Current price information
         price_info_frame = tk.Frame(left_frame, bg="white")
         price_info_frame.pack(fill="x", pady=10)
         
-        price_type = "COLOR" if self.app.is_colored else "B&W"
-        tk.Label(price_info_frame, 
-                text=f"Price per page ({price_type}): ₱{self.price_per_page}", 
+        self.price_label = tk.Label(price_info_frame, 
                 font=("Inter", 12),
-                bg="white").pack(anchor="w")
+                bg="white")
+        self.price_label.pack(anchor="w")
         
-        tk.Label(price_info_frame, 
-                text=f"Total pages: {self.app.total_pages}", 
+        self.pages_label = tk.Label(price_info_frame, 
                 font=("Inter", 12),
-                bg="white").pack(anchor="w")
+                bg="white")
+        self.pages_label.pack(anchor="w")
 
         # Right side - Numpad (centered and expanded)
         numpad_frame = tk.Frame(content_frame, bg="white")
@@ -97,6 +90,23 @@ class SelectionScreen(BaseScreen):
                  command=self.proceed_to_payment)
         proceed_btn.pack(side="right", expand=True, fill="x", padx=5)
 
+    def refresh(self, state):
+        """Reset the copy count and show the current prices and limits"""
+        self.app.copies = 0  # Reset copies
+        
+        # Reload pricing settings
+        self.price_per_page = self.app.price_color if state['is_colored'] else self.app.price_bw
+        self.max_payment = self.app.max_payment
+        self.max_copies = self.calculate_max_copies()
+        
+        self.copies_var.set("0")
+        self.price_var.set("₱0")
+        self.max_payment_label.configure(text=f"Maximum Payment: ₱{self.max_payment}")
+        self.max_copies_label.configure(text=f"Maximum Copies: {self.max_copies}")
+        price_type = "COLOR" if state['is_colored'] else "B&W"
+        self.price_label.configure(text=f"Price per page ({price_type}): ₱{self.price_per_page}")
+        self.pages_label.configure(text=f"Total pages: {state['total_pages']}")
+
     def calculate_max_copies(self):
         """Calculate maximum allowed copies based on payment limit"""
         pages = self.app.total_pages
@@ -1,52 +1,67 @@
 """
 Arduino Interface for the PisoPrint Vendo system.
 Handles communication with Arduino for coin acceptor and admin button.
+The serial port is owned by a SerialMux, which the buzzer and the sensor
+monitor share through this interface.
 """
-import serial
-import threading
 import time
 from src.utils.logger import logger, log_event, log_error
+from src.utils.serial_mux import SerialMux
+from src.config import ARDUINO_BINARY_BAUDRATE
 
 class ArduinoInterface:
     """Interface for Arduino communication"""
     
-    def __init__(self, port, baudrate=9600):
+    def __init__(self, port, baudrate=9600, binary_baudrate=ARDUINO_BINARY_BAUDRATE):
         """
         Initialize the Arduino interface.
         
         Args:
             port (str): Serial port name
             baudrate (int, optional): Serial baudrate. Defaults to 9600.
+            binary_baudrate (int, optional): Baudrate to switch to if the
+                firmware supports binary frames. None keeps the ASCII protocol.
         """
         self.port = port
         self.baudrate = baudrate
-        self.serial = None
+        self.binary_baudrate = binary_baudrate
+        self.mux = None
         self.running = False
         self.coin_callback = None
         self.admin_callback = None
-        self._thread = None
+        self._subscribers = []
         
-    def connect(self):
+    def connect(self, serial_port=None):
         """
         Connect to the Arduino device.
         
+        Args:
+            serial_port (serial.Serial, optional): Already open port to use
+            
         Returns:
             bool: True if connection successful, False otherwise
         """
         try:
             logger.info(f"Connecting to Arduino on port {self.port}")
-            self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
-            time.sleep(2)  # Wait for Arduino to reset
+            mux = SerialMux(self.port, self.baudrate)
+            mux.subscribe('COIN', self._on_coin)
+            mux.subscribe('ADMIN', self._on_admin)
+            mux.subscribe('DEBUG', self._on_debug)
+            for tag, callback in self._subscribers:
+                mux.subscribe(tag, callback)
+            mux.open(serial_port)
+            if serial_port is None:
+                time.sleep(2)  # Wait for Arduino to reset
             
             # Test connection
-            self.serial.write(b'PING\n')
-            response = self.serial.readline().decode('utf-8', errors='replace').strip()
-            if not response.startswith('PONG'):
+            response = mux.request('PING', expect='PONG', timeout=1)
+            if not response or not response.startswith('PONG'):
                 logger.warning(f"Unexpected response from Arduino: {response}")
+            elif self.binary_baudrate:
+                mux.negotiate_binary(self.binary_baudrate, 'PING', 'PONG', timeout=1)
             
+            self.mux = mux
             self.running = True
-            self._thread = threading.Thread(target=self._read_serial, daemon=True)
-            self._thread.start()
             
             logger.info("Successfully connected to Arduino")
             return True
@@ -58,48 +73,88 @@ class ArduinoInterface:
     def disconnect(self):
         """Disconnect from the Arduino device"""
         self.running = False
-        if self.serial and self.serial.is_open:
-            try:
-                self.serial.close()
-            except Exception as e:
-                log_error("ArduinoInterface", f"Error closing serial connection: {e}")
+        if self.mux:
+            self.mux.close()
                 
-    def _read_serial(self):
-        """Read and process serial data from Arduino"""
-        while self.running:
-            try:
-                if self.serial and self.serial.in_waiting:
-                    line = self.serial.readline().decode('utf-8', errors='replace').strip()
-                    logger.debug(f"Received from Arduino: {line}")
-                    
-                    # Handle different command types
-                    if line.startswith('COIN:'):
-                        try:
-                            value = int(line.split(':')[1])
-                            logger.info(f"Coin detected: {value}")
-                            if self.coin_callback:
-                                self.coin_callback(value)
-                            else:
-                                logger.warning("No coin callback registered")
-                        except ValueError:
-                            log_error("ArduinoInterface", f"Invalid coin value: {line}")
-                    
-                    elif line.startswith('ADMIN:'):
-                        logger.info("Admin button pressed")
-                        if self.admin_callback:
-                            logger.info("Calling admin callback")
-                            self.admin_callback()
-                        else:
-                            logger.warning("No admin callback registered")
-                            
-                    elif line.startswith('DEBUG:'):
-                        logger.info(f"Arduino debug: {line[6:]}")
+    def _on_coin(self, payload):
+        """Credit a COIN:<value> event. Runs on the serial reader thread."""
+        try:
+            value = int(payload)
+        except (TypeError, ValueError):
+            log_error("ArduinoInterface", f"Invalid coin value: {payload}")
+            return
+        logger.info(f"Coin detected: {value}")
+        if self.coin_callback:
+            self.coin_callback(value)
+        else:
+            logger.warning("No coin callback registered")
+        
+    def _on_admin(self, payload):
+        """Handle an admin button press. Runs on the serial reader thread."""
+        logger.info("Admin button pressed")
+        if self.admin_callback:
+            logger.info("Calling admin callback")
+            self.admin_callback()
+        else:
+            logger.warning("No admin callback registered")
             
-            except Exception as e:
-                log_error("ArduinoInterface", f"Error reading from serial: {e}")
-                time.sleep(1)
-                
-            time.sleep(0.1)
+    def _on_debug(self, payload):
+        """Log a debug message from the Arduino."""
+        logger.info(f"Arduino debug: {payload}")
+            
+    def is_connected(self):
+        """
+        Check whether the serial connection is open and being read.
+        
+        Returns:
+            bool: True if connected
+        """
+        return bool(self.running and self.mux and self.mux.is_open())
+        
+    def send(self, command):
+        """
+        Queue a command that needs no reply, such as a beep. Never blocks.
+        
+        Args:
+            command (str): Command to send, without the newline
+            
+        Returns:
+            bool: True if queued
+        """
+        if not self.is_connected():
+            return False
+        return self.mux.send(command)
+        
+    def send_command(self, command, expect=None, timeout=2):
+        """
+        Send a command and wait for its reply, leaving coin and admin events
+        to their callbacks. Lets other components, such as the sensor
+        monitor, share this connection instead of opening the port again.
+        
+        Args:
+            command (str): Command to send, without the newline
+            expect (str or tuple, optional): Tags the reply may have, e.g. 'WEIGHT'
+            timeout (float, optional): Seconds to wait for the reply
+            
+        Returns:
+            str: Reply line, or None if not connected or no reply came
+        """
+        if not self.is_connected():
+            return None
+        return self.mux.request(command, expect=expect, timeout=timeout)
+            
+    def subscribe(self, tag, callback):
+        """
+        Register a callback for other unsolicited events, such as streamed
+        sensor readings. Kept across reconnects.
+        
+        Args:
+            tag (str): Event tag, e.g. 'SENSOR'
+            callback (callable): Called on the serial reader thread with the payload
+        """
+        self._subscribers.append((tag, callback))
+        if self.mux:
+            self.mux.subscribe(tag, callback)
             
     def set_coin_callback(self, callback):
         """Set callback for coin detection"""
@@ -1,6 +1,7 @@
 """
 Buzzer Interface for the PisoPrint Vendo system.
 Handles sound feedback through Arduino buzzer.
+Beeps are queued on the Arduino link, so the Tk thread never waits on the port.
 """
 class BuzzerInterface:
     def __init__(self, arduino_interface):
@@ -14,15 +15,15 @@ class BuzzerInterface:
         
     def button_click(self):
         """Sound feedback for button clicks"""
-        if self.arduino and self.arduino.serial:
-            self.arduino.serial.write(b'BEEP:SHORT\n')
+        if self.arduino:
+            self.arduino.send('BEEP:SHORT')
             
     def success(self):
         """Sound feedback for successful operations"""
-        if self.arduino and self.arduino.serial:
-            self.arduino.serial.write(b'BEEP:SUCCESS\n')
+        if self.arduino:
+            self.arduino.send('BEEP:SUCCESS')
             
     def error(self):
         """Sound feedback for errors"""
-        if self.arduino and self.arduino.serial:
-            self.arduino.serial.write(b'BEEP:ERROR\n')
\ No newline at end of file
+        if self.arduino:
+            self.arduino.send('BEEP:ERROR')
\ No newline at end of file
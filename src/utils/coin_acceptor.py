@@ -8,6 +8,7 @@ import time
 from tkinter import messagebox
 from src.config import COIN_ACCEPTOR_PORT, COIN_ACCEPTOR_BAUDRATE, COIN_VALUES
 from src.utils.logger import logger, log_error, log_payment
+from src.utils.serial_reader import LineFramer, read_available, split_message
 
 class CoinAcceptor:
     """
@@ -96,6 +97,9 @@ class CoinAcceptor:
         self.running = False
         if self.serial and self.serial.is_open:
             try:
+                # Wake the reader if it is blocked waiting for data
+                if hasattr(self.serial, 'cancel_read'):
+                    self.serial.cancel_read()
                 self.serial.close()
                 logger.info("Serial connection closed")
             except Exception as e:
@@ -104,15 +108,17 @@ class CoinAcceptor:
             
     def _read_coins(self):
         """
-        Read coin pulses from the serial port.
+        Read coin pulses from the serial port as soon as they arrive.
         This method runs in a separate thread.
         """
         logger.info("Coin reading thread started")
+        framer = LineFramer()
         while self.running:
             if not self.serial or not self.serial.is_open:
                 logger.warning("Serial connection lost, attempting to reconnect")
                 try:
                     self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
+                    framer.reset()
                     logger.info("Reconnected to coin acceptor")
                 except Exception as e:
                     log_error("CoinAcceptor", f"Failed to reconnect: {e}")
@@ -120,29 +126,42 @@ class CoinAcceptor:
                     continue
             
             try:
-                if self.serial.in_waiting:
-                    line = self.serial.readline().decode('utf-8', errors='replace').strip()
-                    logger.debug(f"Received from coin acceptor: {line}")
-                    
-                    if line.startswith('COIN:'):
-                        try:
-                            pulse_count = int(line.split(':')[1])
-                            coin_value = self._get_coin_value(pulse_count)
-                            logger.info(f"Detected coin: {pulse_count} pulses = ₱{coin_value}")
-                            
-                            if coin_value > 0 and self.callback:
-                                log_payment(coin_value)
-                                self.callback(coin_value)
-                        except ValueError as e:
-                            log_error("CoinAcceptor", f"Invalid pulse count: {e}")
+                # Blocks until data arrives or the 1 second read timeout passes
+                for line in framer.feed(read_available(self.serial)):
+                    self._handle_line(line)
             except Exception as e:
+                if not self.running:
+                    break
                 log_error("CoinAcceptor", f"Error reading from serial port: {e}")
+                framer.reset()
                 time.sleep(1)  # Prevent CPU spinning on error
-                
-            time.sleep(0.1)  # Short sleep to prevent CPU hogging
             
         logger.info("Coin reading thread stopped")
     
+    def _handle_line(self, line):
+        """
+        Credit a coin for a COIN:<pulses> line.
+        
+        Args:
+            line (str): Received line
+        """
+        logger.debug(f"Received from coin acceptor: {line}")
+        tag, payload = split_message(line)
+        if tag != 'COIN':
+            return
+        
+        try:
+            pulse_count = int(payload)
+        except (TypeError, ValueError) as e:
+            log_error("CoinAcceptor", f"Invalid pulse count: {e}")
+            return
+        
+        coin_value = self._get_coin_value(pulse_count)
+        logger.info(f"Detected coin: {pulse_count} pulses = ₱{coin_value}")
+        if coin_value > 0 and self.callback:
+            log_payment(coin_value)
+            self.callback(coin_value)
+    
     def _get_coin_value(self, pulses):
         """
         Convert pulse count to coin value.
@@ -0,0 +1,151 @@
+"""
+Streaming data export for the PisoPrint Vendo system.
+Writes print jobs, payments and sensor statistics as CSV or NDJSON, optionally
+gzip-compressed, reading the database in chunks so memory use stays constant.
+"""
+import csv
+import gzip
+import io
+import json
+import zlib
+
+# Exportable datasets: table name and columns, in output order
+EXPORT_DATASETS = {
+    'print_jobs': ('print_jobs', ['id', 'timestamp', 'filename', 'pages', 'copies', 'is_colored', 'amount_paid', 'success']),
+    'payments': ('payment_transactions', ['id', 'timestamp', 'amount', 'print_job_id']),
+    'sensor_stats': ('system_stats', ['id', 'timestamp', 'stat_type', 'value', 'notes']),
+}
+
+# Supported output formats and their MIME types
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def export_filename(dataset, fmt, compress=False, suffix=''):
+    """
+    Build the file name for an export.
+
+    Args:
+        dataset (str): Dataset name from EXPORT_DATASETS
+        fmt (str): Output format from EXPORT_FORMATS
+        compress (bool, optional): Whether the output is gzip-compressed
+        suffix (str, optional): Text to add before the extension, e.g. a timestamp
+
+    Returns:
+        str: File name
+    """
+    name = f"pisoprint_{dataset}{suffix}.{fmt}"
+    return name + '.gz' if compress else name
+
+def format_rows(rows, columns, fmt, header=False):
+    """
+    Format a chunk of rows as text.
+
+    Args:
+        rows (list): Row dictionaries
+        columns (list): Columns to write, in order
+        fmt (str): 'csv' or 'ndjson'
+        header (bool, optional): Whether to start with the CSV header row
+
+    Returns:
+        str: Formatted text
+    """
+    if fmt == 'ndjson':
+        return ''.join(json.dumps({column: row[column] for column in columns}) + '\n' for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([row[column] for column in columns] for row in rows)
+    return buffer.getvalue()
+
+def iter_export(db_manager, dataset, fmt='csv', start=None, end=None, chunk_size=500):
+    """
+    Generate an export as text pieces, one per database chunk.
+
+    Args:
+        db_manager (SQLiteManager): Database to read
+        dataset (str): Dataset name from EXPORT_DATASETS
+        fmt (str, optional): Output format from EXPORT_FORMATS
+        start (datetime or str, optional): Earliest timestamp
+        end (datetime or str, optional): Latest timestamp, exclusive
+        chunk_size (int, optional): Rows read per query
+
+    Yields:
+        str: Formatted output
+
+    Raises:
+        ValueError: If the dataset or format is unknown
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    table, columns = EXPORT_DATASETS[dataset]
+    if fmt == 'csv':
+        yield format_rows([], columns, fmt, header=True)
+    for rows in db_manager.iter_rows(table, columns, start=start, end=end, chunk_size=chunk_size):
+        yield format_rows(rows, columns, fmt)
+
+def gzip_stream(pieces):
+    """
+    Compress a stream of text pieces into a gzip byte stream.
+
+    Args:
+        pieces (iterable): Text pieces
+
+    Yields:
+        bytes: Compressed data
+    """
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+    for piece in pieces:
+        data = compressor.compress(piece.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_to_file(db_manager, path, dataset='print_jobs', fmt='csv', compress=False,
+                   start=None, end=None, chunk_size=500, progress_callback=None):
+    """
+    Stream an export to a file.
+
+    Args:
+        db_manager (SQLiteManager): Database to read
+        path (str): Output file path
+        dataset (str, optional): Dataset name from EXPORT_DATASETS
+        fmt (str, optional): Output format from EXPORT_FORMATS
+        compress (bool, optional): Gzip the output
+        start (datetime or str, optional): Earliest timestamp
+        end (datetime or str, optional): Latest timestamp, exclusive
+        chunk_size (int, optional): Rows read per query
+        progress_callback (callable, optional): Called with the number of rows
+            written so far after each chunk
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        ValueError: If the dataset or format is unknown
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    table, columns = EXPORT_DATASETS[dataset]
+    opener = gzip.open if compress else open
+    written = 0
+
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            f.write(format_rows([], columns, fmt, header=True))
+        for rows in db_manager.iter_rows(table, columns, start=start, end=end, chunk_size=chunk_size):
+            f.write(format_rows(rows, columns, fmt))
+            written += len(rows)
+            if progress_callback:
+                progress_callback(written)
+
+    return written
@@ -0,0 +1,199 @@
+"""
+Schema migrations for the PisoPrint Vendo database.
+Each migration runs once, in order, and is recorded in the schema_version table.
+"""
+import calendar
+import sqlite3
+from datetime import datetime
+from src.utils.stats_rollups import create_rollups, rebuild_rollups
+
+# Tables whose rows carry an event timestamp
+TIMESTAMPED_TABLES = ['print_jobs', 'payment_transactions', 'system_stats', 'admin_access_log']
+
+def to_epoch(value=None):
+    """
+    Convert a local timestamp to the integer stored in ts_epoch columns.
+
+    The local wall-clock time is counted as if it were UTC, matching
+    strftime('%s', timestamp) in SQLite, so whole days stay aligned to
+    local midnight.
+
+    Args:
+        value (datetime or str, optional): Timestamp to convert. Defaults to now.
+
+    Returns:
+        int: Seconds since the epoch
+    """
+    if value is None:
+        value = datetime.now()
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return calendar.timegm(value.timetuple())
+
+def _add_indexes(cursor):
+    """Index the columns used by the dashboard filters and ordering."""
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_timestamp
+    ON print_jobs (timestamp)
+    ''')
+    # Covers the daily page and revenue totals of successful jobs
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_success_timestamp
+    ON print_jobs (success, timestamp, pages, copies, is_colored, amount_paid)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_payment_transactions_timestamp
+    ON payment_transactions (timestamp, amount)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_system_stats_type_timestamp
+    ON system_stats (stat_type, timestamp, value)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_admin_access_log_timestamp
+    ON admin_access_log (timestamp)
+    ''')
+
+def _add_epoch_columns(cursor):
+    """Add integer ts_epoch columns, backfill them and index them for range scans."""
+    for table in TIMESTAMPED_TABLES:
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+        if 'ts_epoch' not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN ts_epoch INTEGER")
+        cursor.execute(f'''
+        UPDATE {table} SET ts_epoch = CAST(strftime('%s', timestamp) AS INTEGER)
+        WHERE ts_epoch IS NULL AND timestamp IS NOT NULL
+        ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_epoch
+    ON print_jobs (ts_epoch)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_success_epoch
+    ON print_jobs (success, ts_epoch, pages, copies, is_colored, amount_paid)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_payment_transactions_epoch
+    ON payment_transactions (ts_epoch, amount)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_system_stats_type_epoch
+    ON system_stats (stat_type, ts_epoch, value)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_admin_access_log_epoch
+    ON admin_access_log (ts_epoch)
+    ''')
+
+def _add_rollups(cursor):
+    """Add hourly and daily rollup tables and fill them from existing history."""
+    create_rollups(cursor)
+    rebuild_rollups(cursor)
+
+def _add_print_queue(cursor):
+    """Add the persistent print queue worked by the print worker thread."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS print_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        pdf_path TEXT NOT NULL,
+        pages INTEGER,
+        copies INTEGER,
+        is_colored BOOLEAN,
+        amount REAL,
+        state TEXT NOT NULL DEFAULT 'queued',
+        progress REAL NOT NULL DEFAULT 0,
+        error TEXT,
+        print_job_id INTEGER NULL,
+        FOREIGN KEY (print_job_id) REFERENCES print_jobs (id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_print_queue_state
+    ON print_queue (state, id)
+    ''')
+
+def _add_print_journal(cursor):
+    """Track retries and per-page progress so print jobs can resume after a crash."""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(print_queue)")]
+    if 'pages_sent' not in columns:
+        cursor.execute("ALTER TABLE print_queue ADD COLUMN pages_sent INTEGER NOT NULL DEFAULT 0")
+    if 'attempts' not in columns:
+        cursor.execute("ALTER TABLE print_queue ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("UPDATE print_queue SET state = 'confirmed' WHERE state = 'done'")
+
+# Migrations as (version, description, function), in the order they must run.
+# Append new migrations here instead of changing initialize_db.
+MIGRATIONS = [
+    (1, "Index timestamp, stat_type and success columns", _add_indexes),
+    (2, "Add integer epoch timestamp columns", _add_epoch_columns),
+    (3, "Add hourly and daily revenue and page rollups", _add_rollups),
+    (4, "Add persistent print queue", _add_print_queue),
+    (5, "Add print job journal progress and retries", _add_print_journal),
+]
+
+def get_schema_version(conn):
+    """
+    Get the current schema version of a database.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        int: Highest applied migration version, 0 if none
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP
+    )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def apply_migrations(conn, migrations=None):
+    """
+    Apply any migrations newer than the database's schema version.
+
+    Each migration runs in its own transaction, so a failed migration leaves
+    the database at the previous version. Safe to call on every startup and
+    from several processes at once.
+
+    Args:
+        conn (sqlite3.Connection): Database connection with no open transaction
+        migrations (list, optional): Migrations to apply. Defaults to MIGRATIONS.
+
+    Returns:
+        list: Versions that were applied
+    """
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    applied = []
+    if get_schema_version(conn) >= max(version for version, _, _ in migrations):
+        return applied
+
+    for version, description, migrate in migrations:
+        # Take the write lock before checking, in case another process got here first
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            migrate(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat())
+            )
+            conn.commit()
+            applied.append(version)
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"SQLite error in migration {version} ({description}): {e}")
+            raise
+
+    return applied
@@ -0,0 +1,310 @@
+"""
+Rendered page cache for the PisoPrint Vendo preview screen.
+Pages are rendered straight to their display size and kept as Tk images in
+an LRU cache with a memory budget, so flipping back to a page costs nothing.
+A prefetch worker renders the pages the customer is likely to view next, so
+the Tk thread never waits on MuPDF.
+"""
+from collections import OrderedDict
+import threading
+import tkinter as tk
+from src.config import PREVIEW_CACHE_BYTES, PREVIEW_MAX_SIZE
+from src.utils.logger import log_error
+
+def fit_size(width, height, max_width, max_height):
+    """
+    Get the display size of a page, keeping its aspect ratio.
+
+    Wide pages are limited by max_width and tall pages by max_height, and
+    neither is shown larger than its size at 72 DPI.
+
+    Args:
+        width (float): Page width in points
+        height (float): Page height in points
+        max_width (int): Maximum display width in pixels
+        max_height (int): Maximum display height in pixels
+
+    Returns:
+        tuple: (width, height) in pixels
+    """
+    aspect_ratio = width / height
+    if aspect_ratio > 1:  # Wider than tall
+        new_width = min(max_width, int(width))
+        return new_width, max(1, int(new_width / aspect_ratio))
+    new_height = min(max_height, int(height))
+    return max(1, int(new_height * aspect_ratio)), new_height
+
+def render_page(document, page_number, max_size=PREVIEW_MAX_SIZE):
+    """
+    Render a page directly at its display size.
+
+    Safe to call off the Tk thread, as long as no other thread uses the same
+    document at the same time.
+
+    Args:
+        document (fitz.Document): Open document
+        page_number (int): 0-based page number
+        max_size (tuple, optional): (max_width, max_height) in pixels
+
+    Returns:
+        fitz.Pixmap: RGB pixmap of the page
+    """
+    import fitz  # Deferred so importing the cache does not load MuPDF at startup
+    
+    page = document[page_number]
+    width, height = fit_size(page.rect.width, page.rect.height, *max_size)
+    matrix = fitz.Matrix(width / page.rect.width, height / page.rect.height)
+    return page.get_pixmap(matrix=matrix, alpha=False)
+
+def to_photo_image(pixmap):
+    """
+    Turn a rendered page into a Tk image. Must run on the Tk thread.
+
+    Args:
+        pixmap (fitz.Pixmap): Pixmap from render_page
+
+    Returns:
+        tk.PhotoImage: Image for a Label
+    """
+    return tk.PhotoImage(data=pixmap.tobytes("ppm"))
+
+class PageImageCache:
+    """LRU cache of rendered page images, bounded by their memory use"""
+
+    def __init__(self, max_bytes=PREVIEW_CACHE_BYTES):
+        """
+        Initialize the page image cache.
+
+        Args:
+            max_bytes (int, optional): Memory budget for cached images
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._images = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, key):
+        """
+        Get a cached image and mark it as recently used.
+
+        Args:
+            key (tuple): (document hash, page number, max size)
+
+        Returns:
+            Cached image or None
+        """
+        entry = self._images.get(key)
+        if entry is None:
+            return None
+        self._images.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, image, nbytes):
+        """
+        Cache an image, evicting the least recently used ones over budget.
+
+        Args:
+            key (tuple): (document hash, page number, max size)
+            image: Image to cache
+            nbytes (int): Memory the image uses
+        """
+        if key in self._images:
+            self.size_bytes -= self._images.pop(key)[1]
+        self._images[key] = (image, nbytes)
+        self.size_bytes += nbytes
+
+        # Always keep the newest image, even if it alone is over budget
+        while self.size_bytes > self.max_bytes and len(self._images) > 1:
+            _, (_, evicted) = self._images.popitem(last=False)
+            self.size_bytes -= evicted
+
+    def clear(self, doc_hash=None):
+        """
+        Drop cached images.
+
+        Args:
+            doc_hash (str, optional): Only drop pages of this document
+        """
+        for key in list(self._images):
+            if doc_hash is None or key[0] == doc_hash:
+                self.size_bytes -= self._images.pop(key)[1]
+
+class PagePrefetcher:
+    """Renders preview pages on a worker thread and fills the page cache"""
+
+    def __init__(self, cache, dispatch, max_size=PREVIEW_MAX_SIZE):
+        """
+        Initialize the prefetcher and start its worker thread.
+
+        Args:
+            cache (PageImageCache): Cache to fill
+            dispatch (callable): Runs a function on the Tk thread,
+                e.g. lambda fn: root.after(0, fn)
+            max_size (tuple, optional): (max_width, max_height) in pixels
+        """
+        self.cache = cache
+        self.dispatch = dispatch
+        self.max_size = tuple(max_size)
+        self._pdf_path = None
+        self._doc_hash = None
+        self._generation = 0
+        self._pending = []
+        self._rendering = None
+        self._callbacks = {}
+        self._condition = threading.Condition()
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="page-prefetch", daemon=True)
+        self._worker.start()
+
+    def open(self, pdf_path, doc_hash):
+        """
+        Switch to a new document, cancelling work for the previous one.
+        The worker opens its own copy, since fitz documents are not thread-safe.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            doc_hash (str): Hash identifying the document in the cache
+        """
+        with self._condition:
+            self._generation += 1
+            self._pdf_path = pdf_path
+            self._doc_hash = doc_hash
+            self._pending = []
+            self._callbacks = {}
+            self._condition.notify()
+
+    def cancel(self):
+        """Drop queued pages and close the worker's document."""
+        self.open(None, None)
+
+    def key(self, page_number):
+        """
+        Get the cache key for a page of the current document.
+
+        Args:
+            page_number (int): 0-based page number
+
+        Returns:
+            tuple: Cache key
+        """
+        return (self._doc_hash, page_number, self.max_size)
+
+    def prefetch(self, page_numbers):
+        """
+        Queue pages to render in the background if they are not cached.
+        Must be called on the Tk thread.
+
+        Args:
+            page_numbers (iterable): 0-based page numbers, most wanted first
+        """
+        with self._condition:
+            if not self._pdf_path:
+                return
+            for page_number in page_numbers:
+                if page_number not in self._pending and self.key(page_number) not in self.cache:
+                    self._pending.append(page_number)
+            self._condition.notify()
+
+    def fetch(self, page_number, callback):
+        """
+        Get a page image now if it is cached, otherwise render it next.
+        Must be called on the Tk thread.
+
+        Args:
+            page_number (int): 0-based page number
+            callback (callable): Called on the Tk thread with (page_number, image)
+                once a page that was not cached has been rendered
+
+        Returns:
+            tk.PhotoImage: Cached image, or None if the callback will be called
+        """
+        image = self.cache.get(self.key(page_number))
+        if image is not None:
+            return image
+
+        with self._condition:
+            self._callbacks.setdefault(page_number, []).append(callback)
+            if page_number != self._rendering:
+                if page_number in self._pending:
+                    self._pending.remove(page_number)
+                self._pending.insert(0, page_number)
+            self._condition.notify()
+        return None
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the worker
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._worker.join(timeout)
+
+    def _run(self):
+        """Worker loop: render queued pages of the current document."""
+        document = None
+        opened = None  # (generation, path) of the open document
+        while True:
+            with self._condition:
+                while self._running and not (self._pending and self._pdf_path):
+                    if document and opened[0] != self._generation:
+                        break
+                    self._condition.wait()
+                if not self._running:
+                    break
+                generation, pdf_path = self._generation, self._pdf_path
+                page_number = self._pending.pop(0) if self._pending and pdf_path else None
+                self._rendering = page_number
+
+            try:
+                if document and opened != (generation, pdf_path):
+                    document.close()
+                    document = None
+                if page_number is None:
+                    continue
+                if document is None:
+                    import fitz
+                    document = fitz.open(pdf_path)
+                    opened = (generation, pdf_path)
+                if page_number >= document.page_count:
+                    continue
+                pixmap = render_page(document, page_number, self.max_size)
+            except Exception as e:
+                log_error("PageCache", f"Error prefetching page {page_number}: {e}")
+                continue
+            finally:
+                with self._condition:
+                    self._rendering = None
+
+            self.dispatch(lambda g=generation, n=page_number, p=pixmap: self._deliver(g, n, p))
+
+        if document:
+            document.close()
+
+    def _deliver(self, generation, page_number, pixmap):
+        """Cache a rendered page on the Tk thread and call anyone waiting for it."""
+        with self._condition:
+            if generation != self._generation:
+                return
+            callbacks = self._callbacks.pop(page_number, [])
+            key = self.key(page_number)
+
+        image = self.cache.get(key)
+        if image is None:
+            image = to_photo_image(pixmap)
+            # Tk keeps 4 bytes per pixel whatever the source format
+            self.cache.put(key, image, pixmap.width * pixmap.height * 4)
+
+        for callback in callbacks:
+            try:
+                callback(page_number, image)
+            except Exception as e:
+                log_error("PageCache", f"Error showing prefetched page {page_number}: {e}")
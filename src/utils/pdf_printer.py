@@ -1,17 +1,17 @@
 """
 PDF Printing Utility for the PisoPrint Vendo system.
-Handles PDF printing operations using SumatraPDF.
+Handles PDF printing operations using SumatraPDF on Windows. The Windows-only
+modules are imported when needed, so this module also imports on Linux.
 """
 import os
 import subprocess
 import sys
-import win32print
-import winreg
 from tkinter import messagebox
 from src.config import SUMATRA_PATHS
 from src.utils.logger import logger, log_error, log_print_job
+from src.utils.print_backends import BasePrinter
 
-class PDFPrinter:
+class PDFPrinter(BasePrinter):
     """Handles PDF printing operations using SumatraPDF"""
     
     def __init__(self, printer_name=None):
@@ -21,7 +21,10 @@ class PDFPrinter:
         Args:
             printer_name (str, optional): Name of the printer to use. Defaults to system default.
         """
-        self.printer_name = printer_name or win32print.GetDefaultPrinter()
+        if not printer_name:
+            import win32print
+            printer_name = win32print.GetDefaultPrinter()
+        self.printer_name = printer_name
         self.sumatra_path = self._find_sumatra_path()
         logger.info(f"PDFPrinter initialized with printer: {self.printer_name}")
         logger.info(f"SumatraPDF path: {self.sumatra_path}")
@@ -35,13 +38,14 @@ class PDFPrinter:
         """
         # Check registry
         try:
+            import winreg
             with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
                               r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\SumatraPDF.exe") as key:
                 reg_path = winreg.QueryValue(key, None)
                 if os.path.exists(reg_path):
                     logger.info(f"Found SumatraPDF in registry: {reg_path}")
                     return reg_path
-        except WindowsError:
+        except (ImportError, OSError):
             logger.debug("SumatraPDF not found in registry")
             pass
 
@@ -77,7 +81,7 @@ class PDFPrinter:
         logger.warning("Prompted user to install SumatraPDF")
         return False
 
-    def print_pdf(self, pdf_path, copies=1, print_settings=None):
+    def print_pdf(self, pdf_path, copies=1, print_settings=None, show_errors=True):
         """
         Print PDF using SumatraPDF with advanced settings.
         
@@ -89,6 +93,8 @@ class PDFPrinter:
                 - 'range': Page range (e.g., '1-5,10')
                 - 'scale': Scale factor (e.g., 'fit' or '100')
                 - 'duplex': Enable duplex printing (bool)
+            show_errors (bool, optional): Show error dialogs. Must be False when
+                called off the Tk thread. Defaults to True.
         
         Returns:
             bool: True if print job was sent successfully, False otherwise
@@ -101,6 +107,9 @@ class PDFPrinter:
 
             # Check if SumatraPDF is installed
             if not self.sumatra_path:
+                if not show_errors:
+                    log_error("PDFPrinter", "SumatraPDF not installed")
+                    return False
                 return self._install_sumatra()
 
             # Build command for SumatraPDF
@@ -145,7 +154,8 @@ class PDFPrinter:
         except Exception as e:
             error_msg = f"Printing error: {str(e)}"
             log_error("PDFPrinter", error_msg)
-            messagebox.showerror("Printing Error", error_msg)
+            if show_errors:
+                messagebox.showerror("Printing Error", error_msg)
             return False
 
     def check_printer_status(self):
@@ -161,35 +171,13 @@ class PDFPrinter:
                 logger.warning("SumatraPDF not installed, cannot check printer status")
                 return {"status": "error", "message": "SumatraPDF not installed"}
                 
+            import win32print
             printer_handle = win32print.OpenPrinter(self.printer_name)
             try:
                 printer_info = win32print.GetPrinter(printer_handle, 2)
-                status_code = printer_info['Status']
                 
-                # Interpret status code
-                status = {
-                    "code": status_code,
-                    "ready": status_code == 0,
-                    "details": {}
-                }
-                
-                # Parse status bits
-                if status_code & 0x00000001:
-                    status["details"]["paused"] = True
-                if status_code & 0x00000002:
-                    status["details"]["error"] = True
-                if status_code & 0x00000004:
-                    status["details"]["pending_deletion"] = True
-                if status_code & 0x00000008:
-                    status["details"]["paper_jam"] = True
-                if status_code & 0x00000010:
-                    status["details"]["paper_out"] = True
-                if status_code & 0x00000020:
-                    status["details"]["manual_feed"] = True
-                if status_code & 0x00000040:
-                    status["details"]["paper_problem"] = True
-                if status_code & 0x00000080:
-                    status["details"]["offline"] = True
+                # Interpret status code and its bits
+                status = self.decode_status(printer_info['Status'])
                 
                 logger.info(f"Printer status: {status}")
                 return status
@@ -211,6 +199,7 @@ class PDFPrinter:
         """
         printers = []
         try:
+            import win32print
             for printer in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS):
                 printers.append(printer[2])
             logger.info(f"Available printers: {printers}")
@@ -218,27 +207,3 @@ class PDFPrinter:
         except Exception as e:
             log_error("PDFPrinter", f"Error listing printers: {e}")
             return []
-            
-    def set_printer(self, printer_name):
-        """
-        Set the printer to use for printing.
-        
-        Args:
-            printer_name (str): Name of the printer to use
-            
-        Returns:
-            bool: True if printer was set successfully, False otherwise
-        """
-        try:
-            # Check if printer exists
-            printers = self.list_available_printers()
-            if printer_name not in printers:
-                log_error("PDFPrinter", f"Printer not found: {printer_name}")
-                return False
-                
-            self.printer_name = printer_name
-            logger.info(f"Printer set to: {printer_name}")
-            return True
-        except Exception as e:
-            log_error("PDFPrinter", f"Error setting printer: {e}")
-            return False
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""
+Print backends for the PisoPrint Vendo system.
+Every backend offers the same interface as PDFPrinter (print_pdf,
+check_printer_status, list_available_printers, set_printer), so the kiosk can
+print through SumatraPDF on Windows, CUPS on Linux, or an in-process fake
+spooler for tests and benchmarks.
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from src.config import PRINT_BACKEND
+from src.utils.logger import logger, log_error, log_print_job
+
+# Printer status bits, as reported by the Windows spooler
+STATUS_BITS = {
+    "paused": 0x00000001,
+    "error": 0x00000002,
+    "pending_deletion": 0x00000004,
+    "paper_jam": 0x00000008,
+    "paper_out": 0x00000010,
+    "manual_feed": 0x00000020,
+    "paper_problem": 0x00000040,
+    "offline": 0x00000080,
+}
+
+# CUPS printer-state-reasons keywords and the status bit they map to
+CUPS_STATE_REASONS = {
+    "media-jam": "paper_jam",
+    "media-empty": "paper_out",
+    "media-needed": "paper_out",
+    "input-tray-missing": "paper_problem",
+    "media-low": None,  # Informational only
+    "offline": "offline",
+    "paused": "paused",
+    "shutdown": "offline",
+    "connecting-to-device": "offline",
+    "door-open": "error",
+    "cover-open": "error",
+    "marker-supply-empty": "error",
+}
+
+# Suffixes of informational printer-state-reasons, which never stop printing
+CUPS_INFO_SUFFIXES = ("-report", "-warning")
+
+class BasePrinter:
+    """Common behaviour shared by the print backends"""
+
+    printer_name = None
+
+    @staticmethod
+    def decode_status(status_code):
+        """
+        Turn a status bit mask into the status dictionary used by the kiosk.
+
+        Args:
+            status_code (int): Status bits from STATUS_BITS
+
+        Returns:
+            dict: Printer status information
+        """
+        return {
+            "code": status_code,
+            "ready": status_code == 0,
+            "details": {name: True for name, bit in STATUS_BITS.items() if status_code & bit}
+        }
+
+    @staticmethod
+    def encode_status(details):
+        """
+        Turn status detail flags into a status bit mask.
+
+        Args:
+            details (iterable): Names from STATUS_BITS
+
+        Returns:
+            int: Status bits
+        """
+        code = 0
+        for name in details:
+            code |= STATUS_BITS.get(name, 0)
+        return code
+
+    def list_available_printers(self):
+        """
+        List all available printers on the system.
+
+        Returns:
+            list: List of printer names
+        """
+        return []
+
+    def set_printer(self, printer_name):
+        """
+        Set the printer to use for printing.
+
+        Args:
+            printer_name (str): Name of the printer to use
+
+        Returns:
+            bool: True if printer was set successfully, False otherwise
+        """
+        try:
+            # Check if printer exists
+            printers = self.list_available_printers()
+            if printer_name not in printers:
+                log_error("Printer", f"Printer not found: {printer_name}")
+                return False
+
+            self.printer_name = printer_name
+            logger.info(f"Printer set to: {printer_name}")
+            return True
+        except Exception as e:
+            log_error("Printer", f"Error setting printer: {e}")
+            return False
+
+class CupsPrinter(BasePrinter):
+    """Prints through CUPS with the lp and lpstat commands"""
+
+    def __init__(self, printer_name=None, timeout=30):
+        """
+        Initialize the CUPS printer with a specific printer or the CUPS default.
+
+        Args:
+            printer_name (str, optional): CUPS destination. Defaults to the CUPS default.
+            timeout (float, optional): Seconds to wait for lp and lpstat
+        """
+        self.timeout = timeout
+        self.printer_name = printer_name or self._default_printer()
+        logger.info(f"CupsPrinter initialized with printer: {self.printer_name}")
+
+    def _run(self, cmd):
+        """Run a CUPS command and return the completed process."""
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              text=True, timeout=self.timeout)
+
+    def _default_printer(self):
+        """
+        Get the CUPS default destination.
+
+        Returns:
+            str: Printer name or None if there is no default
+        """
+        try:
+            output = self._run(["lpstat", "-d"]).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            log_error("CupsPrinter", f"Could not query default printer: {e}")
+            return None
+
+        # "system default destination: Epson_L121"
+        if ":" in output:
+            return output.split(":", 1)[1].strip() or None
+        return None
+
+    def build_command(self, pdf_path, copies=1, print_settings=None):
+        """
+        Build the lp command for a print job.
+
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            copies (int, optional): Number of copies
+            print_settings (dict, optional): 'range', 'scale' and 'duplex', as
+                for PDFPrinter.print_pdf
+
+        Returns:
+            list: Command and arguments
+        """
+        cmd = ["lp"]
+        if self.printer_name:
+            cmd += ["-d", self.printer_name]
+        cmd += ["-n", str(copies)]
+
+        if print_settings:
+            if 'range' in print_settings:
+                cmd += ["-o", f"page-ranges={print_settings['range']}"]
+            if 'scale' in print_settings:
+                if print_settings['scale'] == 'fit':
+                    cmd += ["-o", "fit-to-page"]
+                else:
+                    cmd += ["-o", f"scaling={print_settings['scale']}"]
+            if print_settings.get('duplex', False):
+                cmd += ["-o", "sides=two-sided-long-edge"]
+
+        cmd.append(pdf_path)
+        return cmd
+
+    def print_pdf(self, pdf_path, copies=1, print_settings=None, show_errors=True):
+        """
+        Print a PDF with lp.
+
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            copies (int, optional): Number of copies to print. Defaults to 1.
+            print_settings (dict, optional): Additional print settings
+            show_errors (bool, optional): Accepted for compatibility with
+                PDFPrinter; CUPS errors are only logged
+
+        Returns:
+            bool: True if print job was sent successfully, False otherwise
+        """
+        if not os.path.exists(pdf_path):
+            log_error("CupsPrinter", f"PDF file not found: {pdf_path}")
+            return False
+
+        cmd = self.build_command(pdf_path, copies, print_settings)
+        logger.info(f"Print command: {' '.join(cmd)}")
+
+        try:
+            process = self._run(cmd)
+        except (OSError, subprocess.SubprocessError) as e:
+            log_error("CupsPrinter", f"Printing error: {e}")
+            return False
+
+        if process.returncode != 0:
+            log_error("CupsPrinter", f"lp failed with return code {process.returncode}: {process.stderr}")
+            return False
+
+        log_print_job(os.path.basename(pdf_path), copies, 0)
+        logger.info(f"Print command sent successfully: {process.stdout.strip()}")
+        return True
+
+    @staticmethod
+    def parse_status(output):
+        """
+        Parse the output of 'lpstat -l -p' for one printer.
+
+        Args:
+            output (str): lpstat output
+
+        Returns:
+            dict: Printer status information
+        """
+        details = set()
+        if re.search(r"^printer\s+\S+\s+disabled\b", output, re.MULTILINE):
+            details.add("paused")
+
+        # Only the printer-state-reasons listed after "Alerts:" are faults
+        for match in re.finditer(r"^\s*Alerts:(.*)$", output, re.MULTILINE):
+            for reason in match.group(1).split():
+                reason = reason.lower()
+                if reason.endswith(CUPS_INFO_SUFFIXES):
+                    continue
+                if reason.endswith("-error"):
+                    reason = reason[:-len("-error")]
+                detail = CUPS_STATE_REASONS.get(reason)
+                if detail:
+                    details.add(detail)
+
+        return BasePrinter.decode_status(BasePrinter.encode_status(details))
+
+    def check_printer_status(self):
+        """
+        Check if printer is ready and get its detailed status.
+
+        Returns:
+            dict: Printer status information
+        """
+        if not self.printer_name:
+            return {"status": "error", "message": "No CUPS printer configured"}
+
+        try:
+            process = self._run(["lpstat", "-l", "-p", self.printer_name])
+        except (OSError, subprocess.SubprocessError) as e:
+            log_error("CupsPrinter", f"Error checking printer status: {e}")
+            return {"status": "error", "message": str(e)}
+
+        if process.returncode != 0:
+            return {"status": "error", "message": process.stderr.strip() or "Printer not found"}
+
+        status = self.parse_status(process.stdout)
+        logger.info(f"Printer status: {status}")
+        return status
+
+    def list_available_printers(self):
+        """
+        List all CUPS destinations.
+
+        Returns:
+            list: List of printer names
+        """
+        try:
+            output = self._run(["lpstat", "-p"]).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            log_error("CupsPrinter", f"Error listing printers: {e}")
+            return []
+
+        # "printer Epson_L121 is idle.  enabled since ..."
+        return [line.split()[1] for line in output.splitlines() if line.startswith("printer ")]
+
+class FakePrinter(BasePrinter):
+    """In-process spooler that records jobs instead of printing them"""
+
+    def __init__(self, printer_name="Fake Printer", job_delay=0.0, copy_delay=0.0,
+                 fail=False, status_details=None):
+        """
+        Initialize the fake spooler.
+
+        Args:
+            printer_name (str, optional): Name reported for the printer
+            job_delay (float, optional): Seconds each print_pdf call takes
+            copy_delay (float, optional): Extra seconds per copy
+            fail (bool, optional): Make every print_pdf call fail
+            status_details (iterable, optional): Status flags to report, e.g. ['paper_out']
+        """
+        self.printer_name = printer_name
+        self.job_delay = job_delay
+        self.copy_delay = copy_delay
+        self.fail = fail
+        self.status_details = set(status_details or [])
+        self.jobs = []
+        self._lock = threading.Lock()
+
+    def print_pdf(self, pdf_path, copies=1, print_settings=None, show_errors=True):
+        """
+        Record a print job.
+
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            copies (int, optional): Number of copies
+            print_settings (dict, optional): Additional print settings
+            show_errors (bool, optional): Ignored
+
+        Returns:
+            bool: True unless the spooler was set to fail
+        """
+        started = time.monotonic()
+        time.sleep(self.job_delay + self.copy_delay * copies)
+        if self.fail:
+            return False
+
+        with self._lock:
+            self.jobs.append({
+                "pdf_path": pdf_path,
+                "copies": copies,
+                "print_settings": dict(print_settings or {}),
+                "printer": self.printer_name,
+                "started": started,
+                "finished": time.monotonic(),
+            })
+        return True
+
+    def check_printer_status(self):
+        """
+        Report the configured status.
+
+        Returns:
+            dict: Printer status information
+        """
+        return self.decode_status(self.encode_status(self.status_details))
+
+    def list_available_printers(self):
+        """
+        List the fake printer.
+
+        Returns:
+            list: List of printer names
+        """
+        return [self.printer_name]
+
+def default_backend():
+    """
+    Pick the backend for this platform. Never picks the fake spooler, which
+    would take payment for jobs that are never printed.
+
+    Returns:
+        str: 'sumatra' on Windows, 'cups' when lp is installed, otherwise None
+    """
+    if sys.platform.startswith("win"):
+        return "sumatra"
+    if shutil.which("lp"):
+        return "cups"
+    return None
+
+def create_printer(printer_name=None, backend=None):
+    """
+    Create the printer for the configured backend.
+
+    Args:
+        printer_name (str, optional): Printer to use. Defaults to the system default.
+        backend (str, optional): 'sumatra', 'cups', 'fake' or 'auto'.
+            Defaults to PRINT_BACKEND from the config.
+
+    Returns:
+        Printer object with the PDFPrinter interface
+
+    Raises:
+        ValueError: If the backend is unknown
+        RuntimeError: If 'auto' finds no real backend on this system
+    """
+    backend = backend or PRINT_BACKEND
+    if backend == "auto":
+        backend = default_backend()
+        if backend is None:
+            raise RuntimeError("No print backend available: install CUPS (lp) "
+                               "or set PRINT_BACKEND explicitly")
+
+    logger.info(f"Using {backend} print backend")
+    if backend == "sumatra":
+        from src.utils.pdf_printer import PDFPrinter
+        return PDFPrinter(printer_name)
+    if backend == "cups":
+        return CupsPrinter(printer_name)
+    if backend == "fake":
+        return FakePrinter(printer_name or "Fake Printer")
+    raise ValueError(f"Unknown print backend: {backend}")
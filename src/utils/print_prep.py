@@ -0,0 +1,302 @@
+"""
+Print preparation for the PisoPrint Vendo system.
+Validates a paid PDF once, fits every page to the kiosk paper size, renders
+pages whose fonts the printer cannot be trusted with, and splits the result
+into page-range chunks. Prepared chunks are cached by file hash, so reprints
+and multi-copy jobs start spooling immediately and a failed job resumes at
+the chunk that failed instead of the first page.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from src.config import (PRINT_CACHE_DIR, PRINT_CACHE_MAX_ENTRIES, PRINT_CHUNK_PAGES,
+                        PRINT_PAPER_SIZE, PRINT_RASTER_DPI)
+from src.utils.logger import logger, log_error
+
+# Bumped whenever the preparation output changes, so old cache entries are rebuilt
+PREP_VERSION = 1
+
+# Standard PDF fonts every printer and viewer can substitute without embedding
+BASE14_FONTS = {
+    "Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique",
+    "Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique",
+    "Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic",
+    "Symbol", "ZapfDingbats",
+}
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Get the SHA-256 hash of a file.
+
+    Args:
+        path (str): File to hash
+        block_size (int, optional): Bytes read at a time
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def needs_raster(page):
+    """
+    Check whether a page uses fonts that are neither embedded nor standard.
+
+    Such pages print with whatever font the printer substitutes, so they are
+    rendered to an image instead.
+
+    Args:
+        page (fitz.Page): Page to check
+
+    Returns:
+        bool: True if the page should be rasterized
+    """
+    for font in page.get_fonts():
+        ext, basefont = font[1], font[3]
+        name = basefont.split('+', 1)[-1]  # Drop the subset prefix, e.g. ABCDEF+Arial
+        if ext == 'n/a' and name not in BASE14_FONTS:
+            return True
+    return False
+
+class PrintPrep:
+    """Prepares PDFs for spooling and caches the result by file hash"""
+
+    def __init__(self, cache_dir=PRINT_CACHE_DIR, chunk_pages=PRINT_CHUNK_PAGES,
+                 paper_size=PRINT_PAPER_SIZE, raster_dpi=PRINT_RASTER_DPI,
+                 max_entries=PRINT_CACHE_MAX_ENTRIES):
+        """
+        Initialize print preparation.
+
+        Args:
+            cache_dir (str, optional): Directory for prepared files
+            chunk_pages (int, optional): Pages per chunk
+            paper_size (str, optional): Paper name understood by fitz.paper_rect,
+                or None to keep the original page sizes
+            raster_dpi (int, optional): Resolution for rasterized pages
+            max_entries (int, optional): Prepared documents kept in the cache
+        """
+        self.cache_dir = str(cache_dir)
+        self.chunk_pages = max(1, int(chunk_pages))
+        self.paper_size = paper_size
+        self.raster_dpi = raster_dpi
+        self.max_entries = max_entries
+        self._hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def settings(self):
+        """
+        Get the settings a cache entry must match to be reused.
+
+        Returns:
+            dict: Preparation settings
+        """
+        return {
+            "version": PREP_VERSION,
+            "chunk_pages": self.chunk_pages,
+            "paper_size": self.paper_size,
+            "raster_dpi": self.raster_dpi,
+        }
+
+    def prepare(self, pdf_path):
+        """
+        Get the prepared chunks for a PDF, preparing it if it is not cached.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+
+        Returns:
+            dict: Manifest with 'hash', 'pages', 'rasterized' (page numbers) and
+                'chunks', a list of {'path', 'start', 'end'} with 0-based page
+                numbers, end exclusive. None if preparation failed unexpectedly,
+                in which case the original file should be printed.
+
+        Raises:
+            ValueError: If the PDF cannot be printed, e.g. it is encrypted or empty
+        """
+        try:
+            with self._lock:
+                key = self._hash(pdf_path)
+                manifest = self._load(key)
+                if manifest:
+                    logger.info(f"Using prepared print file for {pdf_path} ({key[:12]})")
+                    return manifest
+
+                manifest = self._build(pdf_path, key)
+                self._prune(keep=key)
+                return manifest
+        except ValueError:
+            raise
+        except Exception as e:
+            log_error("PrintPrep", f"Error preparing {pdf_path}: {e}")
+            return None
+
+    def prepare_async(self, pdf_path):
+        """
+        Prepare a PDF on a background thread so it is cached before printing.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+
+        Returns:
+            threading.Thread: The preparation thread
+        """
+        def run():
+            try:
+                self.prepare(pdf_path)
+            except ValueError as e:
+                log_error("PrintPrep", f"Cannot print {pdf_path}: {e}")
+
+        thread = threading.Thread(target=run, name="print-prep", daemon=True)
+        thread.start()
+        return thread
+
+    def _hash(self, pdf_path):
+        """Hash a file, reusing the last hash while its size and mtime are unchanged."""
+        if not os.path.exists(pdf_path):
+            raise ValueError(f"PDF file not found: {pdf_path}")
+
+        stat = os.stat(pdf_path)
+        path = os.path.abspath(pdf_path)
+        known = self._hashes.get(path)
+        if known and known[0] == (stat.st_size, stat.st_mtime_ns):
+            return known[1]
+
+        digest = file_hash(pdf_path)
+        self._hashes[path] = ((stat.st_size, stat.st_mtime_ns), digest)
+        return digest
+
+    def _load(self, key):
+        """
+        Load a cache entry if it is complete and was made with the current settings.
+
+        Returns:
+            dict: Manifest or None
+        """
+        entry = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry, "manifest.json")
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("settings") != self.settings():
+            return None
+        for chunk in manifest["chunks"]:
+            chunk["path"] = os.path.join(entry, chunk["file"])
+            if not os.path.exists(chunk["path"]):
+                return None
+
+        os.utime(manifest_path)  # Recently used entries survive pruning
+        return manifest
+
+    def _build(self, pdf_path, key):
+        """
+        Prepare a PDF and write its chunks to the cache.
+
+        Returns:
+            dict: Manifest
+        """
+        import fitz  # Deferred so the app can start before MuPDF is loaded
+        
+        try:
+            source = fitz.open(pdf_path)
+        except Exception as e:
+            raise ValueError(f"Could not open PDF: {e}")
+
+        try:
+            if source.needs_pass:
+                raise ValueError("PDF is password protected")
+            if source.page_count == 0:
+                raise ValueError("PDF has no pages")
+
+            entry = os.path.join(self.cache_dir, key)
+            building = f"{entry}.tmp-{os.getpid()}-{threading.get_ident()}"
+            shutil.rmtree(building, ignore_errors=True)
+            os.makedirs(building)
+
+            chunks = []
+            rasterized = []
+            for start in range(0, source.page_count, self.chunk_pages):
+                end = min(start + self.chunk_pages, source.page_count)
+                name = f"chunk_{len(chunks):03d}.pdf"
+                with fitz.open() as out:
+                    for pno in range(start, end):
+                        if self._copy_page(source, pno, out):
+                            rasterized.append(pno)
+                    out.save(os.path.join(building, name), garbage=3, deflate=True)
+                chunks.append({"file": name, "start": start, "end": end})
+
+            manifest = {
+                "hash": key,
+                "source": os.path.basename(pdf_path),
+                "pages": source.page_count,
+                "rasterized": rasterized,
+                "settings": self.settings(),
+                "chunks": chunks,
+            }
+            with open(os.path.join(building, "manifest.json"), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+        finally:
+            source.close()
+
+        # Swap the finished entry in, so a crash never leaves a half-written one
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(building, entry)
+
+        for chunk in chunks:
+            chunk["path"] = os.path.join(entry, chunk["file"])
+        logger.info(f"Prepared {pdf_path}: {manifest['pages']} pages in {len(chunks)} chunks, "
+                    f"{len(rasterized)} rasterized")
+        return manifest
+
+    def _copy_page(self, source, pno, out):
+        """
+        Fit one source page onto a new page of the output document.
+
+        Args:
+            source (fitz.Document): Document being prepared
+            pno (int): Page number
+            out (fitz.Document): Chunk being built
+
+        Returns:
+            bool: True if the page was rasterized
+        """
+        import fitz
+        
+        page = source[pno]
+        rect = page.rect
+        if self.paper_size:
+            rect = fitz.paper_rect(self.paper_size)
+            if page.rect.width > page.rect.height:
+                rect = fitz.Rect(0, 0, rect.height, rect.width)  # Keep landscape pages landscape
+
+        target = out.new_page(width=rect.width, height=rect.height)
+        if not needs_raster(page):
+            try:
+                target.show_pdf_page(target.rect, source, pno)
+                return False
+            except Exception as e:
+                log_error("PrintPrep", f"Could not copy page {pno + 1}, rasterizing it: {e}")
+
+        pix = page.get_pixmap(dpi=self.raster_dpi)
+        target.insert_image(target.rect, pixmap=pix, keep_proportion=True)
+        return True
+
+    def _prune(self, keep=None):
+        """Remove the least recently used cache entries beyond max_entries."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            manifest_path = os.path.join(self.cache_dir, name, "manifest.json")
+            if name != keep and os.path.exists(manifest_path):
+                entries.append((os.path.getmtime(manifest_path), name))
+
+        entries.sort(reverse=True)
+        for _, name in entries[max(0, self.max_entries - 1):]:
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
@@ -0,0 +1,353 @@
+"""
+Print Queue for the PisoPrint Vendo system.
+Spools paid print jobs on a worker thread so the Tk main loop never waits on
+the printer. Each job is journaled in the print_queue table before any side
+effect, so unfinished jobs are resumed after a crash or power loss:
+
+    paid -> queued -> spooling -> sent -> confirmed  (or failed)
+"""
+import os
+import queue
+import threading
+from src.config import PRINT_MAX_ATTEMPTS, PRINT_RETRY_DELAY
+from src.utils.logger import logger, log_error
+
+# Print job journal states
+PAID = 'paid'            # Payment complete, nothing sent to the printer yet
+QUEUED = 'queued'        # Waiting for the print worker
+SPOOLING = 'spooling'    # Being sent to the printer, pages_sent counts pages handed over
+SENT = 'sent'            # Every page handed to the printer
+CONFIRMED = 'confirmed'  # Recorded in print_jobs and paper level updated
+FAILED = 'failed'        # Gave up after PRINT_MAX_ATTEMPTS
+
+# States that still need work from the print worker
+UNFINISHED_STATES = [PAID, QUEUED, SPOOLING, SENT]
+
+class PrintQueue:
+    """Runs journaled print jobs one at a time on a background worker thread"""
+
+    _STOP = object()
+
+    def __init__(self, db_manager, printer, dispatch=None, status_monitor=None, prep=None,
+                 max_attempts=PRINT_MAX_ATTEMPTS, retry_delay=PRINT_RETRY_DELAY):
+        """
+        Initialize the print queue and start its worker thread.
+
+        Args:
+            db_manager (SQLiteManager): Database for the job journal and print logs
+            printer (PDFPrinter): Printer from create_printer, used to spool jobs
+            dispatch (callable, optional): Runs a function on the GUI thread,
+                e.g. lambda fn: root.after(0, fn). Defaults to calling it directly.
+            status_monitor (PrinterStatusMonitor, optional): Cached printer status.
+                Without one the printer is asked directly before each attempt.
+            prep (PrintPrep, optional): Prepares and chunks documents before
+                spooling. Without one the original file is sent whole.
+            max_attempts (int, optional): Tries per job before it is marked failed
+            retry_delay (float, optional): Seconds before a failed attempt is retried
+        """
+        self.db_manager = db_manager
+        self.printer = printer
+        self.dispatch = dispatch or (lambda fn: fn())
+        self.status_monitor = status_monitor
+        self.prep = prep
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._jobs = queue.Queue()
+        self._callbacks = {}
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="print-queue", daemon=True)
+        self._worker.start()
+
+    def record_paid(self, pdf_path, pages, copies, is_colored, amount):
+        """
+        Journal a job as soon as it is paid, before it is sent anywhere.
+
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            pages (int): Number of pages
+            copies (int): Number of copies
+            is_colored (bool): Whether it is a color print
+            amount (float): Amount paid
+
+        Returns:
+            int: ID of the journal entry or None if it could not be recorded
+        """
+        job_id = self.db_manager.add_print_queue_job(pdf_path, pages, copies, is_colored, amount, state=PAID)
+        if job_id is not None and self.prep:
+            # Prepare while the customer is still on the payment screen
+            self.prep.prepare_async(pdf_path)
+        return job_id
+
+    def submit(self, pdf_path, pages, copies, is_colored, amount, callback=None):
+        """
+        Journal and queue a paid print job.
+
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            pages (int): Number of pages
+            copies (int): Number of copies
+            is_colored (bool): Whether it is a color print
+            amount (float): Amount paid
+            callback (callable, optional): Called on the GUI thread with
+                (job_id, state, progress, message) whenever the job changes
+
+        Returns:
+            int: ID of the queued job or None if it could not be recorded
+        """
+        job_id = self.db_manager.add_print_queue_job(pdf_path, pages, copies, is_colored, amount)
+        if job_id is None:
+            return None
+
+        if callback:
+            self._callbacks[job_id] = callback
+        self._report(job_id, QUEUED, 0, "Waiting for printer...")
+        self._jobs.put(job_id)
+        return job_id
+
+    def enqueue(self, job_id, callback=None):
+        """
+        Queue a job that was journaled with record_paid.
+
+        Args:
+            job_id (int): ID of the journal entry
+            callback (callable, optional): Progress callback, as for submit
+
+        Returns:
+            int: job_id, or None if it could not be queued
+        """
+        if not self.db_manager.update_print_queue_job(job_id, state=QUEUED):
+            return None
+
+        if callback:
+            self._callbacks[job_id] = callback
+        self._report(job_id, QUEUED, 0, "Waiting for printer...")
+        self._jobs.put(job_id)
+        return job_id
+
+    def resume(self):
+        """
+        Queue every job left unfinished by a previous run.
+
+        Returns:
+            list: IDs of the resumed jobs
+        """
+        jobs = self.db_manager.get_print_queue_jobs(UNFINISHED_STATES, limit=1000)
+        for job in jobs:
+            logger.info(f"Resuming print job {job['id']} from state {job['state']}")
+            self._jobs.put(job['id'])
+        return [job['id'] for job in jobs]
+
+    def pending(self):
+        """
+        Get the number of jobs waiting for or being spooled by the worker.
+
+        Returns:
+            int: Number of unfinished jobs
+        """
+        return self._jobs.unfinished_tasks
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker after the jobs already queued.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the worker
+
+        Returns:
+            bool: True if the worker stopped
+        """
+        self._stopped = True
+        self._jobs.put(self._STOP)
+        self._worker.join(timeout)
+        return not self._worker.is_alive()
+
+    def _run(self):
+        """Worker loop: spool queued jobs in order."""
+        while True:
+            job_id = self._jobs.get()
+            try:
+                if job_id is self._STOP:
+                    return
+                self._process(job_id)
+            except Exception as e:
+                log_error("PrintQueue", f"Unexpected error in print job {job_id}: {e}")
+            finally:
+                self._jobs.task_done()
+
+    def _process(self, job_id):
+        """
+        Move one job through the rest of its lifecycle.
+
+        Args:
+            job_id (int): ID of the journal entry
+        """
+        job = self.db_manager.get_print_queue_job(job_id)
+        if not job:
+            log_error("PrintQueue", f"Print job {job_id} not found")
+            return
+        if job['state'] not in UNFINISHED_STATES:
+            return
+
+        if job['state'] != SENT:
+            try:
+                self._spool(job)
+            except Exception as e:
+                self._attempt_failed(job, e)
+                return
+
+        self._confirm(job)
+
+    def _spool(self, job):
+        """
+        Send the chunks not yet sent to the printer, journaling each one.
+
+        A chunk interrupted by a crash is sent again on resume, so a customer
+        may get extra pages but never fewer than they paid for.
+
+        Args:
+            job (dict): Journal entry
+        """
+        job_id = job['id']
+        pages = job['pages']
+        total_pages = pages * job['copies']
+        pages_sent = job['pages_sent']
+
+        # Count the attempt before anything can fail, so every failure uses one up
+        self.db_manager.update_print_queue_job(job_id, attempts=job['attempts'] + 1)
+        if not total_pages:
+            raise ValueError("Nothing to print")
+
+        self._set_state(job_id, SPOOLING, pages_sent / total_pages, "Checking printer...")
+
+        # Check printer status
+        printer_status = self._printer_status()
+        if printer_status.get("status") == "error" or not printer_status.get("ready", False):
+            error_details = ", ".join([k for k, v in printer_status.get("details", {}).items() if v])
+            raise ValueError(f"Printer not ready: {error_details}" if error_details else "Printer not ready")
+
+        # Check paper level for the pages still to print
+        pages_needed = total_pages - pages_sent
+        paper_level = self.db_manager.get_setting('paper_level', 0, cast=int)
+        if pages_needed > paper_level:
+            raise ValueError(f"Not enough paper. Need {pages_needed} pages, but only {paper_level} available.")
+
+        chunks = self._chunks(job)
+
+        # One chunk of one copy per spool call so progress survives a crash
+        for copy in range(pages_sent // pages, job['copies']):
+            for chunk in chunks:
+                if copy * pages + chunk['end'] <= pages_sent:
+                    continue
+
+                self._report(job_id, SPOOLING, pages_sent / total_pages,
+                             f"Printing copy {copy + 1} of {job['copies']}...")
+                if not self.printer.print_pdf(chunk['path'], 1, show_errors=False):
+                    raise ValueError("Print job failed")
+
+                pages_sent = copy * pages + chunk['end']
+                self._set_state(job_id, SPOOLING, pages_sent / total_pages,
+                                f"Printed {pages_sent} of {total_pages} pages", pages_sent=pages_sent)
+
+        self._set_state(job_id, SENT, 1, "All pages sent to printer", error=None)
+
+    def _chunks(self, job):
+        """
+        Get the files to spool for one copy of a job.
+
+        Args:
+            job (dict): Journal entry
+
+        Returns:
+            list: {'path', 'start', 'end'} per chunk, in page order
+
+        Raises:
+            ValueError: If the document cannot be printed
+        """
+        whole = [{'path': job['pdf_path'], 'start': 0, 'end': job['pages']}]
+        if not self.prep:
+            return whole
+
+        self._report(job['id'], SPOOLING, job['pages_sent'] / (job['pages'] * job['copies']),
+                     "Preparing document...")
+        prepared = self.prep.prepare(job['pdf_path'])
+        if not prepared:
+            return whole
+        if prepared['pages'] != job['pages']:
+            log_error("PrintQueue", f"Print job {job['id']} is for {job['pages']} pages but the "
+                      f"document has {prepared['pages']}, printing the original file")
+            return whole
+        return prepared['chunks']
+
+    def _printer_status(self):
+        """
+        Get the printer status, from the status monitor's cache when there is one.
+
+        Returns:
+            dict: Printer status information
+        """
+        if self.status_monitor:
+            return self.status_monitor.get_status(wait=5)
+        return self.printer.check_printer_status()
+
+    def _confirm(self, job):
+        """
+        Record a sent job in print_jobs, which also updates the paper level.
+
+        The record is keyed on the journal entry, so a job confirmed just
+        before a crash is not recorded again when it is resumed.
+
+        Args:
+            job (dict): Journal entry
+        """
+        print_job_id = self.db_manager.log_print_job(
+            os.path.basename(job['pdf_path']), job['pages'], job['copies'],
+            job['is_colored'], job['amount'], True, queue_job_id=job['id'])
+        self._set_state(job['id'], CONFIRMED, 1, "Printing is now started!", print_job_id=print_job_id)
+        logger.info(f"Print job {job['id']} confirmed. Job ID: {print_job_id}")
+
+    def _attempt_failed(self, job, error):
+        """
+        Retry a failed attempt later, or fail the job once attempts run out.
+
+        Args:
+            job (dict): Journal entry as it was before the attempt
+            error (Exception): Why the attempt failed
+        """
+        job_id = job['id']
+        attempts = job['attempts'] + 1
+        log_error("PrintQueue", f"Print job {job_id} attempt {attempts} failed: {error}")
+
+        # The failure may be a printer problem the cached status has not seen yet
+        if self.status_monitor:
+            self.status_monitor.refresh()
+
+        if attempts < self.max_attempts and not self._stopped:
+            self._set_state(job_id, QUEUED, 0, f"{error}\nRetrying in {self.retry_delay} seconds...",
+                            error=str(error))
+            timer = threading.Timer(self.retry_delay, self._retry, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+
+        print_job_id = self.db_manager.log_print_job(
+            os.path.basename(job['pdf_path']), job['pages'], job['copies'],
+            job['is_colored'], job['amount'], False, queue_job_id=job_id)
+        self._set_state(job_id, FAILED, 0, str(error), error=str(error), print_job_id=print_job_id)
+
+    def _retry(self, job_id):
+        """Put a job back on the queue after its retry delay."""
+        if not self._stopped:
+            self._jobs.put(job_id)
+
+    def _set_state(self, job_id, state, progress, message, **fields):
+        """Journal a job's state and tell its callback."""
+        self.db_manager.update_print_queue_job(job_id, state=state, progress=progress, **fields)
+        self._report(job_id, state, progress, message)
+
+    def _report(self, job_id, state, progress, message):
+        """Hand a progress update to the job's callback on the GUI thread."""
+        callback = self._callbacks.get(job_id)
+        if state in (CONFIRMED, FAILED):
+            self._callbacks.pop(job_id, None)
+        if callback:
+            self.dispatch(lambda: callback(job_id, state, progress, message))
@@ -0,0 +1,149 @@
+"""
+Printer Status Monitor for the PisoPrint Vendo system.
+Polls the printer on a background thread and caches the decoded status, so
+the print path and the web monitor read it without spawning a process.
+"""
+import copy
+import threading
+import time
+from datetime import datetime
+from src.config import PRINTER_STATUS_INTERVAL
+from src.utils.logger import logger, log_error
+
+class PrinterStatusMonitor:
+    """Caches printer status from a background poller and notifies subscribers of changes"""
+
+    def __init__(self, printer, interval=PRINTER_STATUS_INTERVAL):
+        """
+        Initialize the printer status monitor.
+
+        Args:
+            printer: Printer from create_printer
+            interval (float, optional): Seconds between status checks
+        """
+        self.printer = printer
+        self.interval = interval
+        self._status = None
+        self._checked = None
+        self._lock = threading.Lock()
+        self._first_poll = threading.Event()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._subscribers = []
+
+    def start(self):
+        """Start polling in the background. The first check runs immediately."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="printer-status", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop polling.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the poller thread
+        """
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def refresh(self):
+        """Ask the poller to check the printer now instead of at the next interval."""
+        self._wake.set()
+
+    def subscribe(self, callback):
+        """
+        Register a callback for status changes.
+
+        Callbacks run on the poller thread, so GUI code must hand the update
+        to its own thread (e.g. with root.after).
+
+        Args:
+            callback (callable): Called with the new status dictionary
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Remove a status callback.
+
+        Args:
+            callback (callable): Callback passed to subscribe
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def get_status(self, wait=None):
+        """
+        Get the cached printer status.
+
+        Args:
+            wait (float, optional): Seconds to wait for the first check if it
+                has not finished yet. Only use this off the Tk thread.
+
+        Returns:
+            dict: Printer status with 'checked_at' (ISO time) and 'age' (seconds)
+                added, or an 'unknown' status before the first check
+        """
+        if wait and not self._first_poll.is_set():
+            self._first_poll.wait(wait)
+
+        with self._lock:
+            if self._status is None:
+                return {"status": "unknown", "ready": False, "details": {},
+                        "message": "Printer status not checked yet",
+                        "checked_at": None, "age": None}
+            status = copy.deepcopy(self._status)
+            checked_wall, checked_mono = self._checked
+
+        status["checked_at"] = checked_wall
+        status["age"] = round(time.monotonic() - checked_mono, 1)
+        return status
+
+    def poll(self):
+        """
+        Check the printer once and update the cache.
+
+        Returns:
+            dict: The new status
+        """
+        try:
+            status = self.printer.check_printer_status()
+        except Exception as e:
+            log_error("PrinterStatus", f"Error checking printer status: {e}")
+            status = {"status": "error", "message": str(e)}
+
+        with self._lock:
+            changed = self._signature(status) != self._signature(self._status)
+            self._status = status
+            self._checked = (datetime.now().isoformat(), time.monotonic())
+        self._first_poll.set()
+
+        if changed:
+            logger.info(f"Printer status changed: {status}")
+            for callback in list(self._subscribers):
+                try:
+                    callback(copy.deepcopy(status))
+                except Exception as e:
+                    log_error("PrinterStatus", f"Error in printer status subscriber: {e}")
+        return status
+
+    @staticmethod
+    def _signature(status):
+        """Reduce a status to the parts that matter for change notifications."""
+        if status is None:
+            return None
+        return (status.get("status"), status.get("ready"), status.get("code"),
+                tuple(sorted(status.get("details", {}))), status.get("message"))
+
+    def _run(self):
+        """Poller loop."""
+        while self._running:
+            self.poll()
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,416 @@
+"""
+Serial port multiplexer for the PisoPrint Vendo system.
+One SerialMux owns the Arduino link. Writes from any thread are queued and
+sent in order by a writer thread, so a beep from the Tk thread never waits on
+the port. The reader thread hands unsolicited events (COIN, ADMIN, streamed sensor
+readings) to
+their subscribers and every other line to the request waiting for it, so a
+sensor sweep can never swallow a coin.
+
+The link starts on the ASCII line protocol. negotiate_binary() switches it
+to CRC-checked binary frames at a higher baudrate when the firmware agrees.
+If the two ends lose sync on the binary link, e.g. because the board reset
+and went back to ASCII, the link is probed and negotiated again from ASCII.
+"""
+import queue
+import threading
+import time
+import serial
+from src.utils.logger import logger, log_error
+from src.utils.serial_reader import (BinaryFramer, LineFramer, encode_frame,
+                                     read_available, split_message)
+
+# Lines the Arduino sends on its own rather than in reply to a command
+EVENT_TAGS = ('COIN', 'ADMIN', 'DEBUG', 'SENSOR', 'HEARTBEAT')
+
+# Seconds the firmware waits for a valid frame after switching before it
+# goes back to ASCII at the old baudrate
+BINARY_CONFIRM_TIMEOUT = 2.0
+
+# Seconds without a frame sent or received before the binary link is probed.
+# Must stay well below the firmware's HOST_SILENCE_MS.
+BINARY_SYNC_TIMEOUT = 20.0
+
+# Bytes that fail to form a valid frame before the binary link counts as lost
+BINARY_MAX_BAD_BYTES = 64
+
+class _Request:
+    """A command waiting for its reply"""
+
+    def __init__(self, command, expect):
+        self.command = command
+        self.expect = (expect,) if isinstance(expect, str) else tuple(expect or ())
+        self.reply = None
+        self.done = threading.Event()
+
+    def accepts(self, tag):
+        """Check whether a reply with this tag answers this request."""
+        if tag == 'ERROR':
+            return True
+        return not self.expect or tag in self.expect
+
+class SerialMux:
+    """Owns a serial port and shares it between event listeners and requesters"""
+
+    _STOP = object()
+
+    def __init__(self, port, baudrate=9600, read_timeout=1.0):
+        """
+        Initialize the multiplexer.
+
+        Args:
+            port (str): Serial port name
+            baudrate (int, optional): Serial baudrate
+            read_timeout (float, optional): Longest the reader blocks before
+                checking whether it should stop
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.read_timeout = read_timeout
+        self.serial = None
+        self.running = False
+        self._subscribers = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._reader = None
+        self._writer = None
+        self.binary = False
+        self.sync_timeout = BINARY_SYNC_TIMEOUT
+        self._framer = LineFramer()
+        self._switch = None
+        self._tx_seq = 0
+        self._negotiated = None
+        self._resyncing = False
+        self._last_frame = 0
+        self._last_write = 0
+
+    def open(self, serial_port=None):
+        """
+        Open the port and start the reader and writer threads.
+
+        Args:
+            serial_port (serial.Serial, optional): Already open port to use
+                instead of opening self.port
+
+        Raises:
+            serial.SerialException: If the port cannot be opened
+        """
+        self.serial = serial_port or serial.Serial(self.port, self.baudrate, timeout=self.read_timeout)
+        self.running = True
+        self._reader = threading.Thread(target=self._read_loop, name="serial-reader", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="serial-writer", daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    def close(self):
+        """Stop the threads, fail waiting requests and close the port."""
+        if not self.running:
+            return
+        self.running = False
+        self._writes.put(self._STOP)
+        try:
+            # Wake the reader if it is blocked waiting for data
+            if hasattr(self.serial, 'cancel_read'):
+                self.serial.cancel_read()
+            self.serial.close()
+        except Exception as e:
+            log_error("SerialMux", f"Error closing serial port: {e}")
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for request in pending:
+            request.done.set()
+
+        for thread in (self._reader, self._writer):
+            if thread and thread is not threading.current_thread():
+                thread.join(2)
+
+    def is_open(self):
+        """
+        Check whether the port is open and being served.
+
+        Returns:
+            bool: True if open
+        """
+        return bool(self.running and self.serial and self.serial.is_open)
+
+    def subscribe(self, tag, callback):
+        """
+        Register a callback for an unsolicited event.
+
+        Callbacks run on the reader thread, so GUI code must hand the event to
+        its own thread (e.g. with root.after).
+
+        Args:
+            tag (str): Event tag from EVENT_TAGS, e.g. 'COIN'
+            callback (callable): Called with the event payload, e.g. '5' for COIN:5
+        """
+        self._subscribers.setdefault(tag, []).append(callback)
+
+    def send(self, command):
+        """
+        Queue a command that needs no reply. Never blocks.
+
+        Args:
+            command (str): Command without the newline
+
+        Returns:
+            bool: True if queued
+        """
+        if not self.is_open():
+            return False
+        self._writes.put((command, None))
+        return True
+
+    def request(self, command, expect=None, timeout=2.0):
+        """
+        Send a command and wait for its reply.
+
+        Replies are matched to requests in the order the commands were sent.
+        A request only takes replies with one of its expected tags, or an
+        ERROR line, so a stray line cannot answer the wrong command.
+
+        Args:
+            command (str): Command without the newline
+            expect (str or tuple, optional): Tags the reply may have, e.g.
+                'WEIGHT'. Any reply is accepted if not given.
+            timeout (float, optional): Seconds to wait for the reply
+
+        Returns:
+            str: Reply line, or None if the port is closed or no reply came
+        """
+        if not self.is_open():
+            return None
+
+        pending = _Request(command, expect)
+        with self._lock:
+            self._pending.append(pending)
+        self._writes.put((command, pending))
+
+        if not pending.done.wait(timeout):
+            with self._lock:
+                if pending in self._pending:
+                    self._pending.remove(pending)
+            logger.warning(f"No reply from Arduino to {command}")
+        return pending.reply
+
+    def negotiate_binary(self, baudrate, probe, expect, timeout=1.0):
+        """
+        Switch the link to binary frames at a higher baudrate.
+
+        Sends PROTO:BIN:<baudrate> as ASCII. Firmware that supports framing
+        echoes it back and switches; the reader switches as soon as the echo
+        arrives, before reading anything sent at the new settings. The probe
+        command then confirms the link works. Old firmware answers with an
+        ERROR and the link stays on ASCII.
+
+        Args:
+            baudrate (int): Baudrate to use once switched
+            probe (str): Command that confirms the switched link, e.g. 'PING'
+            expect (str): Tag of the probe's reply, e.g. 'PONG'
+            timeout (float, optional): Seconds to wait for each reply
+
+        Returns:
+            bool: True if the link now uses binary frames
+        """
+        if self.binary:
+            return True
+
+        command = f"PROTO:BIN:{baudrate}"
+        self._switch = (command, baudrate)
+        try:
+            reply = self.request(command, expect='PROTO', timeout=timeout)
+        finally:
+            self._switch = None
+        if reply != command:
+            logger.info(f"Arduino does not support binary framing, staying on ASCII ({reply})")
+            return False
+
+        if self.request(probe, expect=expect, timeout=timeout):
+            logger.info(f"Arduino link switched to binary frames at {baudrate} baud")
+            self._negotiated = (baudrate, probe, expect)
+            return True
+
+        # The firmware falls back by itself once no valid frame arrives
+        log_error("SerialMux", f"No reply to {probe} after switching to binary frames, going back to ASCII")
+        self._use_ascii()
+        time.sleep(BINARY_CONFIRM_TIMEOUT)
+        return False
+
+    def _use_binary(self, baudrate):
+        """Switch the reader and writer to binary frames. Runs on the reader thread."""
+        self.serial.baudrate = baudrate
+        self._tx_seq = 0
+        self._last_frame = self._last_write = time.monotonic()
+        self._framer = BinaryFramer()
+        self.binary = True
+
+    def _use_ascii(self):
+        """Switch back to ASCII lines at the configured baudrate."""
+        self.binary = False
+        self._framer = LineFramer()
+        self.serial.baudrate = self.baudrate
+
+    def _encode(self, command):
+        """
+        Encode a command for the current protocol. Runs on the writer thread.
+
+        Args:
+            command (str): Command without the newline
+
+        Returns:
+            bytes: Bytes to write
+        """
+        if not self.binary:
+            return f"{command}\n".encode('utf-8')
+        data = encode_frame(command, self._tx_seq)
+        self._tx_seq = (self._tx_seq + 1) & 0xFF
+        self._last_write = time.monotonic()
+        return data
+
+    def _check_sync(self):
+        """Probe the binary link in the background when it looks lost. Runs on the reader thread."""
+        if not self.binary or self._resyncing or not self._negotiated:
+            return
+        if self._framer.bad_bytes >= BINARY_MAX_BAD_BYTES:
+            reason = f"{self._framer.bad_bytes} bytes without a valid frame"
+        elif time.monotonic() - min(self._last_frame, self._last_write) >= self.sync_timeout:
+            reason = "link idle"
+        else:
+            return
+
+        self._resyncing = True
+        threading.Thread(target=self._resync, args=(reason,), name="serial-resync", daemon=True).start()
+
+    def _resync(self, reason):
+        """
+        Probe the binary link and negotiate it again from ASCII if it is lost.
+
+        Args:
+            reason (str): Why the link is being checked, for the log
+        """
+        try:
+            baudrate, probe, expect = self._negotiated
+            if self.request(probe, expect=expect, timeout=1.0):
+                self._framer.bad_bytes = 0
+                return
+            if not self.running:
+                return
+
+            logger.warning(f"Lost sync with Arduino ({reason}), negotiating binary frames again")
+            self._negotiated = None
+            self._use_ascii()
+            self.send("")  # Ends any line the firmware built from frames it could not read
+            self.negotiate_binary(baudrate, probe, expect)
+        except Exception as e:
+            log_error("SerialMux", f"Error resyncing serial link: {e}")
+        finally:
+            self._resyncing = False
+
+    def _write_loop(self):
+        """Writer loop: send queued commands in order."""
+        while True:
+            item = self._writes.get()
+            if item is self._STOP:
+                return
+            command, pending = item
+            try:
+                self.serial.write(self._encode(command))
+            except Exception as e:
+                log_error("SerialMux", f"Error writing {command}: {e}")
+                if pending:
+                    with self._lock:
+                        if pending in self._pending:
+                            self._pending.remove(pending)
+                    pending.done.set()
+
+    def _read_loop(self):
+        """Reader loop: dispatch lines as soon as they arrive."""
+        while self.running:
+            try:
+                self._handle(read_available(self.serial))
+                self._check_sync()
+            except Exception as e:
+                if not self.running:
+                    break
+                log_error("SerialMux", f"Error reading from serial port: {e}")
+                self._framer.reset()
+                time.sleep(1)
+
+    def _handle(self, data):
+        """
+        Frame received bytes and dispatch the messages.
+
+        While a protocol switch is pending, ASCII data is framed one line at a
+        time, so whatever follows the acknowledgement goes to the new framer.
+
+        Args:
+            data (bytes): Bytes read from the port
+        """
+        while data:
+            framer = self._framer
+            if self._switch and not self.binary:
+                end = data.find(b'\n') + 1 or len(data)
+                chunk, data = data[:end], data[end:]
+            else:
+                chunk, data = data, b''
+
+            lines = framer.feed(chunk)
+            if lines and self.binary:
+                self._last_frame = time.monotonic()
+            for line in lines:
+                self._dispatch(line)
+
+            if self._framer is not framer:
+                data = framer.drain() + data
+
+    def _dispatch(self, line):
+        """
+        Hand one line to its event subscribers or to the request it answers.
+
+        Args:
+            line (str): Received line
+        """
+        logger.debug(f"Received from Arduino: {line}")
+        tag, payload = split_message(line)
+
+        switch = self._switch
+        if switch and line == switch[0]:
+            self._use_binary(switch[1])
+
+        if tag in EVENT_TAGS:
+            for callback in list(self._subscribers.get(tag, [])):
+                try:
+                    callback(payload)
+                except Exception as e:
+                    log_error("SerialMux", f"Error handling {line}: {e}")
+            return
+
+        with self._lock:
+            request = self._match(tag, payload)
+            if request:
+                self._pending.remove(request)
+        if request:
+            request.reply = line
+            request.done.set()
+        else:
+            logger.debug(f"Unsolicited line from Arduino: {line}")
+
+    def _match(self, tag, payload):
+        """
+        Find the waiting request a reply belongs to. Must hold the lock.
+
+        An error naming a command goes to that command's request; other
+        errors go to the oldest request, since the Arduino answers in order.
+        """
+        if tag == 'ERROR' and payload:
+            named = [request for request in self._pending if request.command in payload]
+            if named:
+                return named[0]
+            if 'Unknown command' in payload:
+                return None  # A fire-and-forget command the firmware does not know
+        for request in self._pending:
+            if request.accepts(tag):
+                return request
+        return None
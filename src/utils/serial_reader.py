@@ -0,0 +1,243 @@
+"""
+Serial line reading for the PisoPrint Vendo system.
+The Arduino sends newline-terminated ASCII messages such as COIN:5. Readers
+block in the serial driver until bytes arrive instead of polling in_waiting
+on a timer, so a message is handled as soon as it lands and an idle kiosk
+only wakes once per read timeout.
+
+Firmware that supports it can switch to binary frames instead:
+
+    0xA5 | length | sequence | message bytes | CRC16 (big endian)
+
+The CRC (CCITT, initial value 0xFFFF) covers length, sequence and message,
+so a corrupted COIN is dropped instead of crediting the wrong amount, and
+the sequence number shows when frames were lost. A run of bytes that never
+forms a valid frame means the two ends no longer agree on the protocol.
+"""
+import binascii
+from src.utils.logger import logger
+
+# Longest line accepted; anything longer is line noise and is dropped
+MAX_LINE_LENGTH = 256
+
+# Binary framing
+FRAME_START = 0xA5
+MAX_FRAME_PAYLOAD = 128
+FRAME_OVERHEAD = 5  # Start, length and sequence bytes plus the CRC
+
+def read_available(port):
+    """
+    Wait for data on a serial port, then take everything already buffered.
+
+    Blocks for at most the port's read timeout, so callers can check a stop
+    flag between calls.
+
+    Args:
+        port (serial.Serial): Open port with a read timeout
+
+    Returns:
+        bytes: Data read, empty if the timeout passed with nothing received
+    """
+    data = port.read(1)
+    if data:
+        waiting = port.in_waiting
+        if waiting:
+            data += port.read(waiting)
+    return data
+
+def split_message(line):
+    """
+    Split a message into its tag and payload, e.g. 'COIN:5' into ('COIN', '5').
+
+    Args:
+        line (str): Message line
+
+    Returns:
+        tuple: (tag, payload), with payload None if the line has no colon
+    """
+    tag, sep, payload = line.partition(':')
+    return tag.strip(), (payload.strip() if sep else None)
+
+def frame_crc(data):
+    """
+    Compute the CRC16-CCITT of a frame body.
+
+    Args:
+        data (bytes): Length, sequence and message bytes
+
+    Returns:
+        int: 16-bit CRC
+    """
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def encode_frame(message, seq):
+    """
+    Wrap a message in a binary frame.
+
+    Args:
+        message (str): Message without the newline, e.g. 'READ_ALL'
+        seq (int): Sequence number, taken modulo 256
+
+    Returns:
+        bytes: Encoded frame
+
+    Raises:
+        ValueError: If the message is longer than MAX_FRAME_PAYLOAD
+    """
+    payload = message.encode('utf-8')
+    if len(payload) > MAX_FRAME_PAYLOAD:
+        raise ValueError(f"Message too long for a frame: {len(payload)} bytes")
+    body = bytes((len(payload), seq & 0xFF)) + payload
+    return bytes((FRAME_START,)) + body + frame_crc(body).to_bytes(2, 'big')
+
+class LineFramer:
+    """Splits a serial byte stream into complete, decoded lines"""
+
+    def __init__(self, max_length=MAX_LINE_LENGTH):
+        """
+        Initialize the framer.
+
+        Args:
+            max_length (int, optional): Longest line accepted, in bytes
+        """
+        self.max_length = max_length
+        self._buffer = bytearray()
+        self._discarding = False
+
+    def feed(self, data):
+        """
+        Add received bytes and return the lines they complete.
+
+        Partial lines are kept until their newline arrives. Carriage returns
+        and blank lines are dropped, and an overlong line is discarded up to
+        its newline rather than being split into garbage messages.
+
+        Args:
+            data (bytes): Bytes read from the port
+
+        Returns:
+            list: Complete lines as stripped strings
+        """
+        self._buffer.extend(data)
+        lines = []
+        while True:
+            end = self._buffer.find(b'\n')
+            if end < 0:
+                break
+            raw = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            if self._discarding:
+                self._discarding = False
+                continue
+            line = raw.decode('utf-8', errors='replace').strip()
+            if line:
+                lines.append(line)
+
+        if len(self._buffer) > self.max_length:
+            self._buffer.clear()
+            self._discarding = True
+        return lines
+
+    def reset(self):
+        """Drop any partial line, e.g. after the port is reopened."""
+        self._buffer.clear()
+        self._discarding = False
+
+    def drain(self):
+        """
+        Take the bytes not yet framed, e.g. when switching to another framer.
+
+        Returns:
+            bytes: Buffered bytes
+        """
+        data = bytes(self._buffer)
+        self.reset()
+        return data
+
+class BinaryFramer:
+    """Splits a stream of binary frames into checked, decoded messages"""
+
+    def __init__(self):
+        """Initialize the framer."""
+        self._buffer = bytearray()
+        self.last_seq = None
+        self.crc_errors = 0
+        self.lost_frames = 0
+        self.bad_bytes = 0  # Bytes dropped since the last valid frame
+
+    def feed(self, data):
+        """
+        Add received bytes and return the messages of the frames they complete.
+
+        Partial frames are kept until the rest arrives. A frame with a bad
+        CRC or an impossible length is dropped, and the framer resyncs on the
+        next start byte. Gaps in the sequence numbers are logged as lost frames.
+
+        Args:
+            data (bytes): Bytes read from the port
+
+        Returns:
+            list: Messages as stripped strings
+        """
+        self._buffer.extend(data)
+        messages = []
+        while True:
+            start = self._buffer.find(FRAME_START)
+            if start < 0:
+                self.bad_bytes += len(self._buffer)
+                self._buffer.clear()
+                break
+            self.bad_bytes += start
+            del self._buffer[:start]
+            if len(self._buffer) < 3:
+                break
+
+            length = self._buffer[1]
+            if length > MAX_FRAME_PAYLOAD:
+                self.bad_bytes += 1
+                del self._buffer[:1]
+                continue
+            end = length + FRAME_OVERHEAD
+            if len(self._buffer) < end:
+                break
+
+            body = bytes(self._buffer[1:end - 2])
+            crc = int.from_bytes(self._buffer[end - 2:end], 'big')
+            if frame_crc(body) != crc:
+                # Could be a start byte inside a damaged frame; resync after it
+                self.crc_errors += 1
+                self.bad_bytes += 1
+                logger.warning("Dropped serial frame with bad CRC")
+                del self._buffer[:1]
+                continue
+            del self._buffer[:end]
+            self.bad_bytes = 0
+
+            seq = body[1]
+            if self.last_seq is not None and seq != (self.last_seq + 1) & 0xFF:
+                missed = (seq - self.last_seq - 1) & 0xFF
+                self.lost_frames += missed
+                logger.warning(f"Lost {missed} serial frame(s) before frame {seq}")
+            self.last_seq = seq
+
+            message = body[2:].decode('utf-8', errors='replace').strip()
+            if message:
+                messages.append(message)
+        return messages
+
+    def reset(self):
+        """Drop any partial frame and forget the last sequence number."""
+        self._buffer.clear()
+        self.last_seq = None
+        self.bad_bytes = 0
+
+    def drain(self):
+        """
+        Take the bytes not yet framed, e.g. when switching to another framer.
+
+        Returns:
+            bytes: Buffered bytes
+        """
+        data = bytes(self._buffer)
+        self.reset()
+        return data
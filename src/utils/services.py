@@ -0,0 +1,95 @@
+"""
+Shared services for the PisoPrint Vendo system.
+The kiosk and the embedded web monitor use one database manager (and with it
+one settings cache), one printer status poller and one owner of the Arduino
+serial port. The kiosk fills the container in as its background boot phases
+finish; the standalone monitor builds its own.
+"""
+import threading
+from src.config import SENSOR_MONITOR_INTERVAL
+from src.utils.logger import logger, log_error
+
+class Services:
+    """Components shared by the kiosk and the web monitor"""
+
+    def __init__(self, db_manager=None, printer_status=None, arduino=None, sensor_manager=None):
+        """
+        Initialize the service container.
+
+        Args:
+            db_manager (SQLiteManager, optional): Shared database manager.
+                One is created if not given.
+            printer_status (PrinterStatusMonitor, optional): Shared printer status cache
+            arduino (ArduinoInterface, optional): Owner of the Arduino serial port.
+                When set, the sensor monitor talks through it instead of opening the port.
+            sensor_manager (PisoPrintSensors, optional): Shared sensor monitor
+        """
+        self._owned = set()
+        self._lock = threading.Lock()
+        if db_manager is None:
+            from src.utils.sqlite_manager import SQLiteManager
+            db_manager = SQLiteManager()
+            self._owned.add('db_manager')
+        self.db_manager = db_manager
+        self.printer_status = printer_status
+        self.arduino = arduino
+        self.sensor_manager = sensor_manager
+
+    def start_printer_status(self):
+        """
+        Start a printer status poller if none is shared yet.
+
+        Returns:
+            PrinterStatusMonitor: The shared printer status cache, or None if
+                no printer backend is available
+        """
+        with self._lock:
+            if self.printer_status is None:
+                from src.utils.print_backends import create_printer
+                from src.utils.printer_status import PrinterStatusMonitor
+
+                try:
+                    printer = create_printer(self.db_manager.get_setting('printer_name', ''))
+                except Exception as e:
+                    log_error("Services", f"Error starting printer status: {e}")
+                    return None
+                self.printer_status = PrinterStatusMonitor(printer)
+                self.printer_status.start()
+                self._owned.add('printer_status')
+            return self.printer_status
+
+    def start_sensors(self, interval=SENSOR_MONITOR_INTERVAL):
+        """
+        Start the paper and ink sensor monitor if none is shared yet.
+
+        Args:
+            interval (int, optional): Seconds between sensor sweeps
+
+        Returns:
+            PisoPrintSensors: The shared sensor monitor, or None if it failed to start
+        """
+        with self._lock:
+            if self.sensor_manager is None:
+                try:
+                    from src.monitor.sensor import PisoPrintSensors
+
+                    sensor_manager = PisoPrintSensors(self.db_manager, link=self.arduino)
+                    sensor_manager.start_monitoring(interval)
+                except Exception as e:
+                    log_error("Services", f"Error starting sensor monitor: {e}")
+                    return None
+                self.sensor_manager = sensor_manager
+                self._owned.add('sensor_manager')
+            return self.sensor_manager
+
+    def shutdown(self):
+        """Stop the components this container started; shared ones are left to their owner."""
+        with self._lock:
+            if 'sensor_manager' in self._owned and self.sensor_manager:
+                self.sensor_manager.shutdown()
+            if 'printer_status' in self._owned and self.printer_status:
+                self.printer_status.stop(timeout=1)
+            if 'db_manager' in self._owned and self.db_manager:
+                self.db_manager.close()
+            self._owned.clear()
+        logger.info("Shared services stopped")
@@ -5,9 +5,350 @@ Provides concrete implementation for the database operations.
 import os
 import sqlite3
 import json
-from datetime import datetime
+import copy
+import queue
+import time
+import atexit
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import threading
 from pathlib import Path
+from src.utils.db_migrations import apply_migrations, to_epoch
+from src.utils import stats_rollups
+from src.config import (
+    DB_SYNCHRONOUS,
+    DB_CACHED_STATEMENTS,
+    DB_BUSY_TIMEOUT,
+    DB_MAX_IDLE_READERS,
+    DB_WRITE_BATCH_SIZE,
+    DB_WRITE_FLUSH_INTERVAL,
+    DB_WRITE_TIMEOUT,
+    DB_SETTINGS_REFRESH_INTERVAL
+)
+
+
+class SQLiteConnectionPool:
+    """
+    Long-lived SQLite connections shared by the database manager.
+
+    Every thread gets its own reader connection, and all writes go through a
+    single writer connection guarded by a lock. Connections are opened in WAL
+    mode so readers never wait on the writer, and they stay open so SQLite's
+    per-connection statement cache actually gets reused between queries.
+    """
+
+    def __init__(self, db_path, synchronous=DB_SYNCHRONOUS,
+                 cached_statements=DB_CACHED_STATEMENTS,
+                 busy_timeout=DB_BUSY_TIMEOUT, max_idle_readers=DB_MAX_IDLE_READERS):
+        """
+        Initialize the connection pool.
+
+        Args:
+            db_path (str): Path to the database file
+            synchronous (str, optional): Value for PRAGMA synchronous
+            cached_statements (int, optional): Prepared statements cached per connection
+            busy_timeout (int, optional): Milliseconds to wait on a locked database
+            max_idle_readers (int, optional): Reader connections kept for reuse
+                after their thread exits
+        """
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+        self.max_idle_readers = max_idle_readers
+
+        self.write_lock = threading.RLock()
+        self._writer = None
+        self._readers = {}  # thread -> connection
+        self._idle_readers = []
+        self._readers_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self):
+        """Open a new connection configured for pooled use."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,  # Connections may be handed between threads
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+
+    def _reap_dead_readers(self):
+        """Move connections owned by finished threads to the idle list."""
+        for thread in [t for t in self._readers if not t.is_alive()]:
+            conn = self._readers.pop(thread)
+            if len(self._idle_readers) < self.max_idle_readers:
+                self._idle_readers.append(conn)
+            else:
+                conn.close()
+
+    def reader(self):
+        """
+        Get the reader connection for the calling thread.
+
+        Returns:
+            sqlite3.Connection: Connection reserved for this thread
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        with self._readers_lock:
+            self._reap_dead_readers()
+            conn = self._idle_readers.pop() if self._idle_readers else self._open()
+            self._readers[threading.current_thread()] = conn
+
+        self._local.conn = conn
+        return conn
+
+    def writer(self):
+        """
+        Get the shared writer connection. Callers must hold write_lock.
+
+        Returns:
+            sqlite3.Connection: The writer connection
+        """
+        if self._writer is None:
+            self._writer = self._open()
+        return self._writer
+
+    @contextmanager
+    def write(self, durable=False):
+        """
+        Run a block of writes as one transaction on the writer connection.
+
+        Args:
+            durable (bool, optional): Sync the commit to disk even when the
+                pool runs with a relaxed synchronous setting
+
+        Yields:
+            sqlite3.Connection: The writer connection
+        """
+        with self.write_lock:
+            conn = self.writer()
+            if durable:
+                conn.execute('PRAGMA synchronous=FULL')
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                if durable:
+                    conn.execute(f'PRAGMA synchronous={self.synchronous}')
+
+    def close(self):
+        """Close every connection owned by the pool."""
+        with self.write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._readers_lock:
+            for conn in list(self._readers.values()) + self._idle_readers:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._readers.clear()
+            self._idle_readers = []
+        # Stale thread-local references are detected as closed on next use
+        self._local = threading.local()
+
+
+class PendingWrite:
+    """A write submitted to the WriteBehindQueue, completed once its batch commits"""
+
+    def __init__(self, query, params=(), barrier=False):
+        self.query = query
+        self.params = params
+        self.barrier = barrier
+        self.result = None
+        self.done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the write to be committed.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            The row id of the inserted row, or None if the write failed or timed out
+        """
+        self.done.wait(timeout)
+        return self.result
+
+    def add_done_callback(self, callback):
+        """
+        Call a function once the write has been committed, instead of waiting for it.
+        It runs on the writer thread, or straight away if the write is already done.
+
+        Args:
+            callback (callable): Called with the row id, or None if the write failed
+        """
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self.result)
+
+    def finish(self):
+        """Mark the write as done and call the functions waiting for it."""
+        with self._lock:
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self.result)
+            except Exception as e:
+                print(f"Error in write callback: {e}")
+
+
+class WriteBehindQueue:
+    """
+    Background writer that coalesces INSERTs into group-committed transactions.
+
+    Writes are collected until the batch is full or the flush interval has
+    passed, then committed together so a burst of coins or a sensor sweep costs
+    one fsync instead of one per row. A barrier write (used for money rows)
+    closes the batch immediately and is committed with a full disk sync.
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool, batch_size=DB_WRITE_BATCH_SIZE, flush_interval=DB_WRITE_FLUSH_INTERVAL):
+        """
+        Initialize the write-behind queue.
+
+        Args:
+            pool (SQLiteConnectionPool): Pool providing the writer connection
+            batch_size (int, optional): Maximum writes per transaction
+            flush_interval (float, optional): Seconds a write may wait for more writes
+        """
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches_committed = 0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_running(self):
+        """Start the writer thread on first use."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-write-behind", daemon=True)
+                self._thread.start()
+
+    def submit(self, query, params=(), barrier=False):
+        """
+        Queue a write without waiting for it.
+
+        Args:
+            query (str): SQL statement to execute
+            params (tuple, optional): Parameters for the statement
+            barrier (bool, optional): Commit durably without waiting for more writes
+
+        Returns:
+            PendingWrite: Handle that can be waited on for the row id
+        """
+        write = PendingWrite(query, params, barrier)
+        self._ensure_running()
+        self._queue.put(write)
+        return write
+
+    def flush(self, timeout=None):
+        """
+        Block until every write queued so far has been committed.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            bool: True if the queue drained in time, False otherwise
+        """
+        if self._thread is None:
+            return True
+        marker = PendingWrite(None, barrier=True)
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def stop(self, timeout=5):
+        """
+        Commit pending writes and stop the writer thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread
+        """
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(self._STOP)
+            thread.join(timeout)
+
+    def _run(self):
+        """Collect writes into batches and commit them until stopped."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while not batch[-1].barrier and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """
+        Commit a batch of writes in one transaction.
+
+        Args:
+            batch (list): PendingWrite objects to commit
+        """
+        writes = [w for w in batch if w.query]
+        durable = any(w.barrier for w in writes)
+        try:
+            if writes:
+                with self.pool.write(durable=durable) as conn:
+                    for write in writes:
+                        write.result = conn.execute(write.query, write.params).lastrowid
+                self.batches_committed += 1
+        except sqlite3.Error as e:
+            print(f"SQLite error in write-behind batch: {e}")
+            # Retry one by one so a single bad row does not drop the whole batch
+            for write in writes:
+                try:
+                    with self.pool.write(durable=write.barrier) as conn:
+                        write.result = conn.execute(write.query, write.params).lastrowid
+                except sqlite3.Error as e:
+                    print(f"SQLite error in write-behind insert: {e}")
+                    write.result = None
+        finally:
+            for write in batch:
+                write.finish()
+
 
 class SQLiteManager:
     """SQLite implementation of the database operations"""
@@ -26,13 +367,67 @@ class SQLiteManager:
             db_path = data_dir / 'pisoprint.db'
             
         self.db_path = str(db_path)
-        self.lock = threading.RLock()  # Thread-safe operations
+        self.pool = SQLiteConnectionPool(self.db_path)
+        self.lock = self.pool.write_lock  # Serializes writes across threads
+        self.writes = WriteBehindQueue(self.pool)
+        
+        # In-memory settings cache, refreshed when another connection commits
+        self.settings_refresh_interval = DB_SETTINGS_REFRESH_INTERVAL
+        self._settings = None
+        self._settings_lock = threading.RLock()
+        self._settings_conn = None
+        self._settings_version = None
+        self._settings_checked = 0
+        self._settings_subscribers = []
+        self._settings_watcher = None
+        
         self.initialize_db()
         
+        # Make sure queued log rows reach the disk on interpreter exit
+        atexit.register(self.close)
+        
+    def close(self):
+        """Commit queued writes and close all pooled database connections."""
+        self.writes.stop()
+        self._settings_subscribers = []
+        with self._settings_lock:
+            if self._settings_conn is not None:
+                self._settings_conn.close()
+                self._settings_conn = None
+        self.pool.close()
+    
+    def flush(self, timeout=None):
+        """
+        Wait until all queued log writes have been committed.
+        
+        Args:
+            timeout (float, optional): Seconds to wait
+            
+        Returns:
+            bool: True if all writes were committed in time
+        """
+        return self.writes.flush(timeout)
+    
+    def _fetch_dicts(self, query, params=()):
+        """
+        Run a read query and return its rows as dictionaries.
+        
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Parameters for the query
+            
+        Returns:
+            list: List of row dictionaries
+        """
+        cursor = self.pool.reader().cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+        
     def initialize_db(self):
         """Initialize the database with required tables if they don't exist."""
         with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.write() as conn:
                 cursor = conn.cursor()
                 
                 # Create settings table
@@ -155,6 +550,9 @@ class SQLiteManager:
                     )
                 
                 conn.commit()
+                
+                # Bring indexes and columns up to the latest schema version
+                apply_migrations(conn)
     
     def execute_query(self, query, params=None, fetch_all=False, fetch_one=False):
         """
@@ -171,54 +569,149 @@ class SQLiteManager:
         """
         params = params or ()
         
-        with self.lock:
+        try:
+            # Reads run on this thread's own connection without taking the write lock
+            if fetch_all or fetch_one:
+                cursor = self.pool.reader().execute(query, params)
+                return cursor.fetchall() if fetch_all else cursor.fetchone()
+            
+            with self.pool.write() as conn:
+                cursor = conn.execute(query, params)
+                if query.strip().upper().startswith('INSERT'):
+                    return cursor.lastrowid
+                return True
+        except sqlite3.Error as e:
+            print(f"SQLite error: {e}")
+            return None
+    
+    @staticmethod
+    def _parse_setting(value):
+        """
+        Parse a stored setting string, decoding it as JSON if it looks like a
+        dictionary or list.
+        
+        Args:
+            value (str): Raw value from the settings table
+            
+        Returns:
+            The parsed value
+        """
+        try:
+            if (value.startswith('{') and value.endswith('}')) or \
+               (value.startswith('[') and value.endswith(']')):
+                return json.loads(value)
+            return value
+        except (json.JSONDecodeError, AttributeError):
+            return value
+    
+    @staticmethod
+    def _serialize_setting(value):
+        """Convert a setting value to the string stored in the database."""
+        # Convert non-string values to JSON
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value)
+        elif not isinstance(value, str):
+            return str(value)
+        return value
+    
+    def _settings_changed_on_disk(self):
+        """
+        Check whether any connection has committed since the last check.
+        
+        Returns:
+            bool: True if the database may hold newer settings
+        """
+        if self._settings_conn is None:
+            self._settings_conn = self.pool._open()
+        version = self._settings_conn.execute('PRAGMA data_version').fetchone()[0]
+        changed = version != self._settings_version
+        self._settings_version = version
+        return changed
+    
+    def refresh_settings(self, force=False):
+        """
+        Reload the settings cache if the database changed since it was loaded,
+        and notify subscribers about settings whose value changed.
+        
+        Args:
+            force (bool, optional): Reload even if no change was detected
+            
+        Returns:
+            list: Keys whose values changed
+        """
+        with self._settings_lock:
+            self._settings_checked = time.monotonic()
             try:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(query, params)
-                    
-                    if fetch_all:
-                        return cursor.fetchall()
-                    elif fetch_one:
-                        return cursor.fetchone()
-                    elif query.strip().upper().startswith('INSERT'):
-                        return cursor.lastrowid
-                    else:
-                        conn.commit()
-                        return True
+                if not self._settings_changed_on_disk() and not force and self._settings is not None:
+                    return []
+                rows = self._settings_conn.execute('SELECT key, value FROM settings').fetchall()
             except sqlite3.Error as e:
-                print(f"SQLite error: {e}")
-                return None
+                print(f"SQLite error in refresh_settings: {e}")
+                return []
+            
+            fresh = {key: self._parse_setting(value) for key, value in rows}
+            previous = self._settings or {}
+            changed = [key for key in fresh if key not in previous or previous[key] != fresh[key]]
+            first_load = self._settings is None
+            self._settings = fresh
+        
+        if not first_load:
+            for key in changed:
+                self._notify_setting(key, fresh[key])
+        return changed
     
-    def get_setting(self, key, default=None):
+    def _cached_settings(self):
+        """Return the settings cache, reloading it if another writer may have changed it."""
+        if self._settings is None or \
+           time.monotonic() - self._settings_checked >= self.settings_refresh_interval:
+            self.refresh_settings()
+        return self._settings or {}
+    
+    def get_setting(self, key, default=None, cast=None):
         """
-        Get a setting value from the database.
+        Get a setting value from the in-memory settings cache.
         
         Args:
             key (str): Setting key
             default: Default value if setting doesn't exist
+            cast (callable, optional): Type to convert the value to, e.g. float.
+                The default is returned if the conversion fails.
             
         Returns:
             Value of the setting or default if not found
         """
-        query = 'SELECT value FROM settings WHERE key = ?'
-        result = self.execute_query(query, (key,), fetch_one=True)
+        settings = self._cached_settings()
+        if key not in settings:
+            return default
         
-        if result:
-            # Try to parse as JSON if it looks like a dictionary or list
-            value = result[0]
+        value = settings[key]
+        if isinstance(value, (dict, list)):
+            # Callers must not mutate the shared cached object
+            return copy.deepcopy(value)
+        if cast is not None:
             try:
-                if (value.startswith('{') and value.endswith('}')) or \
-                   (value.startswith('[') and value.endswith(']')):
-                    return json.loads(value)
-                return value
-            except (json.JSONDecodeError, AttributeError):
-                return value
-        return default
+                return cast(value)
+            except (TypeError, ValueError):
+                return default
+        return value
+    
+    def get_settings(self, keys):
+        """
+        Get several settings at once from the settings cache.
+        
+        Args:
+            keys (dict or iterable): Mapping of setting keys to default values,
+                or an iterable of keys (missing keys default to None)
+            
+        Returns:
+            dict: Setting values keyed by setting key
+        """
+        defaults = keys if isinstance(keys, dict) else dict.fromkeys(keys)
+        return {key: self.get_setting(key, default) for key, default in defaults.items()}
     
     def set_setting(self, key, value):
         """
-        Set a setting value in the database.
+        Set a setting value in the database and the settings cache.
         
         Args:
             key (str): Setting key
@@ -227,19 +720,116 @@ class SQLiteManager:
         Returns:
             bool: True if successful, False otherwise
         """
-        # Convert non-string values to JSON
-        if isinstance(value, (dict, list, tuple)):
-            value = json.dumps(value)
-        elif not isinstance(value, str):
-            value = str(value)
+        return self.set_settings({key: value})
+    
+    def set_settings(self, values):
+        """
+        Set several settings in one transaction and update the settings cache.
+        
+        Args:
+            values (dict): Setting values keyed by setting key
             
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        now = datetime.now().isoformat()
+        rows = [(key, self._serialize_setting(value), now) for key, value in values.items()]
+        
+        # Load the cache first so our own commit is not mistaken for an outside change
+        self._cached_settings()
+        
         query = '''
         INSERT OR REPLACE INTO settings (key, value, updated_at)
         VALUES (?, ?, ?)
         '''
-        return self.execute_query(query, (key, value, datetime.now().isoformat()))
+        try:
+            with self.pool.write() as conn:
+                conn.executemany(query, rows)
+        except sqlite3.Error as e:
+            print(f"SQLite error in set_settings: {e}")
+            return False
+        
+        # Write through to the cache and tell subscribers
+        for key, value in self._write_through(rows):
+            self._notify_setting(key, value)
+        return True
     
-    def log_print_job(self, filename, pages, copies, is_colored, amount_paid, success):
+    def _write_through(self, rows):
+        """
+        Store committed setting rows in the settings cache.
+        
+        Works on the cache current at the time of the call, under the cache
+        lock, since a concurrent refresh_settings may have replaced the dict
+        that was loaded before the write.
+        
+        Args:
+            rows (list): (key, stored value, updated_at) tuples as written
+            
+        Returns:
+            list: (key, value) pairs whose cached value changed
+        """
+        changed = []
+        with self._settings_lock:
+            settings = self._settings
+            if settings is None:
+                return changed  # Loaded from disk, new values included, on next read
+            for key, stored, _ in rows:
+                parsed = self._parse_setting(stored)
+                if key not in settings or settings[key] != parsed:
+                    changed.append((key, parsed))
+                settings[key] = parsed
+        return changed
+    
+    def subscribe_settings(self, callback, keys=None):
+        """
+        Register a callback for setting changes, including changes committed by
+        other processes such as the web monitor.
+        
+        Callbacks run on the thread that detected the change, so GUI code must
+        hand the update to its own thread (e.g. with root.after).
+        
+        Args:
+            callback (callable): Called as callback(key, value)
+            keys (iterable, optional): Only report changes to these keys
+        """
+        self._settings_subscribers.append((callback, set(keys) if keys else None))
+        self._start_settings_watcher()
+    
+    def unsubscribe_settings(self, callback):
+        """
+        Remove a callback registered with subscribe_settings.
+        
+        Args:
+            callback (callable): Callback to remove
+        """
+        self._settings_subscribers = [
+            (cb, keys) for cb, keys in self._settings_subscribers if cb is not callback
+        ]
+    
+    def _notify_setting(self, key, value):
+        """Call the subscribers interested in a changed setting."""
+        for callback, keys in list(self._settings_subscribers):
+            if keys is None or key in keys:
+                try:
+                    callback(key, value)
+                except Exception as e:
+                    print(f"Error in settings subscriber: {e}")
+    
+    def _start_settings_watcher(self):
+        """Poll for settings changed by other processes while anyone is subscribed."""
+        if self._settings_watcher and self._settings_watcher.is_alive():
+            return
+        
+        def watch():
+            while self._settings_subscribers:
+                time.sleep(self.settings_refresh_interval)
+                if time.monotonic() - self._settings_checked >= self.settings_refresh_interval:
+                    self.refresh_settings()
+        
+        self._settings_watcher = threading.Thread(target=watch, name="settings-watcher", daemon=True)
+        self._settings_watcher.start()
+    
+    def log_print_job(self, filename, pages, copies, is_colored, amount_paid, success, queue_job_id=None):
         """
         Log a print job to the database.
         
@@ -250,17 +840,22 @@ class SQLiteManager:
             is_colored (bool): Whether it was a color print
             amount_paid (float): Amount paid
             success (bool): Whether the print job was successful
+            queue_job_id (int, optional): Print queue entry the job belongs to.
+                The record, the paper level and the entry are then committed
+                together, and an entry already recorded is not recorded again.
             
         Returns:
             int: ID of the new print job record or None if failed
         """
         query = '''
         INSERT INTO print_jobs (
-            timestamp, filename, pages, copies, is_colored, amount_paid, success
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            timestamp, ts_epoch, filename, pages, copies, is_colored, amount_paid, success
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         '''
+        now = datetime.now()
         params = (
-            datetime.now().isoformat(),
+            now.isoformat(),
+            to_epoch(now),
             filename,
             pages,
             copies,
@@ -269,7 +864,13 @@ class SQLiteManager:
             success
         )
         
-        job_id = self.execute_query(query, params)
+        if queue_job_id is not None:
+            return self._log_queued_print_job(queue_job_id, query, params, pages * copies if success else 0)
+        
+        # Print jobs carry money, so commit durably and wait (briefly) for the row id
+        job_id = self.writes.submit(query, params, barrier=True).wait(DB_WRITE_TIMEOUT)
+        if job_id is None:
+            print("SQLite error in log_print_job: print job not committed in time")
         
         # Update paper level
         if success and job_id:
@@ -277,6 +878,64 @@ class SQLiteManager:
             
         return job_id
     
+    def _log_queued_print_job(self, queue_job_id, query, params, pages_used):
+        """
+        Record a print queue entry in print_jobs in one durable transaction.
+        
+        The print_jobs row, the paper level and the entry's print_job_id are
+        committed together, so a resumed job is never counted twice.
+        
+        Args:
+            queue_job_id (int): ID of the print queue entry
+            query (str): print_jobs INSERT statement
+            params (tuple): Parameters for the INSERT
+            pages_used (int): Sheets to take off the paper level
+            
+        Returns:
+            int: ID of the print job record or None if failed
+        """
+        # Load the cache first so our own commit is not mistaken for an outside change
+        self._cached_settings()
+        
+        now = datetime.now().isoformat()
+        paper_rows = []
+        try:
+            with self.pool.write(durable=True) as conn:
+                row = conn.execute("SELECT print_job_id FROM print_queue WHERE id = ?",
+                                   (queue_job_id,)).fetchone()
+                if row and row[0] is not None:
+                    return row[0]  # Recorded before a crash
+                
+                job_id = conn.execute(query, params).lastrowid
+                conn.execute("UPDATE print_queue SET print_job_id = ?, updated_at = ? WHERE id = ?",
+                             (job_id, now, queue_job_id))
+                
+                if pages_used:
+                    row = conn.execute("SELECT value FROM settings WHERE key = 'paper_level'").fetchone()
+                    try:
+                        current_level = int(row[0]) if row else 0
+                    except ValueError:
+                        current_level = 0
+                    paper_rows = [('paper_level', str(max(0, current_level - pages_used)), now)]
+                    conn.executemany('''
+                    INSERT OR REPLACE INTO settings (key, value, updated_at)
+                    VALUES (?, ?, ?)
+                    ''', paper_rows)
+        except sqlite3.Error as e:
+            print(f"SQLite error in log_print_job: {e}")
+            return None
+        
+        for key, value in self._write_through(paper_rows):
+            self._notify_setting(key, value)
+        
+        # Log if paper is running low (below 20% of capacity)
+        if paper_rows:
+            new_level = int(paper_rows[0][1])
+            capacity = int(self.get_setting('paper_capacity', 500))
+            if new_level / capacity < 0.2:
+                self.log_system_stat('paper_low', new_level, f"Paper level is low: {new_level}/{capacity}")
+        return job_id
+    
     def update_paper_level(self, pages_used):
         """
         Update paper level after printing.
@@ -303,62 +962,76 @@ class SQLiteManager:
             
         return result
     
-    def log_payment(self, amount, print_job_id=None):
+    def log_payment(self, amount, print_job_id=None, callback=None):
         """
-        Log a payment transaction.
+        Log a payment transaction. The row is committed by the write-behind queue
+        immediately and with a full disk sync.
         
         Args:
             amount (float): Amount paid
             print_job_id (int, optional): ID of the associated print job
+            callback (callable, optional): Called on the writer thread with True
+                once the row is on disk, or False if the write failed. When given,
+                this returns as soon as the row is queued instead of waiting.
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True once the row is on disk (or queued, with a callback),
+                False if the write failed or did not commit in time
         """
         query = '''
         INSERT INTO payment_transactions (
-            timestamp, amount, print_job_id
-        ) VALUES (?, ?, ?)
+            timestamp, ts_epoch, amount, print_job_id
+        ) VALUES (?, ?, ?, ?)
         '''
+        now = datetime.now()
         params = (
-            datetime.now().isoformat(),
+            now.isoformat(),
+            to_epoch(now),
             amount,
             print_job_id
         )
         
-        result = self.execute_query(query, params)
-        
-        # Also log to system stats
+        # Queue the revenue stat first so both rows land in the same commit
         self.log_system_stat('revenue', amount, f"Payment received: ₱{amount}")
         
-        return result is not None
+        # Money rows act as a durability barrier: committed right away with a full
+        # sync, and not reported as logged until they are on disk
+        write = self.writes.submit(query, params, barrier=True)
+        if callback:
+            write.add_done_callback(lambda job_id: callback(job_id is not None))
+            return True
+        return write.wait(DB_WRITE_TIMEOUT) is not None
     
     def log_admin_access(self, action, details=None):
         """
-        Log admin access activity.
+        Log admin access activity. The row is written by the write-behind queue.
         
         Args:
             action (str): Description of the action performed
             details (str, optional): Additional details
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True once the write has been queued
         """
         query = '''
         INSERT INTO admin_access_log (
-            timestamp, action, details
-        ) VALUES (?, ?, ?)
+            timestamp, ts_epoch, action, details
+        ) VALUES (?, ?, ?, ?)
         '''
+        now = datetime.now()
         params = (
-            datetime.now().isoformat(),
+            now.isoformat(),
+            to_epoch(now),
             action,
             details
         )
         
-        return self.execute_query(query, params) is not None
+        self.writes.submit(query, params)
+        return True
     
     def log_system_stat(self, stat_type, value, notes=None):
         """
-        Log a system statistic.
+        Log a system statistic. The row is written by the write-behind queue.
         
         Args:
             stat_type (str): Type of statistic (e.g., 'paper_used', 'revenue')
@@ -366,21 +1039,119 @@ class SQLiteManager:
             notes (str, optional): Additional notes
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True once the write has been queued
         """
         query = '''
         INSERT INTO system_stats (
-            timestamp, stat_type, value, notes
-        ) VALUES (?, ?, ?, ?)
+            timestamp, ts_epoch, stat_type, value, notes
+        ) VALUES (?, ?, ?, ?, ?)
         '''
+        now = datetime.now()
         params = (
-            datetime.now().isoformat(),
+            now.isoformat(),
+            to_epoch(now),
             stat_type,
             value,
             notes
         )
         
-        return self.execute_query(query, params) is not None
+        self.writes.submit(query, params)
+        return True
+    
+    def add_print_queue_job(self, pdf_path, pages, copies, is_colored, amount, state='queued'):
+        """
+        Record a paid print job in the print queue. The row is committed with a
+        full sync before anything is sent to the printer.
+        
+        Args:
+            pdf_path (str): Path to the PDF file to print
+            pages (int): Number of pages
+            copies (int): Number of copies
+            is_colored (bool): Whether it is a color print
+            amount (float): Amount paid
+            state (str, optional): Initial journal state, 'paid' or 'queued'
+            
+        Returns:
+            int: ID of the queue entry or None if failed
+        """
+        now = datetime.now().isoformat()
+        query = '''
+        INSERT INTO print_queue (
+            created_at, updated_at, pdf_path, pages, copies, is_colored, amount, state
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        try:
+            with self.pool.write(durable=True) as conn:
+                cursor = conn.execute(query, (now, now, pdf_path, pages, copies, is_colored, amount, state))
+                return cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"SQLite error in add_print_queue_job: {e}")
+            return None
+    
+    def update_print_queue_job(self, job_id, **fields):
+        """
+        Update the state, progress or result of a print queue entry. Journal
+        updates are synced to disk before the next side effect runs.
+        
+        Args:
+            job_id (int): ID of the queue entry
+            **fields: Columns to update, e.g. state, progress, pages_sent, error
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        fields['updated_at'] = datetime.now().isoformat()
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        query = f"UPDATE print_queue SET {assignments} WHERE id = ?"
+        try:
+            with self.pool.write(durable=True) as conn:
+                conn.execute(query, (*fields.values(), job_id))
+            return True
+        except sqlite3.Error as e:
+            print(f"SQLite error in update_print_queue_job: {e}")
+            return False
+    
+    def get_print_queue_job(self, job_id):
+        """
+        Get a print queue entry.
+        
+        Args:
+            job_id (int): ID of the queue entry
+            
+        Returns:
+            dict: Queue entry or None if not found
+        """
+        try:
+            rows = self._fetch_dicts("SELECT * FROM print_queue WHERE id = ?", (job_id,))
+            return rows[0] if rows else None
+        except sqlite3.Error as e:
+            print(f"SQLite error in get_print_queue_job: {e}")
+            return None
+    
+    def get_print_queue_jobs(self, states=None, limit=50):
+        """
+        Get print queue entries, oldest first.
+        
+        Args:
+            states (list, optional): Only entries in these states
+            limit (int, optional): Maximum number of records to return
+            
+        Returns:
+            list: List of queue entries
+        """
+        query = "SELECT * FROM print_queue"
+        params = []
+        if states:
+            query += f" WHERE state IN ({', '.join('?' for _ in states)})"
+            params.extend(states)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        
+        try:
+            return self._fetch_dicts(query, tuple(params))
+        except sqlite3.Error as e:
+            print(f"SQLite error in get_print_queue_jobs: {e}")
+            return []
     
     def get_total_revenue(self, start_date=None, end_date=None):
         """
@@ -396,7 +1167,10 @@ class SQLiteManager:
         query = 'SELECT SUM(amount) FROM payment_transactions'
         params = []
         
-        if start_date or end_date:
+        if not (start_date or end_date):
+            # All-time totals come from the daily rollup
+            query = 'SELECT SUM(revenue) FROM stats_daily'
+        else:
             query += ' WHERE '
             if start_date:
                 query += 'timestamp >= ?'
@@ -424,7 +1198,10 @@ class SQLiteManager:
         query = 'SELECT SUM(pages * copies) FROM print_jobs WHERE success = 1'
         params = []
         
-        if start_date or end_date:
+        if not (start_date or end_date):
+            # All-time totals come from the daily rollup
+            query = 'SELECT SUM(pages) FROM stats_daily'
+        else:
             if start_date:
                 query += ' AND timestamp >= ?'
                 params.append(start_date)
@@ -445,21 +1222,15 @@ class SQLiteManager:
         Returns:
             list: List of print job records
         """
-        with self.lock:
-            try:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                    SELECT * FROM print_jobs 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                    ''', (limit,))
-                    
-                    return [dict(row) for row in cursor.fetchall()]
-            except sqlite3.Error as e:
-                print(f"SQLite error in get_print_job_stats: {e}")
-                return []
+        try:
+            return self._fetch_dicts('''
+            SELECT * FROM print_jobs 
+            ORDER BY timestamp DESC 
+            LIMIT ?
+            ''', (limit,))
+        except sqlite3.Error as e:
+            print(f"SQLite error in get_print_job_stats: {e}")
+            return []
     
     def get_admin_logs(self, limit=50):
         """
@@ -471,21 +1242,280 @@ class SQLiteManager:
         Returns:
             list: List of admin access log records
         """
-        with self.lock:
-            try:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                    SELECT * FROM admin_access_log 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                    ''', (limit,))
-                    
-                    return [dict(row) for row in cursor.fetchall()]
-            except sqlite3.Error as e:
-                print(f"SQLite error in get_admin_logs: {e}")
-                return []
+        try:
+            return self._fetch_dicts('''
+            SELECT * FROM admin_access_log 
+            ORDER BY timestamp DESC 
+            LIMIT ?
+            ''', (limit,))
+        except sqlite3.Error as e:
+            print(f"SQLite error in get_admin_logs: {e}")
+            return []
+    
+    @staticmethod
+    def _range_epoch(value, end=False):
+        """
+        Convert a range boundary to epoch seconds. A date without a time as the
+        end of a range includes that whole day.
+        
+        Args:
+            value (datetime or str): Boundary (ISO format if str)
+            end (bool, optional): Whether this is the end of the range
+            
+        Returns:
+            int: Epoch seconds, exclusive if end is True
+        """
+        return to_epoch(SQLiteManager._range_datetime(value, end))
+    
+    @staticmethod
+    def _range_datetime(value, end=False):
+        """
+        Convert a range boundary to a datetime, as for _range_epoch.
+        
+        Args:
+            value (datetime or str): Boundary (ISO format if str)
+            end (bool, optional): Whether this is the end of the range
+            
+        Returns:
+            datetime: Boundary, exclusive if end is True
+        """
+        if isinstance(value, str):
+            date_only = len(value) == 10
+            value = datetime.fromisoformat(value)
+            if end and date_only:
+                value += timedelta(days=1)
+        return value
+    
+    @staticmethod
+    def encode_cursor(row):
+        """
+        Build the page cursor that continues after a row.
+        
+        Args:
+            row (dict): Last row of a page
+            
+        Returns:
+            str: Opaque cursor string
+        """
+        return f"{row['ts_epoch']}-{row['id']}"
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Split a page cursor into its epoch and row id.
+        
+        Args:
+            cursor (str): Cursor from encode_cursor
+            
+        Returns:
+            tuple: (ts_epoch, id)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        epoch, _, row_id = cursor.partition('-')
+        return int(epoch), int(row_id)
+    
+    def _fetch_page(self, table, conditions, params, cursor=None, limit=50):
+        """
+        Fetch one page of rows, newest first, continuing after a cursor.
+        
+        Pages are keyed on (ts_epoch, id) so each page is an index range scan
+        no matter how deep into the history it is.
+        
+        Args:
+            table (str): Table to read
+            conditions (list): SQL filter conditions joined with AND
+            params (list): Parameters for the conditions
+            cursor (str, optional): Cursor returned with the previous page
+            limit (int, optional): Maximum number of rows on the page
+            
+        Returns:
+            tuple: (rows, next_cursor), next_cursor is None on the last page
+        """
+        conditions = list(conditions)
+        params = list(params)
+        if cursor:
+            conditions.append('(ts_epoch, id) < (?, ?)')
+            params.extend(self.decode_cursor(cursor))
+        
+        query = f'SELECT * FROM {table}'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY ts_epoch DESC, id DESC LIMIT ?'
+        params.append(limit + 1)  # One extra row tells us whether there is a next page
+        
+        rows = self._fetch_dicts(query, tuple(params))
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, self.encode_cursor(rows[-1])
+        return rows, None
+    
+    def get_print_jobs_page(self, cursor=None, limit=50, start=None, end=None,
+                            is_colored=None, success=None, min_amount=None, max_amount=None):
+        """
+        Get one page of print jobs, newest first, with optional filters.
+        
+        Args:
+            cursor (str, optional): Cursor returned with the previous page
+            limit (int, optional): Maximum number of records to return
+            start (datetime or str, optional): Earliest timestamp (ISO format if str)
+            end (datetime or str, optional): Latest timestamp, exclusive; a plain
+                date includes that whole day
+            is_colored (bool, optional): Only color or only B&W jobs
+            success (bool, optional): Only successful or only failed jobs
+            min_amount (float, optional): Minimum amount paid
+            max_amount (float, optional): Maximum amount paid
+            
+        Returns:
+            tuple: (list of print job records, next page cursor or None)
+        """
+        conditions = []
+        params = []
+        
+        if start:
+            conditions.append('ts_epoch >= ?')
+            params.append(self._range_epoch(start))
+        if end:
+            conditions.append('ts_epoch < ?')
+            params.append(self._range_epoch(end, end=True))
+        if is_colored is not None:
+            conditions.append('is_colored = ?')
+            params.append(1 if is_colored else 0)
+        if success is not None:
+            conditions.append('success = ?')
+            params.append(1 if success else 0)
+        if min_amount is not None:
+            conditions.append('amount_paid >= ?')
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append('amount_paid <= ?')
+            params.append(max_amount)
+        
+        try:
+            return self._fetch_page('print_jobs', conditions, params, cursor, limit)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error in get_print_jobs_page: {e}")
+            return [], None
+    
+    def iter_rows(self, table, columns, start=None, end=None, chunk_size=500):
+        """
+        Read a table in chunks, oldest first, for exports that must not load
+        the whole table into memory.
+        
+        Each chunk is a separate short query continuing after the last id, so
+        no read transaction is held open while the caller writes the output.
+        
+        Args:
+            table (str): Table to read
+            columns (list): Columns to select
+            start (datetime or str, optional): Earliest timestamp (ISO format if str)
+            end (datetime or str, optional): Latest timestamp, exclusive; a plain
+                date includes that whole day
+            chunk_size (int, optional): Maximum rows per chunk
+            
+        Yields:
+            list: Chunk of row dictionaries
+        """
+        conditions = ['id > ?']
+        params = []
+        if start:
+            conditions.append('ts_epoch >= ?')
+            params.append(self._range_epoch(start))
+        if end:
+            conditions.append('ts_epoch < ?')
+            params.append(self._range_epoch(end, end=True))
+        
+        query = (f"SELECT {', '.join(columns)} FROM {table} WHERE "
+                 + ' AND '.join(conditions) + ' ORDER BY id LIMIT ?')
+        
+        last_id = 0
+        while True:
+            rows = self._fetch_dicts(query, (last_id, *params, chunk_size))
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1]['id']
+    
+    def get_payments_page(self, cursor=None, limit=50, start=None, end=None,
+                          min_amount=None, max_amount=None):
+        """
+        Get one page of payment transactions, newest first, with optional filters.
+        
+        Args:
+            cursor (str, optional): Cursor returned with the previous page
+            limit (int, optional): Maximum number of records to return
+            start (datetime or str, optional): Earliest timestamp (ISO format if str)
+            end (datetime or str, optional): Latest timestamp, exclusive; a plain
+                date includes that whole day
+            min_amount (float, optional): Minimum amount
+            max_amount (float, optional): Maximum amount
+            
+        Returns:
+            tuple: (list of payment records, next page cursor or None)
+        """
+        conditions = []
+        params = []
+        
+        if start:
+            conditions.append('ts_epoch >= ?')
+            params.append(self._range_epoch(start))
+        if end:
+            conditions.append('ts_epoch < ?')
+            params.append(self._range_epoch(end, end=True))
+        if min_amount is not None:
+            conditions.append('amount >= ?')
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append('amount <= ?')
+            params.append(max_amount)
+        
+        try:
+            return self._fetch_page('payment_transactions', conditions, params, cursor, limit)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error in get_payments_page: {e}")
+            return [], None
+    
+    def get_period_stats(self, granularity='day', start=None, end=None, days=30):
+        """
+        Get revenue, page and job statistics per period, with periods that had
+        no activity filled with zeros.
+        
+        Args:
+            granularity (str, optional): 'hour', 'day', 'week' or 'month'
+            start (datetime or str, optional): Start of the range (ISO format if str).
+                Defaults to `days` before the end.
+            end (datetime or str, optional): End of the range, exclusive (ISO format
+                if str). A date without a time includes that whole day, as in
+                get_print_jobs_page. Defaults to now.
+            days (int, optional): Length of the range when no start is given
+            
+        Returns:
+            list: PeriodStats rows in chronological order, empty if failed
+        """
+        if granularity not in stats_rollups.GRANULARITIES:
+            print(f"Unknown statistics granularity: {granularity}")
+            return []
+        
+        end = self._range_datetime(end, end=True) if end else datetime.now()
+        start = self._range_datetime(start) if start else end - timedelta(days=days)
+        
+        if start >= end:
+            return []
+        
+        params = {
+            'first': to_epoch(stats_rollups.period_start(start, granularity)),
+            'until': to_epoch(end)
+        }
+        
+        try:
+            cursor = self.pool.reader().execute(stats_rollups.period_stats_query(granularity), params)
+            return [stats_rollups.PeriodStats(*row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"SQLite error in get_period_stats: {e}")
+            return []
     
     def get_daily_stats(self, days=30):
         """
@@ -497,66 +1527,33 @@ class SQLiteManager:
         Returns:
             dict: Dictionary with daily statistics
         """
-        with self.lock:
-            try:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    
-                    # Get daily revenue
-                    cursor.execute('''
-                    SELECT 
-                        date(timestamp) as day,
-                        SUM(amount) as revenue
-                    FROM payment_transactions
-                    WHERE timestamp >= date('now', ?)
-                    GROUP BY day
-                    ORDER BY day
-                    ''', (f'-{days} days',))
-                    
-                    revenue_data = {row['day']: row['revenue'] for row in cursor.fetchall()}
-                    
-                    # Get daily pages printed
-                    cursor.execute('''
-                    SELECT 
-                        date(timestamp) as day,
-                        SUM(pages * copies) as pages
-                    FROM print_jobs
-                    WHERE success = 1 AND timestamp >= date('now', ?)
-                    GROUP BY day
-                    ORDER BY day
-                    ''', (f'-{days} days',))
-                    
-                    pages_data = {row['day']: row['pages'] for row in cursor.fetchall()}
-                    
-                    # Get daily print jobs count
-                    cursor.execute('''
-                    SELECT 
-                        date(timestamp) as day,
-                        COUNT(*) as jobs
-                    FROM print_jobs
-                    WHERE success = 1 AND timestamp >= date('now', ?)
-                    GROUP BY day
-                    ORDER BY day
-                    ''', (f'-{days} days',))
-                    
-                    jobs_data = {row['day']: row['jobs'] for row in cursor.fetchall()}
-                    
-                    # Combine all data
-                    result = {}
-                    all_days = set(revenue_data.keys()) | set(pages_data.keys()) | set(jobs_data.keys())
-                    
-                    for day in sorted(all_days):
-                        result[day] = {
-                            'revenue': revenue_data.get(day, 0),
-                            'pages': pages_data.get(day, 0),
-                            'jobs': jobs_data.get(day, 0)
-                        }
-                    
-                    return result
-            except sqlite3.Error as e:
-                print(f"SQLite error in get_daily_stats: {e}")
-                return {}
+        return {
+            row.period: {
+                'revenue': row.revenue,
+                'pages': row.pages,
+                'jobs': row.jobs
+            }
+            for row in self.get_period_stats('day', days=days)
+        }
+    
+    def rebuild_rollups(self):
+        """
+        Recompute the hourly and daily rollup tables from the raw print job
+        and payment history, e.g. after restoring or editing old records.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        # Queued rows must be in the raw tables before they are counted
+        self.flush()
+        
+        try:
+            with self.pool.write() as conn:
+                stats_rollups.rebuild_rollups(conn.cursor())
+            return True
+        except sqlite3.Error as e:
+            print(f"SQLite error in rebuild_rollups: {e}")
+            return False
     
     def verify_admin_pattern(self, input_pattern):
         """
@@ -590,12 +1587,14 @@ class SQLiteManager:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_path = backup_dir / f'pisoprint_backup_{timestamp}.db'
         
+        # Include rows still waiting in the write-behind queue
+        self.flush()
+        
         with self.lock:
             try:
                 # Create backup using SQLite's backup API
-                with sqlite3.connect(self.db_path) as source_conn:
-                    with sqlite3.connect(str(backup_path)) as target_conn:
-                        source_conn.backup(target_conn)
+                with sqlite3.connect(str(backup_path)) as target_conn:
+                    self.pool.writer().backup(target_conn)
                 
                 # Log the backup
                 self.log_admin_access("Database backup", f"Backup created at {backup_path}")
@@ -0,0 +1,86 @@
+"""
+Startup profiling for the PisoPrint Vendo system.
+Records how long each boot phase takes and on which thread, so slow starts
+on the kiosk can be traced to the database, the GUI, the printer, the Arduino
+or the web monitor.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """Collects timings for named boot phases, from any thread"""
+
+    def __init__(self, origin=None):
+        """
+        Initialize the profiler.
+
+        Args:
+            origin (float, optional): time.perf_counter() value that offsets
+                are measured from. Defaults to now.
+        """
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a block of code as a boot phase.
+
+        Args:
+            name (str): Phase name
+        """
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(name, start, time.perf_counter() - start, ok)
+
+    def mark(self, name):
+        """
+        Record an instant, e.g. when the first screen is drawn.
+
+        Args:
+            name (str): Event name
+        """
+        self._record(name, time.perf_counter(), None, True)
+
+    def _record(self, name, start, duration, ok):
+        """Store one phase or mark."""
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "offset": start - self.origin,
+                "duration": duration,
+                "thread": threading.current_thread().name,
+                "ok": ok,
+            })
+
+    def elapsed(self):
+        """
+        Get the seconds since the origin.
+
+        Returns:
+            float: Elapsed seconds
+        """
+        return time.perf_counter() - self.origin
+
+    def report(self):
+        """
+        Format the recorded phases as a table, in start order.
+
+        Returns:
+            str: Report text
+        """
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase["offset"])
+
+        lines = [f"{'start':>8}  {'duration':>8}  {'phase':<24}  thread"]
+        for phase in phases:
+            duration = "" if phase["duration"] is None else f"{phase['duration']:.3f}s"
+            name = phase["name"] if phase["ok"] else f"{phase['name']} (failed)"
+            lines.append(f"{phase['offset']:>7.3f}s  {duration:>8}  {name:<24}  {phase['thread']}")
+        return "\n".join(lines)
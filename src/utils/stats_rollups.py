@@ -0,0 +1,195 @@
+"""
+Pre-aggregated hourly and daily statistics for the PisoPrint Vendo database.
+Rollup rows are kept up to date by triggers as jobs and payments are logged,
+so dashboard totals read a handful of rows instead of the whole history.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+# Rollup tables and the width of their buckets in seconds
+ROLLUP_TABLES = {
+    'stats_hourly': 3600,
+    'stats_daily': 86400,
+}
+
+# Rollup table, period label format and next-period expression per granularity
+GRANULARITIES = {
+    'hour': ('stats_hourly', '%Y-%m-%d %H:00', "{} + 3600"),
+    'day': ('stats_daily', '%Y-%m-%d', "{} + 86400"),
+    'week': ('stats_daily', '%Y-%m-%d', "{} + 604800"),
+    'month': ('stats_daily', '%Y-%m', "CAST(strftime('%s', {}, 'unixepoch', '+1 month') AS INTEGER)"),
+}
+
+# One row of period statistics; start and end are epoch seconds, end exclusive
+PeriodStats = namedtuple('PeriodStats', [
+    'period', 'start', 'end', 'revenue', 'payments', 'jobs', 'pages',
+    'color_jobs', 'color_pages', 'bw_jobs', 'bw_pages'
+])
+
+def period_start(value, granularity):
+    """
+    Round a local timestamp down to the start of its period.
+
+    Args:
+        value (datetime): Timestamp to round
+        granularity (str): 'hour', 'day', 'week' or 'month'
+
+    Returns:
+        datetime: Start of the period containing value
+    """
+    start = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return start
+    start = start.replace(hour=0)
+    if granularity == 'week':
+        return start - timedelta(days=start.weekday())  # Weeks start on Monday
+    if granularity == 'month':
+        return start.replace(day=1)
+    return start
+
+def period_stats_query(granularity):
+    """
+    Build the query that returns zero-filled statistics for every period in a
+    range in a single pass over the rollup table.
+
+    The query takes the named parameters :first (epoch start of the first
+    period) and :until (epoch end of the range, exclusive).
+
+    Args:
+        granularity (str): 'hour', 'day', 'week' or 'month'
+
+    Returns:
+        str: SQL query
+    """
+    table, label, step = GRANULARITIES[granularity]
+    return f'''
+    WITH RECURSIVE periods(start, stop) AS (
+        SELECT :first, {step.format(':first')}
+        UNION ALL
+        SELECT stop, {step.format('stop')} FROM periods WHERE stop < :until
+    )
+    SELECT
+        strftime('{label}', p.start, 'unixepoch') AS period,
+        p.start,
+        p.stop,
+        COALESCE(SUM(r.revenue), 0),
+        COALESCE(SUM(r.payments), 0),
+        COALESCE(SUM(r.jobs), 0),
+        COALESCE(SUM(r.pages), 0),
+        COALESCE(SUM(r.color_jobs), 0),
+        COALESCE(SUM(r.color_pages), 0),
+        COALESCE(SUM(r.bw_jobs), 0),
+        COALESCE(SUM(r.bw_pages), 0)
+    FROM periods p
+    LEFT JOIN {table} r ON r.bucket >= p.start AND r.bucket < p.stop
+    GROUP BY p.start
+    ORDER BY p.start
+    '''
+
+# Epoch of a row, falling back to its timestamp for rows written without ts_epoch;
+# the triggers and rebuild_rollups must bucket rows the same way
+_EPOCH = "COALESCE({0}ts_epoch, CAST(strftime('%s', {0}timestamp) AS INTEGER))"
+_ROW_EPOCH = _EPOCH.format("NEW.")
+
+def create_rollups(cursor):
+    """
+    Create the rollup tables and the triggers that maintain them.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+    for table, width in ROLLUP_TABLES.items():
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket INTEGER PRIMARY KEY,
+            revenue REAL NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            jobs INTEGER NOT NULL DEFAULT 0,
+            pages INTEGER NOT NULL DEFAULT 0,
+            color_jobs INTEGER NOT NULL DEFAULT 0,
+            color_pages INTEGER NOT NULL DEFAULT 0,
+            bw_jobs INTEGER NOT NULL DEFAULT 0,
+            bw_pages INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+
+        bucket = f"({_ROW_EPOCH} / {width}) * {width}"
+
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_payment
+        AFTER INSERT ON payment_transactions
+        BEGIN
+            INSERT INTO {table} (bucket, revenue, payments)
+            VALUES ({bucket}, COALESCE(NEW.amount, 0), 1)
+            ON CONFLICT (bucket) DO UPDATE SET
+                revenue = revenue + excluded.revenue,
+                payments = payments + 1;
+        END
+        ''')
+
+        # Only successful jobs count towards pages and jobs, as in the dashboard
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_print_job
+        AFTER INSERT ON print_jobs
+        WHEN NEW.success
+        BEGIN
+            INSERT INTO {table} (bucket, jobs, pages, color_jobs, color_pages, bw_jobs, bw_pages)
+            VALUES (
+                {bucket},
+                1,
+                NEW.pages * NEW.copies,
+                CASE WHEN NEW.is_colored THEN 1 ELSE 0 END,
+                CASE WHEN NEW.is_colored THEN NEW.pages * NEW.copies ELSE 0 END,
+                CASE WHEN NEW.is_colored THEN 0 ELSE 1 END,
+                CASE WHEN NEW.is_colored THEN 0 ELSE NEW.pages * NEW.copies END
+            )
+            ON CONFLICT (bucket) DO UPDATE SET
+                jobs = jobs + 1,
+                pages = pages + excluded.pages,
+                color_jobs = color_jobs + excluded.color_jobs,
+                color_pages = color_pages + excluded.color_pages,
+                bw_jobs = bw_jobs + excluded.bw_jobs,
+                bw_pages = bw_pages + excluded.bw_pages;
+        END
+        ''')
+
+def rebuild_rollups(cursor):
+    """
+    Recompute every rollup row from the raw print job and payment tables.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor inside a write transaction
+    """
+    epoch = _EPOCH.format("")
+    for table, width in ROLLUP_TABLES.items():
+        cursor.execute(f"DELETE FROM {table}")
+
+        cursor.execute(f'''
+        INSERT INTO {table} (bucket, revenue, payments)
+        SELECT ({epoch} / {width}) * {width} AS bucket, SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM payment_transactions
+        WHERE {epoch} IS NOT NULL
+        GROUP BY bucket
+        ''')
+
+        cursor.execute(f'''
+        INSERT INTO {table} (bucket, jobs, pages, color_jobs, color_pages, bw_jobs, bw_pages)
+        SELECT
+            ({epoch} / {width}) * {width} AS bucket,
+            COUNT(*),
+            SUM(pages * copies),
+            SUM(CASE WHEN is_colored THEN 1 ELSE 0 END),
+            SUM(CASE WHEN is_colored THEN pages * copies ELSE 0 END),
+            SUM(CASE WHEN is_colored THEN 0 ELSE 1 END),
+            SUM(CASE WHEN is_colored THEN 0 ELSE pages * copies END)
+        FROM print_jobs
+        WHERE success AND {epoch} IS NOT NULL
+        GROUP BY bucket
+        ON CONFLICT (bucket) DO UPDATE SET
+            jobs = excluded.jobs,
+            pages = excluded.pages,
+            color_jobs = excluded.color_jobs,
+            color_pages = excluded.color_pages,
+            bw_jobs = excluded.bw_jobs,
+            bw_pages = excluded.bw_pages
+        ''')
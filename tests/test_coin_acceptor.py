@@ -1,34 +1,53 @@
 """
 Tests for the CoinAcceptor class.
 """
+import queue
+import threading
+import time
 import pytest
-import serial
 from unittest.mock import MagicMock, patch
 from src.utils.coin_acceptor import CoinAcceptor
 from src.config import COIN_VALUES
 
 class MockSerial:
-    """Mock serial port for testing"""
+    """Mock serial port for testing, with the blocking read of a real one"""
     def __init__(self, *args, **kwargs):
         self.is_open = True
-        self.in_waiting = 0
-        self._buffer = []
+        self.timeout = 0.1
+        self._buffer = bytearray()
+        self._ready = threading.Condition()
+        
+    @property
+    def in_waiting(self):
+        return len(self._buffer)
         
     def close(self):
+        self.cancel_read()
         self.is_open = False
         
-    def readline(self):
-        if self._buffer:
-            return self._buffer.pop(0)
-        return b""
+    def cancel_read(self):
+        with self._ready:
+            self._ready.notify_all()
+        
+    def read(self, size=1):
+        with self._ready:
+            self._ready.wait_for(lambda: self._buffer or not self.is_open, timeout=self.timeout)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            return data
         
     def write(self, data):
         pass
         
+    def feed(self, data):
+        """Make bytes available to read"""
+        with self._ready:
+            self._buffer.extend(data)
+            self._ready.notify_all()
+        
     def simulate_coin(self, pulse_count):
         """Add a coin detection to the buffer"""
-        self._buffer.append(f"COIN:{pulse_count}\n".encode())
-        self.in_waiting = len(self._buffer[0])
+        self.feed(f"COIN:{pulse_count}\n".encode())
 
 @pytest.fixture
 def mock_serial():
@@ -38,10 +57,13 @@ def mock_serial():
 @pytest.fixture
 def coin_acceptor(mock_serial):
     """Create a CoinAcceptor with mock serial port"""
-    with patch('serial.Serial', return_value=mock_serial):
+    with patch('serial.Serial', return_value=mock_serial), \
+         patch('src.utils.coin_acceptor.time.sleep'):
         acceptor = CoinAcceptor(port="MOCK", baudrate=9600)
         acceptor.connect()
-        return acceptor, mock_serial
+    yield acceptor, mock_serial
+    acceptor.disconnect()
+    acceptor._coin_thread.join(2)
 
 def test_initialization():
     """Test CoinAcceptor initialization"""
@@ -73,37 +95,55 @@ def test_coin_detection(coin_acceptor):
     """Test coin detection and callback"""
     acceptor, mock_serial = coin_acceptor
     
-    # Create a mock callback
-    mock_callback = MagicMock()
-    acceptor.set_callback(mock_callback)
+    values = queue.Queue()
+    acceptor.set_callback(values.put)
     
-    # Simulate coin detection events
+    # Simulate coin detection events; the reader thread credits each one
     for pulse, expected_value in COIN_VALUES.items():
-        mock_callback.reset_mock()
         mock_serial.simulate_coin(pulse)
-        
-        # Manually trigger the coin reading process
-        acceptor._read_coins()
-        
-        # Verify callback was called with correct value
-        mock_callback.assert_called_once_with(expected_value)
+        assert values.get(timeout=2) == expected_value
 
 def test_invalid_pulse(coin_acceptor):
     """Test handling of invalid pulse count"""
     acceptor, mock_serial = coin_acceptor
     
-    # Create a mock callback
-    mock_callback = MagicMock()
-    acceptor.set_callback(mock_callback)
+    values = queue.Queue()
+    acceptor.set_callback(values.put)
     
-    # Simulate invalid coin detection
+    # Simulate an invalid coin detection, then a valid one
     mock_serial.simulate_coin(99)  # Invalid pulse count
+    mock_serial.simulate_coin(1)
     
-    # Manually trigger the coin reading process
-    acceptor._read_coins()
+    # Only the valid coin reaches the callback
+    assert values.get(timeout=2) == COIN_VALUES[1]
+    assert values.empty()
+
+def test_coin_lines_split_across_reads():
+    """Test that coin lines arriving in pieces are parsed and credited once complete"""
+    port = MockSerial()
+    acceptor = CoinAcceptor(port="MOCK", baudrate=9600)
+    acceptor.serial = port
+    acceptor.running = True
     
-    # Verify callback was not called
-    mock_callback.assert_not_called()
+    values = queue.Queue()
+    acceptor.set_callback(values.put)
+    thread = threading.Thread(target=acceptor._read_coins, daemon=True)
+    thread.start()
+    try:
+        port.feed(b"CO")
+        port.feed(b"IN:")
+        time.sleep(0.05)  # Let the reader take the partial line
+        assert values.empty()
+        
+        port.feed(b"2\r\nNOISE\nCOIN:")
+        assert values.get(timeout=2) == COIN_VALUES[2]
+        port.feed(b"4\n")
+        assert values.get(timeout=2) == COIN_VALUES[4]
+        assert values.empty()
+    finally:
+        acceptor.disconnect()
+        thread.join(2)
+    assert not thread.is_alive()
 
 def test_test_coin_insertion(coin_acceptor):
     """Test the coin insertion simulation feature"""
@@ -0,0 +1,53 @@
+"""
+Tests for the streaming data export.
+"""
+import csv
+import gzip
+import json
+import pytest
+from src.utils.data_export import export_to_file, gzip_stream, iter_export
+from src.utils.sqlite_manager import SQLiteManager
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager with a few logged print jobs"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    for i in range(5):
+        manager.log_print_job(f"doc{i}.pdf", i + 1, 1, i % 2 == 1, 3 * (i + 1), True)
+    yield manager
+    manager.close()
+
+def test_csv_export_to_file(db, tmp_path):
+    """Test that every row is written with a header"""
+    path = tmp_path / "jobs.csv"
+    progress = []
+    count = export_to_file(db, path, 'print_jobs', 'csv', chunk_size=2, progress_callback=progress.append)
+
+    assert count == 5
+    assert progress == [2, 4, 5]
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['filename'] for row in rows] == [f"doc{i}.pdf" for i in range(5)]
+
+def test_ndjson_gzip_export(db, tmp_path):
+    """Test a compressed NDJSON export"""
+    path = tmp_path / "jobs.ndjson.gz"
+    export_to_file(db, path, 'print_jobs', 'ndjson', compress=True)
+
+    with gzip.open(path, 'rt') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 5
+    assert records[0]['pages'] == 1
+
+def test_streamed_export_is_chunked(db):
+    """Test that the export is generated one chunk at a time"""
+    pieces = list(iter_export(db, 'print_jobs', 'csv', chunk_size=2))
+    assert len(pieces) == 4  # Header plus three chunks
+
+    decompressed = gzip.decompress(b''.join(gzip_stream(pieces))).decode('utf-8')
+    assert decompressed == ''.join(pieces)
+
+def test_unknown_dataset_rejected(db):
+    """Test that only known datasets can be exported"""
+    with pytest.raises(ValueError):
+        list(iter_export(db, 'users'))
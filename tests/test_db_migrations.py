@@ -0,0 +1,68 @@
+"""
+Tests for the database schema migrations.
+"""
+import sqlite3
+import pytest
+from src.utils.db_migrations import MIGRATIONS, apply_migrations, get_schema_version, to_epoch
+from src.utils.sqlite_manager import SQLiteManager
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def index_names(db, table):
+    """Get the names of the indexes on a table"""
+    rows = db.execute_query(f"PRAGMA index_list({table})", fetch_all=True)
+    return {row[1] for row in rows}
+
+def test_new_database_is_at_latest_version(db):
+    """Test that a fresh database gets every migration"""
+    assert get_schema_version(db.pool.reader()) == LATEST_VERSION
+
+def test_indexes_created(db):
+    """Test that the dashboard columns are indexed"""
+    assert 'idx_print_jobs_success_timestamp' in index_names(db, 'print_jobs')
+    assert 'idx_system_stats_type_epoch' in index_names(db, 'system_stats')
+    assert 'idx_payment_transactions_epoch' in index_names(db, 'payment_transactions')
+
+def test_migrations_are_idempotent(db):
+    """Test that re-running the migrations applies nothing"""
+    with db.pool.write() as conn:
+        assert apply_migrations(conn) == []
+    assert get_schema_version(db.pool.reader()) == LATEST_VERSION
+
+def test_existing_rows_backfilled(tmp_path):
+    """Test that a database from before the migrations gets epoch columns filled in"""
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE print_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TIMESTAMP, filename TEXT,
+        pages INTEGER, copies INTEGER, is_colored BOOLEAN, amount_paid REAL, success BOOLEAN
+    )
+    ''')
+    conn.execute(
+        "INSERT INTO print_jobs (timestamp, filename, pages, copies, is_colored, amount_paid, success) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ("2024-05-01T08:30:00.123456", "old.pdf", 1, 1, 0, 3, 1)
+    )
+    conn.commit()
+    conn.close()
+
+    manager = SQLiteManager(path)
+    try:
+        epoch = manager.execute_query("SELECT ts_epoch FROM print_jobs", fetch_one=True)[0]
+        assert epoch == to_epoch("2024-05-01T08:30:00")
+    finally:
+        manager.close()
+
+def test_new_rows_get_epoch(db):
+    """Test that logged rows carry an epoch timestamp"""
+    db.log_system_stat("paper_low", 10)
+    assert db.flush(timeout=5)
+    row = db.execute_query("SELECT timestamp, ts_epoch FROM system_stats", fetch_one=True)
+    assert row[1] == to_epoch(row[0])
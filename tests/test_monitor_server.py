@@ -0,0 +1,32 @@
+"""
+Tests for the web monitor serving modes.
+"""
+import subprocess
+import sys
+import pytest
+from src.monitor import server
+from src.monitor.server import MonitorProcess, create_monitor
+
+def test_unknown_mode_rejected():
+    """Test that an unknown serving mode is refused before anything starts"""
+    with pytest.raises(ValueError):
+        create_monitor('gunicorn')
+
+def test_process_mode_needs_no_app():
+    """Test that process mode does not build the Flask app in the kiosk process"""
+    monitor = create_monitor('process', port=5099)
+    assert isinstance(monitor, MonitorProcess)
+    assert not monitor.is_alive()
+
+def test_monitor_process_stops(monkeypatch):
+    """Test that stopping the monitor process ends it"""
+    popen = subprocess.Popen
+    monkeypatch.setattr(server.subprocess, "Popen", lambda command, **kwargs: popen(
+        [sys.executable, "-c", "import time; time.sleep(60)"], **kwargs))
+    
+    monitor = MonitorProcess(port=5099)
+    monitor.start()
+    assert monitor.is_alive()
+    
+    monitor.stop(timeout=5)
+    assert not monitor.is_alive()
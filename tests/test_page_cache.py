@@ -0,0 +1,136 @@
+"""
+Tests for the preview page cache.
+"""
+import queue
+import fitz
+import pytest
+from src.utils import page_cache
+from src.utils.page_cache import PageImageCache, PagePrefetcher, fit_size, render_page
+
+def test_fit_size_keeps_aspect_ratio():
+    """Test that tall pages are limited by height and wide pages by width"""
+    assert fit_size(595, 842, 700, 320) == (226, 320)
+    assert fit_size(842, 595, 700, 320) == (700, 494)
+    # Small pages are not enlarged
+    assert fit_size(100, 200, 700, 320) == (100, 200)
+
+def test_page_rendered_at_display_size():
+    """Test that a page is rendered straight to its display size"""
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    pix = render_page(doc, 0, (700, 320))
+    assert (pix.width, pix.height) == (226, 320)
+    assert pix.n == 3  # RGB without alpha
+    doc.close()
+
+def test_least_recently_used_evicted():
+    """Test that the cache stays within its memory budget"""
+    cache = PageImageCache(max_bytes=300)
+    cache.put(("doc", 0, (1, 1)), "page 1", 100)
+    cache.put(("doc", 1, (1, 1)), "page 2", 100)
+    cache.put(("doc", 2, (1, 1)), "page 3", 100)
+    
+    # Using page 1 makes page 2 the oldest
+    assert cache.get(("doc", 0, (1, 1))) == "page 1"
+    cache.put(("doc", 3, (1, 1)), "page 4", 100)
+    
+    assert ("doc", 1, (1, 1)) not in cache
+    assert len(cache) == 3 and cache.size_bytes == 300
+
+def test_oversized_image_kept():
+    """Test that an image bigger than the budget still replaces the others"""
+    cache = PageImageCache(max_bytes=100)
+    cache.put(("doc", 0, (1, 1)), "small", 50)
+    cache.put(("doc", 1, (1, 1)), "huge", 500)
+    
+    assert len(cache) == 1 and cache.get(("doc", 1, (1, 1))) == "huge"
+
+def test_clear_one_document():
+    """Test that clearing a document keeps other documents' pages"""
+    cache = PageImageCache()
+    cache.put(("a", 0, (1, 1)), "a1", 10)
+    cache.put(("b", 0, (1, 1)), "b1", 10)
+    cache.clear("a")
+    
+    assert ("a", 0, (1, 1)) not in cache and ("b", 0, (1, 1)) in cache
+    assert cache.size_bytes == 10
+
+class Dispatcher:
+    """Collects functions meant for the Tk thread so the test can run them"""
+    
+    def __init__(self):
+        self.calls = queue.Queue()
+        
+    def __call__(self, fn):
+        self.calls.put(fn)
+        
+    def run(self, count, timeout=5):
+        for _ in range(count):
+            self.calls.get(timeout=timeout)()
+
+@pytest.fixture
+def pdf(tmp_path):
+    """Write a five page PDF"""
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for _ in range(5):
+        doc.new_page(width=595, height=842)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+@pytest.fixture
+def prefetcher(monkeypatch):
+    """Create a prefetcher that caches pixmaps, since tests have no display"""
+    monkeypatch.setattr(page_cache, "to_photo_image", lambda pixmap: pixmap)
+    dispatcher = Dispatcher()
+    prefetcher = PagePrefetcher(PageImageCache(), dispatcher, (700, 320))
+    prefetcher.dispatcher = dispatcher
+    yield prefetcher
+    prefetcher.stop(5)
+
+def test_pages_prefetched_into_cache(prefetcher, pdf):
+    """Test that prefetched pages end up in the cache"""
+    prefetcher.open(pdf, "hash")
+    prefetcher.prefetch([0, 1, 2])
+    prefetcher.dispatcher.run(3)
+    
+    for page_number in (0, 1, 2):
+        assert prefetcher.key(page_number) in prefetcher.cache
+    assert prefetcher.cache.get(prefetcher.key(0)).width == 226
+
+def test_fetch_calls_back_when_rendered(prefetcher, pdf):
+    """Test that a page that is not cached is delivered to the callback"""
+    prefetcher.open(pdf, "hash")
+    delivered = []
+    assert prefetcher.fetch(3, lambda n, image: delivered.append(n)) is None
+    prefetcher.dispatcher.run(1)
+    
+    assert delivered == [3]
+    assert prefetcher.fetch(3, lambda n, image: delivered.append(n)) is not None
+
+def test_evicted_page_rendered_again(prefetcher, pdf):
+    """Test that a page dropped from the cache after rendering is queued again"""
+    prefetcher.open(pdf, "hash")
+    prefetcher.fetch(3, lambda n, image: None)
+    prefetcher.dispatcher.run(1)
+    prefetcher.cache.clear()
+    
+    delivered = []
+    assert prefetcher.fetch(3, lambda n, image: delivered.append(n)) is None
+    prefetcher.dispatcher.run(1)
+    assert delivered == [3]
+
+def test_cancelled_pages_not_delivered(prefetcher, pdf):
+    """Test that pages of a closed document never reach the cache"""
+    prefetcher.open(pdf, "hash")
+    delivered = []
+    prefetcher.fetch(0, lambda n, image: delivered.append(n))
+    prefetcher.cancel()
+    
+    # A render that was already running is still dispatched, then dropped
+    try:
+        prefetcher.dispatcher.run(1, timeout=0.5)
+    except queue.Empty:
+        pass
+    assert delivered == [] and len(prefetcher.cache) == 0
@@ -0,0 +1,101 @@
+"""
+Tests for the print backends.
+"""
+import subprocess
+import pytest
+from src.utils import print_backends
+from src.utils.print_backends import CupsPrinter, FakePrinter, create_printer
+
+class FakeRun:
+    """Stands in for subprocess.run and records the commands"""
+    
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+        
+    def __call__(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        stdout, returncode = self.outputs.get(cmd[0] + " " + cmd[1], ("", 0))
+        return subprocess.CompletedProcess(cmd, returncode, stdout=stdout, stderr="")
+
+@pytest.fixture
+def lp(monkeypatch):
+    """Replace the CUPS commands with canned output"""
+    run = FakeRun({
+        "lpstat -d": ("system default destination: Epson_L121\n", 0),
+        "lpstat -p": ("printer Epson_L121 is idle.  enabled since Mon\nprinter Office disabled since Tue\n", 0),
+        "lp -d": ("request id is Epson_L121-12 (1 file(s))\n", 0),
+    })
+    monkeypatch.setattr(subprocess, "run", run)
+    return run
+
+def test_pdf_printer_imports_without_windows():
+    """Test that the SumatraPDF backend module imports on any platform"""
+    import src.utils.pdf_printer
+    assert src.utils.pdf_printer.PDFPrinter
+
+def test_cups_uses_default_destination(lp):
+    """Test that the CUPS default printer is used when none is configured"""
+    assert CupsPrinter().printer_name == "Epson_L121"
+
+def test_cups_print_command(lp, tmp_path):
+    """Test that print settings are translated to lp options"""
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    printer = CupsPrinter("Epson_L121")
+    
+    assert printer.print_pdf(str(pdf), 2, {'range': '1-3', 'scale': 'fit', 'duplex': True})
+    assert lp.commands[-1] == [
+        "lp", "-d", "Epson_L121", "-n", "2",
+        "-o", "page-ranges=1-3", "-o", "fit-to-page", "-o", "sides=two-sided-long-edge",
+        str(pdf)
+    ]
+
+def test_cups_status_parsing():
+    """Test that lpstat output is decoded into status bits"""
+    ready = CupsPrinter.parse_status("printer Epson_L121 is idle.  enabled since Mon\n")
+    assert ready["ready"]
+    
+    jammed = CupsPrinter.parse_status(
+        "printer Epson_L121 disabled since Mon -\n\tAlerts: media-jam-error offline-report\n")
+    assert not jammed["ready"]
+    assert jammed["details"] == {"paused": True, "paper_jam": True}
+
+def test_cups_status_ignores_reports_and_warnings():
+    """Test that informational alerts and the printer description are not faults"""
+    status = CupsPrinter.parse_status(
+        "printer Offline_Paused is idle.  enabled since Mon\n"
+        "\tDescription: media-empty backup printer\n"
+        "\tAlerts: offline-report media-empty-warning marker-supply-empty-warning\n")
+    assert status["ready"]
+    assert not status["details"]
+
+def test_cups_lists_printers(lp):
+    """Test that CUPS destinations are listed"""
+    assert CupsPrinter("Epson_L121").list_available_printers() == ["Epson_L121", "Office"]
+
+def test_fake_printer_records_jobs():
+    """Test that the fake spooler records jobs and reports its status"""
+    printer = FakePrinter(status_details=["paper_out"])
+    assert printer.print_pdf("doc.pdf", 3)
+    assert printer.jobs[0]["copies"] == 3
+    
+    status = printer.check_printer_status()
+    assert not status["ready"] and status["details"] == {"paper_out": True}
+
+def test_create_printer_by_name():
+    """Test that the backend is selected by name"""
+    assert isinstance(create_printer(backend="fake"), FakePrinter)
+    with pytest.raises(ValueError):
+        create_printer(backend="dot-matrix")
+
+def test_auto_never_picks_fake_printer(monkeypatch):
+    """Test that 'auto' fails instead of faking prints when no spooler exists"""
+    monkeypatch.setattr(print_backends.sys, "platform", "linux")
+    monkeypatch.setattr(print_backends.shutil, "which", lambda name: None)
+    assert print_backends.default_backend() is None
+    with pytest.raises(RuntimeError):
+        create_printer(backend="auto")
+    
+    monkeypatch.setattr(print_backends.shutil, "which", lambda name: "/usr/bin/lp")
+    assert isinstance(create_printer(backend="auto"), CupsPrinter)
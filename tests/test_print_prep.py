@@ -0,0 +1,144 @@
+"""
+Tests for the PrintPrep class.
+"""
+import os
+import threading
+import fitz
+import pytest
+from src.utils.print_backends import FakePrinter
+from src.utils.print_prep import PrintPrep, file_hash
+from src.utils.print_queue import PrintQueue, CONFIRMED, FAILED
+from src.utils.sqlite_manager import SQLiteManager
+
+class FlakyPrinter(FakePrinter):
+    """Fake printer that fails chosen spool calls"""
+    
+    def __init__(self, fail_calls=()):
+        super().__init__()
+        self.fail_calls = set(fail_calls)
+        self.calls = 0
+        
+    def print_pdf(self, pdf_path, copies=1, print_settings=None, show_errors=True):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            return False
+        return super().print_pdf(pdf_path, copies, print_settings, show_errors)
+
+def make_pdf(path, pages, landscape_pages=()):
+    """Write a PDF with numbered pages of mixed sizes"""
+    doc = fitz.open()
+    for number in range(pages):
+        if number in landscape_pages:
+            page = doc.new_page(width=842, height=595)
+        else:
+            page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 72), f"Page {number + 1}", fontname="helv")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+@pytest.fixture
+def prep(tmp_path):
+    """Create a PrintPrep with small chunks and its own cache"""
+    return PrintPrep(cache_dir=tmp_path / "cache", chunk_pages=4)
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def test_document_split_and_normalized(prep, tmp_path):
+    """Test that pages are fitted to the paper size and split into chunks"""
+    pdf = make_pdf(tmp_path / "doc.pdf", 10, landscape_pages=[5])
+    manifest = prep.prepare(pdf)
+    
+    assert manifest['pages'] == 10
+    assert manifest['hash'] == file_hash(pdf)
+    assert [(c['start'], c['end']) for c in manifest['chunks']] == [(0, 4), (4, 8), (8, 10)]
+    assert manifest['rasterized'] == []
+    
+    letter = fitz.paper_rect("letter")
+    with fitz.open(manifest['chunks'][1]['path']) as chunk:
+        assert chunk.page_count == 4
+        assert chunk[0].rect == letter
+        assert chunk[1].rect.width == letter.height  # Landscape page stays landscape
+        assert "Page 6" in chunk[1].get_text()
+
+def test_prepared_document_cached(prep, tmp_path):
+    """Test that preparing the same file again reuses the cached chunks"""
+    pdf = make_pdf(tmp_path / "doc.pdf", 5)
+    first = prep.prepare(pdf)
+    built = os.path.getmtime(first['chunks'][0]['path'])
+    
+    # A copy with another name has the same hash
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(open(pdf, 'rb').read())
+    second = prep.prepare(str(copy))
+    
+    assert second['chunks'] == first['chunks']
+    assert os.path.getmtime(second['chunks'][0]['path']) == built
+
+def test_cache_rebuilt_for_new_settings(prep, tmp_path):
+    """Test that a cache entry made with other settings is not reused"""
+    pdf = make_pdf(tmp_path / "doc.pdf", 5)
+    prep.prepare(pdf)
+    
+    other = PrintPrep(cache_dir=prep.cache_dir, chunk_pages=2)
+    assert len(other.prepare(pdf)['chunks']) == 3
+
+def test_cache_pruned(tmp_path):
+    """Test that the least recently used documents are removed from the cache"""
+    prep = PrintPrep(cache_dir=tmp_path / "cache", max_entries=2)
+    hashes = [prep.prepare(make_pdf(tmp_path / f"doc{n}.pdf", n + 1))['hash'] for n in range(3)]
+    
+    assert sorted(os.listdir(prep.cache_dir)) == sorted(hashes[1:])
+
+def test_invalid_documents_rejected(prep, tmp_path):
+    """Test that files that cannot be printed raise ValueError"""
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    with pytest.raises(ValueError):
+        prep.prepare(str(broken))
+    
+    with pytest.raises(ValueError):
+        prep.prepare(str(tmp_path / "missing.pdf"))
+    
+    locked = tmp_path / "locked.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(locked), encryption=fitz.PDF_ENCRYPT_AES_256, user_pw="secret", owner_pw="secret")
+    doc.close()
+    with pytest.raises(ValueError):
+        prep.prepare(str(locked))
+
+def test_queue_spools_chunks(db, prep, tmp_path):
+    """Test that the print queue sends each chunk of each copy"""
+    pdf = make_pdf(tmp_path / "doc.pdf", 10)
+    printer = FakePrinter()
+    queue = PrintQueue(db, printer, prep=prep)
+    job_id = queue.submit(pdf, 10, 2, False, 60)
+    queue.stop(5)
+    
+    chunks = [c['path'] for c in prep.prepare(pdf)['chunks']]
+    assert [job['pdf_path'] for job in printer.jobs] == chunks * 2
+    assert db.get_print_queue_job(job_id)['state'] == CONFIRMED
+
+def test_queue_resumes_at_failed_chunk(db, prep, tmp_path):
+    """Test that a retried job starts again from the chunk that failed"""
+    pdf = make_pdf(tmp_path / "doc.pdf", 10)
+    printer = FlakyPrinter(fail_calls=[5])
+    queue = PrintQueue(db, printer, prep=prep, retry_delay=0.01)
+    done = threading.Event()
+    job_id = queue.submit(pdf, 10, 2, False, 60,
+                          callback=lambda job_id, state, progress, message:
+                          state in (CONFIRMED, FAILED) and done.set())
+    assert done.wait(5)
+    queue.stop(5)
+    
+    chunks = [c['path'] for c in prep.prepare(pdf)['chunks']]
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == CONFIRMED and job['attempts'] == 2
+    # Call 5 was the second chunk of the second copy; nothing before it is reprinted
+    assert [j['pdf_path'] for j in printer.jobs] == chunks * 2
@@ -0,0 +1,158 @@
+"""
+Tests for the PrintQueue class.
+"""
+import threading
+import pytest
+from src.utils.print_queue import PrintQueue, PAID, QUEUED, SPOOLING, SENT, CONFIRMED, FAILED
+from src.utils.sqlite_manager import SQLiteManager
+
+class MockPrinter:
+    """Printer double that records jobs instead of printing"""
+    
+    def __init__(self, ready=True, succeed=True, failures=0):
+        self.ready = ready
+        self.succeed = succeed
+        self.failures = failures
+        self.printed = []
+        self.release = threading.Event()
+        self.release.set()
+        
+    def check_printer_status(self):
+        return {"code": 0, "ready": self.ready, "details": {} if self.ready else {"offline": True}}
+        
+    def print_pdf(self, pdf_path, copies=1, print_settings=None, show_errors=True):
+        assert not show_errors, "The worker thread must not open dialogs"
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.printed.append((pdf_path, copies))
+        return self.succeed
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def run_job(queue, updates, **kwargs):
+    """Submit a job and wait for it to finish"""
+    done = threading.Event()
+    
+    def callback(job_id, state, progress, message):
+        updates.append((state, progress))
+        if state in (CONFIRMED, FAILED):
+            done.set()
+    
+    job_id = queue.submit("doc.pdf", 2, 3, False, 18, callback=callback, **kwargs)
+    assert done.wait(5)
+    return job_id
+
+def test_job_spooled_and_logged(db):
+    """Test that a queued job is printed one copy at a time and confirmed"""
+    printer = MockPrinter()
+    queue = PrintQueue(db, printer)
+    updates = []
+    job_id = run_job(queue, updates)
+    queue.stop(5)
+    
+    assert printer.printed == [("doc.pdf", 1)] * 3
+    states = [state for state, _ in updates]
+    assert states[0] == QUEUED and states[-2:] == [SENT, CONFIRMED]
+    
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == CONFIRMED and job['pages_sent'] == 6
+    assert db.get_print_job_stats(1)[0]['id'] == job['print_job_id']
+
+def test_printer_not_ready_fails_job(db):
+    """Test that a job fails without printing when the printer is offline"""
+    printer = MockPrinter(ready=False)
+    queue = PrintQueue(db, printer, max_attempts=1)
+    job_id = run_job(queue, [])
+    queue.stop(5)
+    
+    assert printer.printed == []
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == FAILED
+    assert "offline" in job['error']
+
+def test_submit_returns_before_spooling(db):
+    """Test that submitting does not wait for the printer"""
+    printer = MockPrinter()
+    printer.release.clear()
+    queue = PrintQueue(db, printer)
+    
+    job_id = queue.submit("doc.pdf", 1, 1, True, 5)
+    assert db.get_print_queue_job(job_id)['state'] in (QUEUED, SPOOLING)
+    
+    printer.release.set()
+    queue.stop(5)
+    assert db.get_print_queue_job(job_id)['state'] == CONFIRMED
+
+def test_updates_go_through_dispatch(db):
+    """Test that callbacks are handed to the dispatch function"""
+    dispatched = []
+    queue = PrintQueue(db, MockPrinter(), dispatch=lambda fn: dispatched.append(fn) or fn())
+    updates = []
+    run_job(queue, updates)
+    queue.stop(5)
+    assert len(dispatched) == len(updates)
+
+def test_failed_attempt_is_retried(db):
+    """Test that a failed spool is retried from the copy that failed"""
+    printer = MockPrinter(failures=1)
+    queue = PrintQueue(db, printer, retry_delay=0.01)
+    job_id = run_job(queue, [])
+    queue.stop(5)
+    
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == CONFIRMED and job['attempts'] == 2
+    assert len(printer.printed) == 3
+
+def test_unfinished_jobs_resumed(db):
+    """Test that paid and part-printed jobs are finished on the next start"""
+    paid_id = db.add_print_queue_job("paid.pdf", 1, 1, False, 3, state=PAID)
+    partial_id = db.add_print_queue_job("partial.pdf", 2, 3, False, 18, state=SPOOLING)
+    db.update_print_queue_job(partial_id, pages_sent=4)
+    sent_id = db.add_print_queue_job("sent.pdf", 1, 1, False, 3, state=SENT)
+    
+    printer = MockPrinter()
+    queue = PrintQueue(db, printer)
+    assert queue.resume() == [paid_id, partial_id, sent_id]
+    queue.stop(5)
+    
+    # Only the copy that was not finished is printed again, and sent jobs are only confirmed
+    assert printer.printed == [("paid.pdf", 1), ("partial.pdf", 1)]
+    for job_id in (paid_id, partial_id, sent_id):
+        assert db.get_print_queue_job(job_id)['state'] == CONFIRMED
+
+def test_recorded_job_not_counted_twice(db):
+    """Test that a job recorded just before a crash is not recorded again on resume"""
+    db.set_setting('paper_level', 50)
+    job_id = db.add_print_queue_job("sent.pdf", 2, 1, False, 6, state=SENT)
+    print_job_id = db.log_print_job("sent.pdf", 2, 1, False, 6, True, queue_job_id=job_id)
+    assert db.get_setting('paper_level', cast=int) == 48
+    
+    # Crash before the journal reached CONFIRMED
+    queue = PrintQueue(db, MockPrinter())
+    queue.resume()
+    queue.stop(5)
+    
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == CONFIRMED and job['print_job_id'] == print_job_id
+    assert db.execute_query("SELECT COUNT(*) FROM print_jobs", fetch_one=True)[0] == 1
+    assert db.get_setting('paper_level', cast=int) == 48
+
+def test_empty_job_runs_out_of_attempts(db):
+    """Test that a job with nothing to print fails instead of being retried forever"""
+    printer = MockPrinter()
+    queue = PrintQueue(db, printer, max_attempts=2, retry_delay=0.01)
+    done = threading.Event()
+    job_id = queue.submit("empty.pdf", 0, 1, False, 0,
+                          callback=lambda job_id, state, progress, message: state == FAILED and done.set())
+    assert done.wait(5)
+    queue.stop(5)
+    
+    job = db.get_print_queue_job(job_id)
+    assert job['state'] == FAILED and job['attempts'] == 2
@@ -0,0 +1,87 @@
+"""
+Tests for the PrinterStatusMonitor class.
+"""
+import time
+from src.utils.print_backends import FakePrinter
+from src.utils.printer_status import PrinterStatusMonitor
+
+class CountingPrinter(FakePrinter):
+    """Fake printer that counts status checks"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.checks = 0
+        
+    def check_printer_status(self):
+        self.checks += 1
+        return super().check_printer_status()
+
+def test_status_unknown_before_first_poll():
+    """Test that the cache reports an unknown status before any check"""
+    monitor = PrinterStatusMonitor(CountingPrinter())
+    status = monitor.get_status()
+    assert status["status"] == "unknown" and not status["ready"]
+
+def test_reads_come_from_cache():
+    """Test that reading the status does not query the printer"""
+    printer = CountingPrinter()
+    monitor = PrinterStatusMonitor(printer, interval=60)
+    monitor.start()
+    try:
+        assert monitor.get_status(wait=5)["ready"]
+        for _ in range(10):
+            monitor.get_status()
+        assert printer.checks == 1
+    finally:
+        monitor.stop(5)
+
+def test_subscribers_notified_only_on_change():
+    """Test that subscribers hear about changes, not every poll"""
+    printer = CountingPrinter()
+    monitor = PrinterStatusMonitor(printer)
+    changes = []
+    monitor.subscribe(changes.append)
+    
+    monitor.poll()
+    monitor.poll()
+    printer.status_details = {"paper_jam"}
+    monitor.poll()
+    
+    assert len(changes) == 2
+    assert changes[-1]["details"] == {"paper_jam": True}
+    assert monitor.get_status()["age"] is not None
+
+def test_refresh_wakes_poller():
+    """Test that refresh triggers a check before the interval ends"""
+    printer = CountingPrinter()
+    monitor = PrinterStatusMonitor(printer, interval=60)
+    monitor.start()
+    try:
+        monitor.get_status(wait=5)
+        monitor.refresh()
+        deadline = time.monotonic() + 5
+        while printer.checks < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert printer.checks == 2
+    finally:
+        monitor.stop(5)
+
+def test_print_queue_uses_cached_status(tmp_path):
+    """Test that the print queue fails a job the cached status says cannot print"""
+    from src.utils.print_queue import PrintQueue, FAILED
+    from src.utils.sqlite_manager import SQLiteManager
+    
+    db = SQLiteManager(tmp_path / "test.db")
+    printer = CountingPrinter(status_details=["paper_out"])
+    monitor = PrinterStatusMonitor(printer, interval=60)
+    monitor.poll()
+    queue = PrintQueue(db, printer, status_monitor=monitor, max_attempts=1)
+    try:
+        job_id = queue.submit("doc.pdf", 1, 1, False, 3)
+        queue.stop(5)
+        job = db.get_print_queue_job(job_id)
+        assert job["state"] == FAILED
+        assert "paper_out" in job["error"]
+        assert printer.jobs == []
+    finally:
+        db.close()
@@ -0,0 +1,37 @@
+"""
+Tests for the lazy screen registry.
+"""
+import subprocess
+import sys
+import pytest
+import src.screens as screens
+
+def test_startup_imports_stay_light():
+    """Test that the startup path does not load PyMuPDF, PIL or matplotlib"""
+    code = (
+        "import sys\n"
+        "import src.screens, src.screens.main_screen, src.screens.receive_screen\n"
+        "import src.screens.admin_screen, src.utils.page_cache, src.utils.print_prep\n"
+        "heavy = [m for m in ('fitz', 'pymupdf', 'PIL', 'matplotlib') if m in sys.modules]\n"
+        "print(','.join(heavy))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+def test_load_screen():
+    """Test that screens are loaded by name"""
+    selection = screens.load_screen('selection')
+    assert selection.__name__ == 'SelectionScreen'
+    assert screens.SelectionScreen is selection
+    
+    with pytest.raises(KeyError):
+        screens.load_screen('missing')
+
+def test_every_registered_screen_exists():
+    """Test that the registry only names real screen classes"""
+    for module, class_name in screens.SCREENS.values():
+        assert class_name in screens.__all__
+    
+    with pytest.raises(AttributeError):
+        screens.NoSuchScreen
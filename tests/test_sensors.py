@@ -0,0 +1,173 @@
+"""
+Tests for PisoPrintSensors reading the Arduino sensors.
+"""
+import time
+import pytest
+from src.monitor.sensor import PisoPrintSensors, parse_all_reading
+from src.utils.sqlite_manager import SQLiteManager
+
+class FakeLink:
+    """Shared Arduino link answering sensor commands from a table"""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.commands = []
+        self.subscribers = {}
+
+    def is_connected(self):
+        return True
+
+    def send_command(self, command, expect=None, timeout=2):
+        self.commands.append(command)
+        return self.replies.get(command)
+
+    def subscribe(self, tag, callback):
+        self.subscribers.setdefault(tag, []).append(callback)
+
+    def push(self, tag, payload):
+        for callback in self.subscribers.get(tag, []):
+            callback(payload)
+
+SINGLE_REPLIES = {
+    "READ_WEIGHT": "WEIGHT:200.00",
+    "READ_INK_BLACK": "INK_BLACK:LOW",
+    "READ_INK_CYAN": "INK_CYAN:LOW",
+    "READ_INK_MAGENTA": "INK_MAGENTA:HIGH",
+    "READ_INK_YELLOW": "INK_YELLOW:LOW",
+}
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def test_parse_all_reading():
+    """Test parsing a READ_ALL record"""
+    readings = parse_all_reading("ALL:WEIGHT=210.50;BLACK=LOW;CYAN=HIGH")
+    assert readings == {"WEIGHT": "210.50", "BLACK": "LOW", "CYAN": "HIGH"}
+    assert parse_all_reading("WEIGHT:210.50") is None
+    assert parse_all_reading("ALL:garbage") is None
+    assert parse_all_reading(None) is None
+
+def test_sweep_uses_one_round_trip(db):
+    """Test that a sweep reads every sensor with a single READ_ALL"""
+    link = FakeLink({"READ_ALL": "ALL:WEIGHT=200.00;BLACK=LOW;CYAN=LOW;MAGENTA=HIGH;YELLOW=LOW"})
+    sensors = PisoPrintSensors(db, link=link)
+
+    result = sensors.update_all_sensors()
+
+    assert link.commands == ["READ_ALL"]
+    assert result['paper_weight'] == 200.0
+    assert result['ink_levels']['magenta'] <= 20
+    assert db.get_setting('paper_level', cast=int) == sensors.paper_count
+
+def test_sweep_falls_back_on_old_firmware(db):
+    """Test that firmware without READ_ALL is read one sensor at a time, and only asked once"""
+    replies = dict(SINGLE_REPLIES, READ_ALL="ERROR:Unknown command: READ_ALL")
+    link = FakeLink(replies)
+    sensors = PisoPrintSensors(db, link=link)
+
+    first = sensors.update_all_sensors()
+    assert link.commands[0] == "READ_ALL"
+    assert len(link.commands) == 6
+    assert first['paper_weight'] == 200.0
+
+    link.commands.clear()
+    sensors.update_all_sensors()
+    assert "READ_ALL" not in link.commands
+    assert len(link.commands) == 5
+
+def test_sweep_tolerates_bad_record(db):
+    """Test that an invalid READ_ALL reply keeps the last readings without giving up on it"""
+    replies = dict(SINGLE_REPLIES, READ_ALL="ALL:WEIGHT")
+    link = FakeLink(replies)
+    sensors = PisoPrintSensors(db, link=link)
+    sensors.current_weight = 150.0
+
+    assert sensors.update_all_sensors()['paper_weight'] == 150.0
+    assert link.commands == ["READ_ALL"]
+    assert sensors.read_all_supported is None
+
+def test_missing_reply_does_not_fall_back(db):
+    """Test that a controller that does not answer costs one timeout per sweep, not six"""
+    link = FakeLink(dict(SINGLE_REPLIES, READ_ALL=None))
+    sensors = PisoPrintSensors(db, link=link)
+
+    sensors.update_all_sensors()
+    sensors.update_all_sensors()
+    assert link.commands == ["READ_ALL", "READ_ALL"]
+    assert sensors.read_all_supported is None
+
+def wait_for(condition, timeout=2):
+    """Poll a condition until it holds or the timeout passes"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_streamed_reading_updates_database(db):
+    """Test that a pushed reading is stored by the monitor thread as soon as it arrives"""
+    link = FakeLink({
+        "READ_ALL": "ALL:WEIGHT=200.00;BLACK=LOW;CYAN=LOW;MAGENTA=LOW;YELLOW=LOW",
+        "STREAM:ON": "STREAM:ON",
+        "STREAM:OFF": "STREAM:OFF",
+    })
+    sensors = PisoPrintSensors(db, link=link)
+    sensors.start_monitoring(interval=60, stream=True)
+    try:
+        assert wait_for(lambda: sensors.streaming)
+
+        link.push('SENSOR', "WEIGHT=40.00;BLACK=LOW;CYAN=LOW;MAGENTA=LOW;YELLOW=LOW")
+        assert sensors.paper_count == 0
+        assert wait_for(lambda: db.get_setting('paper_level', cast=int) == 0)
+
+        link.push('SENSOR', "WEIGHT=200.00;BLACK=LOW;CYAN=LOW;MAGENTA=LOW;YELLOW=HIGH")
+        assert wait_for(lambda: db.get_setting('paper_level', cast=int) == sensors.paper_count > 0)
+        assert sensors.ink_levels['yellow'] <= 20
+    finally:
+        sensors.stop_monitoring()
+
+def test_sensor_event_does_not_write_database(db, monkeypatch):
+    """Test that the serial reader thread never waits on a database write"""
+    sensors = PisoPrintSensors(db, link=FakeLink({}))
+    monkeypatch.setattr(db, 'set_settings', lambda values: pytest.fail("written on the reader thread"))
+    sensors.on_sensor_event("WEIGHT=200.00;BLACK=LOW;CYAN=LOW;MAGENTA=LOW;YELLOW=LOW")
+    assert sensors.paper_count > 0
+
+def test_streaming_not_retried_on_old_firmware(db):
+    """Test that firmware without streaming is polled and not asked again"""
+    link = FakeLink({"STREAM:ON": "ERROR:Unknown command: STREAM:ON"})
+    sensors = PisoPrintSensors(db, link=link)
+
+    assert not sensors.start_streaming()
+    assert not sensors.start_streaming()
+    assert link.commands == ["STREAM:ON"]
+
+def test_polling_resumes_when_stream_goes_quiet(db):
+    """Test that polling stops while streaming and comes back when heartbeats stop"""
+    link = FakeLink({
+        "READ_ALL": "ALL:WEIGHT=200.00;BLACK=LOW;CYAN=LOW;MAGENTA=LOW;YELLOW=LOW",
+        "STREAM:ON": "STREAM:ON",
+        "STREAM:OFF": "STREAM:OFF",
+    })
+    sensors = PisoPrintSensors(db, link=link)
+    sensors.heartbeat_timeout = 0.3
+    sensors.start_monitoring(interval=0.05, stream=True)
+    try:
+        time.sleep(0.15)
+        assert sensors.streaming
+        assert link.commands.count("READ_ALL") == 1
+
+        # Heartbeats keep the stream alive without polling
+        for _ in range(4):
+            link.push('HEARTBEAT', "12")
+            time.sleep(0.1)
+        assert link.commands.count("READ_ALL") == 1
+
+        time.sleep(0.5)
+        assert link.commands.count("READ_ALL") >= 2
+    finally:
+        sensors.stop_monitoring()
+    assert not sensors.running
@@ -0,0 +1,279 @@
+"""
+Tests for the SerialMux class and the components sharing the Arduino link.
+"""
+import threading
+import time
+import pytest
+from src.utils.arduino_interface import ArduinoInterface
+from src.utils.buzzer_interface import BuzzerInterface
+from src.utils.serial_mux import SerialMux
+from src.utils.serial_reader import BinaryFramer, encode_frame
+
+class FakeArduino:
+    """Serial port that answers commands like the sensor firmware"""
+
+    def __init__(self, replies=None, write_delay=0):
+        self.replies = replies or {}
+        self.write_delay = write_delay
+        self.buffer = bytearray()
+        self.ready = threading.Condition()
+        self.written = []
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def feed(self, line):
+        with self.ready:
+            self.buffer.extend((line + '\n').encode('utf-8'))
+            self.ready.notify_all()
+
+    def write(self, data):
+        time.sleep(self.write_delay)
+        command = data.decode('utf-8').strip()
+        self.written.append(command)
+        reply = self.replies.get(command, f"ERROR:Unknown command: {command}")
+        for line in reply if isinstance(reply, list) else [reply]:
+            self.feed(line)
+
+    def read(self, size=1):
+        with self.ready:
+            self.ready.wait_for(lambda: self.buffer or not self.is_open, timeout=0.5)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+    def close(self):
+        with self.ready:
+            self.is_open = False
+            self.ready.notify_all()
+
+class FramingArduino(FakeArduino):
+    """Fake Arduino whose firmware can switch to binary frames at a new baudrate"""
+
+    def __init__(self, replies=None, after_switch=None):
+        super().__init__(replies)
+        self.baudrate = 9600  # Set by the host
+        self.board_baudrate = 9600
+        self.binary = False
+        self.after_switch = after_switch or []
+        self.framer = BinaryFramer()
+        self.seq = 0
+
+    def encode(self, line):
+        if self.baudrate != self.board_baudrate:
+            return b"\x00\xff" * (len(line) + 1)  # Garbage at the wrong baudrate
+        if not self.binary:
+            return (line + '\n').encode('utf-8')
+        data = encode_frame(line, self.seq)
+        self.seq += 1
+        return data
+
+    def feed(self, line):
+        with self.ready:
+            self.buffer.extend(self.encode(line))
+            self.ready.notify_all()
+
+    def reset_board(self):
+        """Restart the firmware, which comes back on ASCII at 9600 baud"""
+        self.binary = False
+        self.board_baudrate = 9600
+        self.framer = BinaryFramer()
+        self.feed("READY")
+
+    def write(self, data):
+        if self.baudrate != self.board_baudrate:
+            return  # Unreadable at the wrong baudrate
+        commands = self.framer.feed(data) if self.binary else [data.decode('utf-8').strip()]
+        for command in commands:
+            self.written.append(command)
+            if not self.binary and command.startswith("PROTO:BIN:"):
+                with self.ready:
+                    self.buffer.extend(self.encode(command))
+                    self.board_baudrate = int(command.split(':')[2])
+                    self.binary = True
+                    self.seq = 0
+                    # Frames sent right after the switch, arriving in the same read
+                    for line in self.after_switch:
+                        self.buffer.extend(encode_frame(line, self.seq))
+                        self.seq += 1
+                    self.ready.notify_all()
+                continue
+            self.feed(self.replies.get(command, f"ERROR:Unknown command: {command}"))
+
+@pytest.fixture
+def mux():
+    """Create a SerialMux on a fake Arduino"""
+    mux = SerialMux("FAKE")
+    mux.open(FakeArduino({"READ_WEIGHT": "WEIGHT:210.50", "TEST": "READY"}))
+    yield mux
+    mux.close()
+
+def test_request_returns_reply(mux):
+    """Test that a request gets the reply to its command"""
+    assert mux.request("READ_WEIGHT", expect="WEIGHT") == "WEIGHT:210.50"
+
+def test_coins_not_swallowed_by_requests(mux):
+    """Test that coin events arriving around a reply still reach their subscriber"""
+    coins = []
+    mux.subscribe('COIN', coins.append)
+    mux.serial.replies["READ_WEIGHT"] = ["COIN:5", "WEIGHT:100.00", "COIN:1"]
+
+    assert mux.request("READ_WEIGHT", expect="WEIGHT") == "WEIGHT:100.00"
+    deadline = time.time() + 1
+    while len(coins) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert coins == ['5', '1']
+
+def test_stray_line_does_not_answer_request(mux):
+    """Test that a line with the wrong tag is not taken as the reply"""
+    mux.serial.replies["READ_INK_BLACK"] = ["READY", "INK_BLACK:LOW"]
+    assert mux.request("READ_INK_BLACK", expect="INK_BLACK") == "INK_BLACK:LOW"
+
+def test_unknown_fire_and_forget_command_ignored(mux):
+    """Test that the firmware rejecting a beep does not answer a pending request"""
+    mux.serial.replies["READ_WEIGHT"] = []
+    replies = []
+    thread = threading.Thread(target=lambda: replies.append(
+        mux.request("READ_WEIGHT", expect="WEIGHT", timeout=1)))
+    thread.start()
+    time.sleep(0.05)
+    mux.send("BEEP:SHORT")
+    time.sleep(0.05)
+    mux.serial.feed("WEIGHT:5.00")
+    thread.join(2)
+    assert replies == ["WEIGHT:5.00"]
+
+def test_request_times_out(mux):
+    """Test that a request without a reply returns None after its timeout"""
+    mux.serial.replies["READ_WEIGHT"] = []
+    started = time.perf_counter()
+    assert mux.request("READ_WEIGHT", expect="WEIGHT", timeout=0.2) is None
+    assert time.perf_counter() - started < 1
+
+def test_send_does_not_wait_for_port():
+    """Test that queued writes return at once even when the port is slow"""
+    mux = SerialMux("FAKE")
+    mux.open(FakeArduino(write_delay=0.2))
+    try:
+        started = time.perf_counter()
+        for _ in range(3):
+            assert mux.send("BEEP:SHORT")
+        assert time.perf_counter() - started < 0.1
+    finally:
+        mux.close()
+
+def test_close_releases_waiting_requests():
+    """Test that closing the port wakes requests instead of leaving them waiting"""
+    mux = SerialMux("FAKE")
+    mux.open(FakeArduino({"READ_WEIGHT": []}))
+    replies = []
+    thread = threading.Thread(target=lambda: replies.append(mux.request("READ_WEIGHT", timeout=5)))
+    thread.start()
+    time.sleep(0.05)
+    mux.close()
+    thread.join(2)
+    assert replies == [None]
+    assert not mux.send("BEEP:SHORT")
+
+def test_buzzer_goes_through_link():
+    """Test that beeps are queued on the shared link"""
+    fake = FakeArduino({"PING": "PONG", "BEEP:SUCCESS": []})
+    arduino = ArduinoInterface("FAKE")
+    assert arduino.connect(serial_port=fake)
+    try:
+        BuzzerInterface(arduino).success()
+        deadline = time.time() + 1
+        while "BEEP:SUCCESS" not in fake.written and time.time() < deadline:
+            time.sleep(0.01)
+        assert "BEEP:SUCCESS" in fake.written
+    finally:
+        arduino.disconnect()
+
+def test_binary_framing_negotiated():
+    """Test that supporting firmware is switched to binary frames at the new baudrate"""
+    fake = FramingArduino({"PING": "PONG", "READ_WEIGHT": "WEIGHT:12.00"})
+    mux = SerialMux("FAKE")
+    mux.open(fake)
+    try:
+        assert mux.negotiate_binary(115200, 'PING', 'PONG')
+        assert mux.binary and fake.binary
+        assert fake.baudrate == 115200
+        assert mux.request("READ_WEIGHT", expect="WEIGHT") == "WEIGHT:12.00"
+        assert fake.written[-2:] == ["PING", "READ_WEIGHT"]
+    finally:
+        mux.close()
+
+def test_coin_frames_reach_subscriber():
+    """Test that coins sent as frames are credited, and damaged ones are not"""
+    fake = FramingArduino({"PING": "PONG"})
+    mux = SerialMux("FAKE")
+    coins = []
+    mux.subscribe('COIN', coins.append)
+    mux.open(fake)
+    try:
+        assert mux.negotiate_binary(115200, 'PING', 'PONG')
+        damaged = bytearray(encode_frame("COIN:1", fake.seq))
+        damaged[8] ^= 0x04
+        with fake.ready:
+            fake.buffer.extend(damaged)
+        fake.feed("COIN:2")
+        deadline = time.time() + 1
+        while not coins and time.time() < deadline:
+            time.sleep(0.01)
+        assert coins == ['2']
+    finally:
+        mux.close()
+
+def test_old_firmware_stays_on_ascii():
+    """Test that firmware without framing keeps the ASCII protocol and baudrate"""
+    fake = FakeArduino({"PING": "PONG"})
+    fake.baudrate = 9600
+    arduino = ArduinoInterface("FAKE", binary_baudrate=115200)
+    assert arduino.connect(serial_port=fake)
+    try:
+        assert not arduino.mux.binary
+        assert fake.baudrate == 9600
+        assert "PROTO:BIN:115200" in fake.written
+        assert arduino.send_command("PING", expect="PONG") == "PONG"
+    finally:
+        arduino.disconnect()
+
+def wait_for(condition, timeout=5):
+    """Poll a condition until it holds or the timeout passes"""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_frames_after_switch_not_lost():
+    """Test that a frame read together with the switch acknowledgement is delivered"""
+    fake = FramingArduino({"PING": "PONG"}, after_switch=["COIN:5"])
+    mux = SerialMux("FAKE")
+    coins = []
+    mux.subscribe('COIN', coins.append)
+    mux.open(fake)
+    try:
+        assert mux.negotiate_binary(115200, 'PING', 'PONG')
+        assert wait_for(lambda: coins == ['5'])
+    finally:
+        mux.close()
+
+def test_binary_link_recovers_after_board_reset():
+    """Test that the link is negotiated again when the board restarts on ASCII"""
+    fake = FramingArduino({"PING": "PONG"})
+    mux = SerialMux("FAKE")
+    coins = []
+    mux.subscribe('COIN', coins.append)
+    mux.open(fake)
+    try:
+        assert mux.negotiate_binary(115200, 'PING', 'PONG')
+        mux.sync_timeout = 0.2
+        fake.reset_board()
+
+        assert wait_for(lambda: fake.written.count("PROTO:BIN:115200") == 2 and fake.binary and mux.binary)
+        fake.feed("COIN:5")
+        assert wait_for(lambda: coins == ['5'])
+    finally:
+        mux.close()
@@ -0,0 +1,146 @@
+"""
+Tests for serial line framing and the blocking serial readers.
+"""
+import threading
+import time
+from src.utils.coin_acceptor import CoinAcceptor
+from src.utils.serial_reader import (BinaryFramer, LineFramer, encode_frame, frame_crc,
+                                     read_available, split_message)
+from src.config import COIN_VALUES
+
+class BlockingSerial:
+    """Serial port whose read blocks like a real one until data or the timeout"""
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+        self.buffer = bytearray()
+        self.ready = threading.Condition()
+        self.is_open = True
+        self.reads = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def feed(self, data):
+        with self.ready:
+            self.buffer.extend(data)
+            self.ready.notify_all()
+
+    def read(self, size=1):
+        with self.ready:
+            self.reads += 1
+            self.ready.wait_for(lambda: self.buffer or not self.is_open, timeout=self.timeout)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+    def cancel_read(self):
+        with self.ready:
+            self.ready.notify_all()
+
+    def close(self):
+        with self.ready:
+            self.is_open = False
+            self.ready.notify_all()
+
+def test_framer_joins_partial_lines():
+    """Test that a line split across reads is returned once complete"""
+    framer = LineFramer()
+    assert framer.feed(b"CO") == []
+    assert framer.feed(b"IN:5\r\nADMIN:") == ["COIN:5"]
+    assert framer.feed(b"PRESSED\n\n") == ["ADMIN:PRESSED"]
+
+def test_framer_drops_overlong_line():
+    """Test that line noise longer than the limit is dropped up to its newline"""
+    framer = LineFramer(max_length=16)
+    assert framer.feed(b"X" * 40) == []
+    assert framer.feed(b"XXXX\nCOIN:1\n") == ["COIN:1"]
+
+def test_framer_survives_bad_bytes():
+    """Test that undecodable bytes do not stop later lines"""
+    framer = LineFramer()
+    lines = framer.feed(b"\xff\xfe\nCOIN:2\n")
+    assert lines[-1] == "COIN:2"
+
+def test_split_message():
+    """Test splitting messages into tag and payload"""
+    assert split_message("COIN:5") == ("COIN", "5")
+    assert split_message("PONG") == ("PONG", None)
+    assert split_message("WEIGHT: 12.5") == ("WEIGHT", "12.5")
+
+def test_frame_crc():
+    """Test the frame CRC against the CRC16-CCITT check value"""
+    assert frame_crc(b"123456789") == 0x29B1
+
+def test_binary_framer_decodes_split_frames():
+    """Test that frames split across reads are returned once complete"""
+    data = encode_frame("COIN:5", 0) + encode_frame("PONG", 1)
+    framer = BinaryFramer()
+    assert framer.feed(data[:4]) == []
+    assert framer.feed(data[4:]) == ["COIN:5", "PONG"]
+
+def test_corrupted_coin_frame_is_dropped():
+    """Test that a coin frame damaged on the wire is dropped, not credited"""
+    damaged = bytearray(encode_frame("COIN:1", 0))
+    damaged[8] ^= 0x04  # COIN:1 becomes COIN:5
+    framer = BinaryFramer()
+    assert framer.feed(bytes(damaged) + encode_frame("COIN:2", 1)) == ["COIN:2"]
+    assert framer.crc_errors == 1
+
+def test_binary_framer_resyncs_after_noise():
+    """Test that noise and a truncated frame do not hide the next frame"""
+    framer = BinaryFramer()
+    noise = b"\x00\xa5\xff\x13" + encode_frame("COIN:1", 0)[:5]
+    assert framer.feed(noise + encode_frame("ADMIN:PRESSED", 1)) == ["ADMIN:PRESSED"]
+
+def test_binary_framer_tracks_sequence():
+    """Test that missing frames are counted and a restarted sequence is still delivered"""
+    framer = BinaryFramer()
+    frames = [encode_frame("COIN:1", 0), encode_frame("COIN:2", 3), encode_frame("COIN:5", 3)]
+    assert framer.feed(b"".join(frames)) == ["COIN:1", "COIN:2", "COIN:5"]
+    assert framer.lost_frames == 2 + 255
+
+def test_binary_framer_counts_bad_bytes():
+    """Test that bytes which never form a frame are counted until a valid frame arrives"""
+    framer = BinaryFramer()
+    assert framer.feed(b"READY\r\n") == []
+    assert framer.bad_bytes == 7
+    assert framer.feed(encode_frame("PONG", 0)) == ["PONG"]
+    assert framer.bad_bytes == 0
+
+def test_read_available_takes_whole_burst():
+    """Test that everything already buffered is read in one call"""
+    port = BlockingSerial()
+    port.feed(b"COIN:1\nCOIN:2\n")
+    assert read_available(port) == b"COIN:1\nCOIN:2\n"
+
+def test_coin_reaches_callback_without_polling_delay():
+    """Test that a coin is credited as soon as it arrives, not on a polling tick"""
+    port = BlockingSerial(timeout=1.0)
+    acceptor = CoinAcceptor(port="MOCK", baudrate=9600)
+    acceptor.serial = port
+    acceptor.running = True
+
+    credited = threading.Event()
+    values = []
+    acceptor.set_callback(lambda value: (values.append(value), credited.set()))
+    thread = threading.Thread(target=acceptor._read_coins, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.05)  # Let the reader block in read
+        pulses, value = next(iter(COIN_VALUES.items()))
+        started = time.perf_counter()
+        port.feed(f"COIN:{pulses}\n".encode())
+        assert credited.wait(0.5)
+        assert time.perf_counter() - started < 0.05
+        assert values == [value]
+
+        # Idle, the reader wakes once per read timeout rather than ten times a second
+        reads = port.reads
+        time.sleep(0.3)
+        assert port.reads - reads <= 1
+    finally:
+        acceptor.disconnect()
+        thread.join(2)
+    assert not thread.is_alive()
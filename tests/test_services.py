@@ -0,0 +1,142 @@
+"""
+Tests for the shared services container and the shared Arduino connection.
+"""
+import threading
+import pytest
+import serial
+from src.monitor.sensor import PisoPrintSensors
+from src.utils.arduino_interface import ArduinoInterface
+from src.utils.services import Services
+from src.utils.sqlite_manager import SQLiteManager
+
+class FakeSerial:
+    """Serial port that answers sensor commands and can inject coin events"""
+
+    def __init__(self, replies=None):
+        self.replies = replies or {}
+        self.buffer = bytearray()
+        self.ready = threading.Condition()
+        self.written = []
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def feed(self, line):
+        with self.ready:
+            self.buffer.extend((line + '\n').encode('utf-8'))
+            self.ready.notify_all()
+
+    def write(self, data):
+        command = data.decode('utf-8').strip()
+        self.written.append(command)
+        if command in self.replies:
+            self.feed(self.replies[command])
+
+    def read(self, size=1):
+        with self.ready:
+            self.ready.wait_for(lambda: self.buffer or not self.is_open, timeout=0.5)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+    def close(self):
+        with self.ready:
+            self.is_open = False
+            self.ready.notify_all()
+
+class FakeLink:
+    """Stand-in for the kiosk's ArduinoInterface"""
+
+    def __init__(self, connected, replies=None):
+        self.connected = connected
+        self.replies = replies or {}
+        self.commands = []
+
+    def is_connected(self):
+        return self.connected
+
+    def send_command(self, command, expect=None, timeout=2):
+        self.commands.append(command)
+        return self.replies.get(command)
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def no_port(monkeypatch):
+    """Fail the test if anything opens a serial port"""
+    def refuse(*args, **kwargs):
+        raise AssertionError("serial port opened")
+    monkeypatch.setattr(serial, "Serial", refuse)
+
+def connected_interface(fake):
+    """Create an ArduinoInterface connected to a fake port"""
+    fake.replies.setdefault("PING", "PONG")
+    arduino = ArduinoInterface("FAKE")
+    assert arduino.connect(serial_port=fake)
+    return arduino
+
+def test_send_command_returns_reply_and_keeps_events():
+    """Test that a command reply is returned while coin events still reach their callback"""
+    fake = FakeSerial({"READ_WEIGHT": "WEIGHT:120.5"})
+    arduino = connected_interface(fake)
+    coins = []
+    arduino.set_coin_callback(coins.append)
+    try:
+        fake.feed("COIN:5")
+        assert arduino.send_command("READ_WEIGHT") == "WEIGHT:120.5"
+        assert coins == [5]
+    finally:
+        arduino.disconnect()
+
+def test_send_command_when_disconnected():
+    """Test that commands are not sent without a connection"""
+    arduino = ArduinoInterface("FAKE")
+    assert not arduino.is_connected()
+    assert arduino.send_command("READ_WEIGHT") is None
+
+def test_sensors_use_shared_link(db, no_port):
+    """Test that sensors talk through the kiosk's connection instead of the port"""
+    link = FakeLink(True, {"READ_WEIGHT": "WEIGHT:200", "READ_INK_BLACK": "INK_BLACK:LOW"})
+    sensors = PisoPrintSensors(db, link=link)
+
+    assert sensors.is_connected()
+    assert sensors.read_paper_weight() == 200
+    sensors.read_ink_level('black')
+    assert link.commands == ["READ_WEIGHT", "READ_INK_BLACK"]
+
+def test_sensors_simulate_while_link_down(db, no_port):
+    """Test that a disconnected shared link gives simulated readings, not a second port"""
+    link = FakeLink(False)
+    sensors = PisoPrintSensors(db, link=link)
+
+    assert not sensors.is_connected()
+    assert sensors.read_paper_weight() == sensors.current_weight
+    assert not sensors.initialize_arduino()
+    assert link.commands == []
+
+def test_services_share_one_sensor_monitor(db, no_port):
+    """Test that the sensor monitor is started once and stopped with the container"""
+    services = Services(db, arduino=FakeLink(False))
+    sensors = services.start_sensors(interval=60)
+    try:
+        assert sensors is not None
+        assert services.start_sensors() is sensors
+        assert sensors.db_manager is db
+    finally:
+        services.shutdown()
+    assert not sensors.running
+
+def test_shutdown_leaves_shared_components(db):
+    """Test that the container does not close what the kiosk passed in"""
+    services = Services(db)
+    services.shutdown()
+
+    db.set_setting('paper_level', 42)
+    assert db.get_setting('paper_level', cast=int) == 42
@@ -0,0 +1,219 @@
+"""
+Tests for the SQLiteManager class.
+"""
+import threading
+import time
+import pytest
+from src.utils.db_migrations import to_epoch
+from src.utils.sqlite_manager import SQLiteManager
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def test_wal_mode_enabled(db):
+    """Test that pooled connections use WAL journaling"""
+    mode = db.execute_query("PRAGMA journal_mode", fetch_one=True)[0]
+    assert mode.lower() == "wal"
+
+def test_reader_connection_reused_per_thread(db):
+    """Test that a thread keeps the same reader connection between queries"""
+    first = db.pool.reader()
+    db.get_setting('price_bw_page')
+    assert db.pool.reader() is first
+
+def test_threads_get_separate_readers(db):
+    """Test that each thread gets its own reader connection"""
+    main_conn = db.pool.reader()
+    other = {}
+
+    thread = threading.Thread(target=lambda: other.setdefault('conn', db.pool.reader()))
+    thread.start()
+    thread.join()
+
+    assert other['conn'] is not main_conn
+
+def test_dead_thread_reader_is_recycled(db):
+    """Test that a finished thread's connection is reused by the next thread"""
+    seen = []
+    for _ in range(2):
+        thread = threading.Thread(target=lambda: seen.append(db.pool.reader()))
+        thread.start()
+        thread.join()
+
+    assert seen[0] is seen[1]
+
+def test_writes_visible_to_readers(db):
+    """Test that committed writes are visible on reader connections"""
+    assert db.set_setting('price_bw_page', 7)
+    assert db.get_setting('price_bw_page') == '7'
+
+def test_insert_returns_row_id(db):
+    """Test that INSERT queries return the new row id"""
+    job_id = db.log_print_job("doc.pdf", 2, 1, False, 6, False)
+    assert isinstance(job_id, int)
+    assert db.get_print_job_stats(1)[0]['id'] == job_id
+
+def test_close_releases_connections(db):
+    """Test that closing the manager closes pooled connections"""
+    db.pool.reader()
+    db.close()
+    assert db.pool._writer is None
+    assert db.pool._readers == {}
+
+def test_queued_logs_written_after_flush(db):
+    """Test that log rows are written once the write-behind queue is flushed"""
+    db.log_admin_access("Test action", "details")
+    db.log_system_stat("ink_low", 10, "Low black ink")
+    assert db.flush(timeout=5)
+
+    assert db.get_admin_logs(1)[0]['action'] == "Test action"
+    count = db.execute_query("SELECT COUNT(*) FROM system_stats WHERE stat_type = 'ink_low'", fetch_one=True)[0]
+    assert count == 1
+
+def test_burst_of_stats_commits_in_one_batch(db):
+    """Test that a burst of telemetry rows is group-committed"""
+    db.writes.flush_interval = 60  # Only the explicit flush may end the batch
+    for i in range(10):
+        db.log_system_stat("paper_low", i)
+    before = db.writes.batches_committed
+    assert db.flush(timeout=5)
+
+    assert db.writes.batches_committed == before + 1
+    count = db.execute_query("SELECT COUNT(*) FROM system_stats", fetch_one=True)[0]
+    assert count == 10
+
+def test_payment_is_a_durability_barrier(db):
+    """Test that a payment is committed before log_payment returns"""
+    db.writes.flush_interval = 60
+    started = time.monotonic()
+    assert db.log_payment(5)
+    assert time.monotonic() - started < 5
+
+    assert db.get_total_revenue() == 5.0
+    revenue_stats = db.execute_query("SELECT COUNT(*) FROM system_stats WHERE stat_type = 'revenue'", fetch_one=True)[0]
+    assert revenue_stats == 1
+
+def test_payment_callback_does_not_block(db):
+    """Test that log_payment with a callback returns before the row is committed"""
+    logged = []
+    committed = threading.Event()
+    with db.pool.write_lock:  # Hold up the writer thread
+        started = time.monotonic()
+        assert db.log_payment(5, callback=lambda ok: (logged.append(ok), committed.set()))
+        assert time.monotonic() - started < 1
+        assert logged == []
+    
+    assert committed.wait(5)
+    assert logged == [True]
+    assert db.get_total_revenue() == 5.0
+
+def test_settings_cache_reflects_writes(db):
+    """Test that set_setting writes through to the settings cache"""
+    db.get_setting('price_bw_page')
+    db.set_setting('price_bw_page', 4)
+    assert db.get_setting('price_bw_page', cast=float) == 4.0
+
+def test_write_through_survives_concurrent_refresh(db, monkeypatch):
+    """Test that a value set while another thread reloads the cache is not lost"""
+    db.get_setting('price_bw_page')
+    write = db.pool.write
+
+    def write_after_refresh(*args, **kwargs):
+        db.refresh_settings(force=True)  # Swaps in a new cache dict
+        return write(*args, **kwargs)
+
+    monkeypatch.setattr(db.pool, 'write', write_after_refresh)
+    db.set_setting('price_bw_page', 7)
+    assert db.get_setting('price_bw_page') == '7'
+
+def test_get_settings_uses_defaults(db):
+    """Test that missing settings fall back to the given defaults"""
+    settings = db.get_settings({'price_bw_page': 3, 'missing_key': 'fallback'})
+    assert settings['missing_key'] == 'fallback'
+    assert 'price_bw_page' in settings
+
+def test_json_settings_are_parsed(db):
+    """Test that JSON setting values are returned as Python objects"""
+    db.set_setting('coin_values', {'1': 1, '2': 5})
+    value = db.get_setting('coin_values')
+    assert value == {'1': 1, '2': 5}
+
+    # Cached copies must not be shared with callers
+    value['3'] = 10
+    assert '3' not in db.get_setting('coin_values')
+
+def test_subscriber_notified_on_set(db):
+    """Test that subscribers are called when a watched setting changes"""
+    changes = []
+    db.subscribe_settings(lambda key, value: changes.append((key, value)), keys=['price_color_page'])
+    db.set_settings({'price_color_page': 6, 'price_bw_page': 2})
+    assert changes == [('price_color_page', '6')]
+
+def test_change_from_other_connection_detected(db, tmp_path):
+    """Test that settings written by another process are picked up"""
+    changes = []
+    db.get_settings(['price_bw_page'])
+    db.subscribe_settings(lambda key, value: changes.append((key, value)), keys=['price_bw_page'])
+
+    other = SQLiteManager(tmp_path / "test.db")
+    try:
+        other.set_setting('price_bw_page', 9)
+    finally:
+        other.close()
+
+    db.refresh_settings()
+    assert db.get_setting('price_bw_page') == '9'
+    assert ('price_bw_page', '9') in changes
+
+def add_jobs(db, count, day="2024-03-01"):
+    """Insert print jobs one minute apart on a fixed day"""
+    for i in range(count):
+        timestamp = f"{day}T10:{i:02d}:00"
+        db.execute_query('''
+        INSERT INTO print_jobs (timestamp, ts_epoch, filename, pages, copies, is_colored, amount_paid, success)
+        VALUES (?, ?, ?, 1, 1, ?, ?, ?)
+        ''', (timestamp, to_epoch(timestamp), f"doc{i}.pdf", i % 2, 3 + i, i % 3 != 0))
+
+def test_print_jobs_pages_cover_all_rows(db):
+    """Test that following cursors returns every row once, newest first"""
+    add_jobs(db, 7)
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = db.get_print_jobs_page(cursor=cursor, limit=3)
+        seen.extend(row['filename'] for row in rows)
+        if cursor is None:
+            break
+
+    assert seen == [f"doc{i}.pdf" for i in reversed(range(7))]
+
+def test_print_jobs_page_filters(db):
+    """Test the date, colour, success and amount filters"""
+    add_jobs(db, 6)
+    add_jobs(db, 2, day="2024-03-05")
+
+    rows, _ = db.get_print_jobs_page(start="2024-03-01", end="2024-03-01")
+    assert len(rows) == 6
+
+    rows, _ = db.get_print_jobs_page(end="2024-03-01", is_colored=True, success=True)
+    assert [row['filename'] for row in rows] == ["doc5.pdf", "doc1.pdf"]
+
+    rows, _ = db.get_print_jobs_page(start="2024-03-01", end="2024-03-01", min_amount=6, max_amount=7)
+    assert {row['amount_paid'] for row in rows} == {6, 7}
+
+def test_bad_cursor_returns_empty_page(db):
+    """Test that a malformed cursor is rejected without raising"""
+    assert db.get_print_jobs_page(cursor="not-a-cursor") == ([], None)
+
+def test_payments_page(db):
+    """Test paging through payments"""
+    for amount in (1, 5, 10):
+        db.log_payment(amount)
+    assert db.flush(timeout=5)
+
+    rows, cursor = db.get_payments_page(limit=2, min_amount=5)
+    assert len(rows) == 2 and cursor is None
@@ -0,0 +1,47 @@
+"""
+Tests for the StartupProfiler class.
+"""
+import threading
+import time
+import pytest
+from src.utils.startup import StartupProfiler
+
+def test_phases_recorded_per_thread():
+    """Test that phases from background threads are recorded with their thread"""
+    profiler = StartupProfiler()
+    with profiler.phase('database'):
+        time.sleep(0.01)
+    
+    def boot():
+        with profiler.phase('printer'):
+            pass
+    
+    thread = threading.Thread(target=boot, name="boot-printer")
+    thread.start()
+    thread.join()
+    profiler.mark('boot complete')
+    
+    phases = {phase['name']: phase for phase in profiler.phases}
+    assert phases['database']['duration'] >= 0.01
+    assert phases['printer']['thread'] == "boot-printer"
+    assert phases['boot complete']['duration'] is None
+
+def test_failed_phase_reported():
+    """Test that a phase that raises is recorded as failed"""
+    profiler = StartupProfiler()
+    with pytest.raises(RuntimeError):
+        with profiler.phase('arduino'):
+            raise RuntimeError("no port")
+    
+    assert profiler.phases[0]['ok'] is False
+    assert "arduino (failed)" in profiler.report()
+
+def test_report_in_start_order():
+    """Test that the report lists phases by when they started"""
+    profiler = StartupProfiler(origin=time.perf_counter() - 1)
+    profiler.mark('second')
+    profiler._record('first', profiler.origin, 0.5, True)
+    
+    lines = profiler.report().splitlines()
+    assert 'first' in lines[1] and 'second' in lines[2]
+    assert lines[1].strip().startswith("0.000s")
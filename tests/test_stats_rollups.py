@@ -0,0 +1,117 @@
+"""
+Tests for the hourly and daily statistics rollups.
+"""
+import pytest
+from datetime import date
+from src.utils.db_migrations import to_epoch
+from src.utils.sqlite_manager import SQLiteManager
+
+@pytest.fixture
+def db(tmp_path):
+    """Create a SQLiteManager backed by a temporary database"""
+    manager = SQLiteManager(tmp_path / "test.db")
+    yield manager
+    manager.close()
+
+def log_activity(db):
+    """Log a mix of jobs and payments"""
+    db.log_print_job("bw.pdf", 2, 3, False, 18, True)
+    db.log_print_job("color.pdf", 1, 2, True, 10, True)
+    db.log_print_job("failed.pdf", 5, 1, False, 15, False)
+    db.log_payment(20)
+    db.log_payment(8)
+    assert db.flush(timeout=5)
+
+def rollup_totals(db, table):
+    """Sum the rollup columns of a table"""
+    return db.execute_query(f'''
+    SELECT SUM(revenue), SUM(payments), SUM(jobs), SUM(pages),
+           SUM(color_jobs), SUM(color_pages), SUM(bw_jobs), SUM(bw_pages)
+    FROM {table}
+    ''', fetch_one=True)
+
+def test_rollups_updated_as_rows_are_logged(db):
+    """Test that jobs and payments are added to both rollups"""
+    log_activity(db)
+    for table in ('stats_hourly', 'stats_daily'):
+        assert tuple(rollup_totals(db, table)) == (28.0, 2, 2, 8, 1, 2, 1, 6)
+
+def test_totals_match_raw_tables(db):
+    """Test that rollup-backed totals agree with the raw history"""
+    log_activity(db)
+    assert db.get_total_revenue() == 28.0
+    assert db.get_total_pages_printed() == 8
+
+    stats = db.get_daily_stats(7)
+    assert stats[date.today().isoformat()] == {'revenue': 28.0, 'pages': 8, 'jobs': 2}
+    assert sum(day['jobs'] for day in stats.values()) == 2
+
+def test_rebuild_matches_incremental(db):
+    """Test that rebuilding gives the same rollups as incremental updates"""
+    log_activity(db)
+    before = rollup_totals(db, 'stats_hourly')
+
+    db.execute_query("DELETE FROM stats_hourly")
+    assert db.rebuild_rollups()
+
+    assert tuple(rollup_totals(db, 'stats_hourly')) == tuple(before)
+
+def test_rebuild_counts_rows_without_epoch(db):
+    """Test that rebuilding buckets legacy rows without ts_epoch like the triggers do"""
+    db.execute_query('''
+    INSERT INTO print_jobs (timestamp, filename, pages, copies, is_colored, amount_paid, success)
+    VALUES ('2024-03-01T09:00:00', 'old.pdf', 2, 1, 0, 6, 1)
+    ''')
+    db.execute_query("INSERT INTO payment_transactions (timestamp, amount) VALUES ('2024-03-01T09:05:00', 6)")
+    before = {table: rollup_totals(db, table) for table in ('stats_hourly', 'stats_daily')}
+    assert tuple(before['stats_daily']) == (6.0, 1, 1, 2, 0, 0, 1, 2)
+
+    assert db.rebuild_rollups()
+    for table, totals in before.items():
+        assert tuple(rollup_totals(db, table)) == tuple(totals)
+
+def insert_job(db, timestamp, pages, is_colored=False):
+    """Insert a successful print job at a fixed time"""
+    db.execute_query('''
+    INSERT INTO print_jobs (timestamp, ts_epoch, filename, pages, copies, is_colored, amount_paid, success)
+    VALUES (?, ?, 'doc.pdf', ?, 1, ?, ?, 1)
+    ''', (timestamp, to_epoch(timestamp), pages, is_colored, pages * 3))
+
+def test_period_stats_zero_fill_gaps(db):
+    """Test that days without activity are returned with zeros"""
+    insert_job(db, "2024-03-01T09:00:00", 2)
+    insert_job(db, "2024-03-03T15:30:00", 4, is_colored=True)
+
+    rows = db.get_period_stats('day', start="2024-03-01", end="2024-03-03")
+    assert [row.period for row in rows] == ['2024-03-01', '2024-03-02', '2024-03-03']
+    assert [row.pages for row in rows] == [2, 0, 4]
+    assert rows[2].color_jobs == 1 and rows[0].bw_jobs == 1
+
+def test_period_stats_granularities(db):
+    """Test hourly, weekly and monthly grouping"""
+    insert_job(db, "2024-03-01T09:10:00", 1)
+    insert_job(db, "2024-03-01T09:50:00", 2)
+    insert_job(db, "2024-03-05T10:00:00", 3)
+    insert_job(db, "2024-04-02T10:00:00", 5)
+
+    hours = db.get_period_stats('hour', start="2024-03-01T09:00:00", end="2024-03-01T11:00:00")
+    assert [(row.period, row.jobs) for row in hours] == [('2024-03-01 09:00', 2), ('2024-03-01 10:00', 0)]
+
+    # 2024-02-26 is the Monday of the first week
+    weeks = db.get_period_stats('week', start="2024-03-01", end="2024-03-10")
+    assert [(row.period, row.pages) for row in weeks] == [('2024-02-26', 3), ('2024-03-04', 3)]
+
+    months = db.get_period_stats('month', start="2024-03-15", end="2024-04-30")
+    assert [(row.period, row.pages) for row in months] == [('2024-03', 6), ('2024-04', 5)]
+
+def test_period_stats_end_date_matches_job_list(db):
+    """Test that a date-only end includes that day, as the print job list does"""
+    insert_job(db, "2024-03-03T15:30:00", 4)
+
+    rows = db.get_period_stats('day', start="2024-03-01", end="2024-03-03")
+    jobs, _ = db.get_print_jobs_page(start="2024-03-01", end="2024-03-03")
+    assert sum(row.jobs for row in rows) == len(jobs) == 1
+
+def test_period_stats_rejects_unknown_granularity(db):
+    """Test that an unknown granularity returns no rows"""
+    assert db.get_period_stats('fortnight') == []